@@ -0,0 +1,120 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional
+import numpy as np
+from .telemetry import ANSWER_CACHE_LOOKUPS
+
+
+@dataclass
+class CacheEntry:
+    """캐시된 답변 한 건"""
+
+    scope: Hashable
+    vector: np.ndarray
+    answer: str
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """질문 임베딩 기반 유사 질문 답변 캐시
+
+    모델코드 범위마다 정규화된 질문 임베딩 행렬을 두고, 코사인 유사도가 threshold
+    이상인 질문 중 가장 가까우면서 TTL이 남은 질문의 답변을 돌려준다. 만료된 항목은
+    조회 시 제거하고, max_entries를 넘으면 가장 오래 쓰이지 않은 항목부터 버린다 (LRU).
+    인덱서가 기록한 컬렉션 버전이 바뀌면 전체를 비운다. 적중/실패 수는
+    rag_answer_cache_lookups_total 지표로 내보낸다.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._scope_keys: Dict[Hashable, List[int]] = {}
+        self._scope_matrix: Dict[Hashable, np.ndarray] = {}
+        self._next_key = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def check_version(self, version: Any) -> None:
+        """컬렉션 버전(RAGIndexer.index_version)이 바뀌었으면 캐시 전체 무효화"""
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+
+    def lookup(self, vector, scope: Hashable) -> Optional[str]:
+        """유사 질문의 답변 반환 (없으면 None)"""
+        query = self._normalize(vector)
+        now = time.monotonic()
+
+        with self._lock:
+            keys = self._scope_keys.get(scope)
+            if keys:
+                matrix = self._scope_matrix.get(scope)
+                if matrix is None:
+                    matrix = np.stack([self._entries[k].vector for k in keys])
+                    self._scope_matrix[scope] = matrix
+
+                # threshold를 넘는 질문을 가까운 순서로 보면서 만료된 항목은 건너뜀
+                scores = matrix @ query
+                candidates = np.flatnonzero(scores >= self.threshold)
+                answer, expired = None, []
+                for index in candidates[np.argsort(-scores[candidates])]:
+                    key = keys[index]
+                    entry = self._entries[key]
+                    if entry.expires_at <= now:
+                        expired.append(key)
+                        continue
+                    self._entries.move_to_end(key)
+                    answer = entry.answer
+                    break
+
+                for key in expired:
+                    self._remove(key)
+                if answer is not None:
+                    ANSWER_CACHE_LOOKUPS.inc(result="hit")
+                    return answer
+
+            ANSWER_CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def store(self, vector, scope: Hashable, answer: str) -> None:
+        """답변 저장"""
+        entry = CacheEntry(
+            scope=scope,
+            vector=self._normalize(vector),
+            answer=answer,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = entry
+            self._scope_keys.setdefault(scope, []).append(key)
+            self._scope_matrix.pop(scope, None)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: int) -> None:
+        entry = self._entries.pop(key)
+        keys = self._scope_keys[entry.scope]
+        keys.remove(key)
+        if not keys:
+            del self._scope_keys[entry.scope]
+        self._scope_matrix.pop(entry.scope, None)
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._scope_keys.clear()
+        self._scope_matrix.clear()
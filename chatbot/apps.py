@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ChatbotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "chatbot"
+
+    def ready(self):
+        # 대화/메시지 저장 시 목록 캐시 무효화
+        from . import signals  # noqa: F401
+
+        # 워커 기동 시 RAG 런타임(Chroma/LLM 클라이언트)을 미리 생성
+        if getattr(settings, "CHATBOT_WARMUP", False):
+            from .runtime import warmup
+
+            warmup()
@@ -0,0 +1,54 @@
+import time
+import hashlib
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+
+# 사용자별 목록 캐시 버전 (대화/메시지가 바뀌면 새 버전으로 교체)
+_VERSION_KEY = "chatbot:lists:version:{user_id}"
+
+
+def _new_version() -> int:
+    # 시각 기반이라 캐시에서 밀려난 뒤 다시 만들어도 이전 버전과 겹치지 않음
+    return time.time_ns()
+
+
+def _list_key(user_id: int, version: int, parts) -> str:
+    digest = hashlib.md5(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"chatbot:lists:{user_id}:{version}:{digest}"
+
+
+def list_cache_key(user_id: int, *parts) -> Optional[str]:
+    """사용자의 대화/메시지 목록 응답 캐시 키 (CONVERSATION_CACHE_TTL=0이면 None)
+
+    키에 사용자별 버전이 들어가서, 버전만 바꾸면 그 사용자의 목록 캐시가 한 번에
+    무효화된다 (이전 키는 TTL이 지나면 사라짐). 버전은 캐시에 있으므로 워커 간
+    무효화는 공유 캐시(redis)에서만 보장된다.
+    """
+    if not settings.CONVERSATION_CACHE_TTL:
+        return None
+    version_key = _VERSION_KEY.format(user_id=user_id)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_version(), timeout=None)
+        version = cache.get(version_key)
+    return _list_key(user_id, version, parts)
+
+
+async def alist_cache_key(user_id: int, *parts) -> Optional[str]:
+    """list_cache_key의 비동기 버전"""
+    if not settings.CONVERSATION_CACHE_TTL:
+        return None
+    version_key = _VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(version_key)
+    if version is None:
+        await cache.aadd(version_key, _new_version(), timeout=None)
+        version = await cache.aget(version_key)
+    return _list_key(user_id, version, parts)
+
+
+def invalidate_user_lists(user_id: int) -> None:
+    """사용자의 대화/메시지 목록 캐시 전체 무효화"""
+    if not settings.CONVERSATION_CACHE_TTL:
+        return
+    cache.set(_VERSION_KEY.format(user_id=user_id), _new_version(), timeout=None)
@@ -0,0 +1,114 @@
+"""챗봇 실행 설정 (환경 변수 / .env)
+
+RAG 파이프라인, 인덱싱, 작업 워커의 조정값을 모두 여기서 한 번에 읽는다. 인덱싱
+스크립트처럼 Django 설정 없이 실행하는 모듈도 쓰므로 django.conf.settings 대신
+decouple.config로 읽는다 (skn4th/settings.py와 같은 방식).
+"""
+
+import os
+from pathlib import Path
+from decouple import config
+from dotenv import load_dotenv
+
+# OpenAI/Tavily/Pinecone SDK는 API 키를 os.environ에서 읽으므로 .env를 환경 변수로 올림
+load_dotenv()
+
+# RAG 런타임 (runtime)
+MODEL_NAME = config("MODEL_NAME", default="gpt-4o-mini")
+# 분석 결과를 기다리지 않고 원 질문으로 벡터 검색을 먼저 시작할지 여부
+SPECULATIVE_RETRIEVAL = config("RAG_SPECULATIVE", cast=bool, default=True)
+# 검색 단계 전체 시간 예산 (초, 0이면 제한 없음)
+RETRIEVAL_TIME_BUDGET = config("RAG_TIME_BUDGET", cast=float, default=8)
+# 유사 질문 답변 캐시 (대화 이력이 없는 질문에만 사용)
+ANSWER_CACHE_ENABLED = config("ANSWER_CACHE", cast=bool, default=True)
+ANSWER_CACHE_THRESHOLD = config("ANSWER_CACHE_THRESHOLD", cast=float, default=0.92)
+ANSWER_CACHE_TTL = config("ANSWER_CACHE_TTL", cast=float, default=3600)
+ANSWER_CACHE_SIZE = config("ANSWER_CACHE_SIZE", cast=int, default=1000)
+# 이미지 모델 식별 방식 (local: 로컬 특징 카탈로그, chroma: base64 텍스트 임베딩 검색)
+IMAGE_SEARCH_BACKEND = config("IMAGE_SEARCH_BACKEND", default="local")
+
+# 이미지 모델 식별 (image_search)
+# 코사인 유사도가 이 값 이상이면 같은 모델로 판정
+IMAGE_MATCH_THRESHOLD = config("IMAGE_MATCH_THRESHOLD", cast=float, default=0.85)
+# 지각 해시(64비트) 해밍 거리가 이 값 이하인 후보를 우선 선택 (유사도 기준도 만족해야 함)
+IMAGE_HASH_MAX_DISTANCE = config("IMAGE_HASH_MAX_DISTANCE", cast=int, default=6)
+# 헤더의 가로x세로가 이보다 크면 디코딩하지 않고 거부
+IMAGE_MAX_PIXELS = config("IMAGE_MAX_PIXELS", cast=int, default=40000000)
+
+# 이미지 임베딩 검색 (rag_indexer_class)
+# 이미지 검색 시 같은 모델로 판정할 최대 거리 (Chroma 제곱 L2 거리)
+IMAGE_DISTANCE_THRESHOLD = config("IMAGE_DISTANCE_THRESHOLD", cast=float, default=0.3)
+# 컬렉션 임베딩 전체를 메모리 행렬로 올려서 검색할지 여부
+IMAGE_INDEX_IN_MEMORY = config("IMAGE_INDEX_IN_MEMORY", cast=bool, default=True)
+
+# 임베딩 캐시 (embedding_cache)
+EMBEDDING_CACHE_ENABLED = config("EMBEDDING_CACHE", cast=bool, default=True)
+EMBEDDING_CACHE_PATH = config("EMBEDDING_CACHE_PATH", default="./cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MEMORY = config("EMBEDDING_CACHE_MEMORY", cast=int, default=10000)
+
+# 인덱싱 (ingestion)
+EMBED_BATCH_SIZE = config("EMBED_BATCH_SIZE", cast=int, default=100)
+EMBED_CONCURRENCY = config("EMBED_CONCURRENCY", cast=int, default=4)
+EMBED_MAX_RETRIES = config("EMBED_MAX_RETRIES", cast=int, default=5)
+# 파이프라인 단계 사이 큐 크기
+INGEST_QUEUE_SIZE = config("INGEST_QUEUE_SIZE", cast=int, default=4)
+# 인덱싱된 파일 목록(manifest) 위치
+INGEST_MANIFEST_DIR = config("INGEST_MANIFEST_DIR", cast=Path, default="./cache/manifests")
+
+# PDF 텍스트 추출 (pdf_extraction)
+PDF_EXTRACT_WORKERS = config("PDF_EXTRACT_WORKERS", cast=int, default=os.cpu_count() or 1)
+PDF_PAGES_PER_TASK = config("PDF_PAGES_PER_TASK", cast=int, default=20)
+PDF_EXTRACT_CACHE_DIR = config("PDF_EXTRACT_CACHE_DIR", default="./cache/pdf_text")
+
+# 컨텍스트 조립 (context)
+# 최종 프롬프트에 넣을 컨텍스트 문서들의 토큰 예산 (0이면 제한 없음)
+CONTEXT_TOKEN_BUDGET = config("CONTEXT_TOKEN_BUDGET", cast=int, default=3000)
+# 컨텍스트 문서 하나당 프롬프트에 넣을 최대 글자 수
+CONTEXT_DOC_MAX_CHARS = config("CONTEXT_DOC_MAX_CHARS", cast=int, default=1200)
+
+# 대화 이력 (history)
+# 프롬프트에 그대로 넣을 최근 대화 턴 수 (사용자 + 챗봇 메시지 한 쌍이 한 턴)
+HISTORY_MAX_TURNS = config("HISTORY_MAX_TURNS", cast=int, default=3)
+# 최근 대화 원문에 쓸 토큰 예산
+HISTORY_TOKEN_BUDGET = config("HISTORY_TOKEN_BUDGET", cast=int, default=1500)
+
+# 답변 생성 작업 (jobs)
+# 웹 서버 기동 시 같은 프로세스 안에서 작업 워커를 시작할지 여부
+# (0이면 run_generation_workers로 따로 실행)
+GENERATION_IN_PROCESS = config("GENERATION_IN_PROCESS", cast=bool, default=True)
+# 프로세스 하나가 동시에 처리할 생성 작업 수
+GENERATION_CONCURRENCY = config("GENERATION_CONCURRENCY", cast=int, default=4)
+# 대기 작업이 없을 때 큐를 다시 확인하는 간격 (초)
+JOB_POLL_INTERVAL = config("JOB_POLL_INTERVAL", cast=float, default=0.5)
+# 작업 상태를 기다리는 클라이언트의 조회 간격 상한 (변화가 없으면 JOB_POLL_INTERVAL부터 두 배씩)
+JOB_MAX_POLL_INTERVAL = config("JOB_MAX_POLL_INTERVAL", cast=float, default=2)
+# 답변 생성 작업 전체(이력 로드/검색/생성/저장)의 최대 시간 (초, 넘으면 실패 처리 /
+# 멈춘 작업은 다시 대기열로)
+JOB_TIMEOUT = config("JOB_TIMEOUT", cast=float, default=180)
+JOB_MAX_ATTEMPTS = config("JOB_MAX_ATTEMPTS", cast=int, default=2)
+# 아무 워커도 가져가지 않은 작업을 실패로 처리할 때까지 기다리는 시간 (초)
+JOB_QUEUE_TIMEOUT = config("JOB_QUEUE_TIMEOUT", cast=float, default=120)
+# 생성 중인 답변을 다른 프로세스와 공유하는 최소 간격 (초, 공유 캐시가 있으면 캐시, 없으면
+# DB에 씀. 같은 프로세스의 스트림은 워커가 바로 알려줌)
+JOB_PROGRESS_INTERVAL = config("JOB_PROGRESS_INTERVAL", cast=float, default=0.25)
+
+# 지표 (telemetry)
+# 여러 프로세스(gunicorn 워커, 작업 워커)의 지표를 모으는 디렉터리 (비우면 프로세스 내 값만)
+METRICS_DIR = config("PROMETHEUS_MULTIPROC_DIR", default="")
+# 프로세스별 지표를 METRICS_DIR에 쓰는 간격 (초)
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", cast=float, default=5)
+
+# 외부 서비스 구현 선택 (providers)
+# openai | hash (오프라인 결정적 임베딩)
+EMBEDDING_BACKEND = config("EMBEDDING_BACKEND", default="openai")
+# openai | echo (오프라인 에코 LLM)
+LLM_BACKEND = config("LLM_BACKEND", default="openai")
+# tavily | fixture (JSON 픽스처 웹 검색)
+WEB_SEARCH_BACKEND = config("WEB_SEARCH_BACKEND", default="tavily")
+WEB_SEARCH_FIXTURES = config("WEB_SEARCH_FIXTURES", default="")
+# pinecone | memory (프로세스 내 벡터 저장소)
+VECTOR_STORE_BACKEND = config("VECTOR_STORE_BACKEND", default="pinecone")
+# 오프라인 구현의 호출당 지연 (초, 실제 API 응답 시간 흉내)
+EMBEDDING_LATENCY = config("EMBEDDING_LATENCY", cast=float, default=0)
+LLM_LATENCY = config("LLM_LATENCY", cast=float, default=0)
+WEB_SEARCH_LATENCY = config("WEB_SEARCH_LATENCY", cast=float, default=0)
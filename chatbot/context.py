@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import math
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+from .conf import CONTEXT_DOC_MAX_CHARS, CONTEXT_TOKEN_BUDGET
+from .tokens import estimate_tokens
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN_PATTERN = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# pdfminer가 글꼴 매핑에 실패한 글자
+_PDF_CID = re.compile(r"\(cid:\d+\)")
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(doc: Document) -> Tuple[str, str]:
+    """공백/대소문자 차이를 무시한 본문 해시 + 출처"""
+    text = _WHITESPACE.sub(" ", doc.page_content).strip().lower()
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return digest, str(doc.metadata.get("source", ""))
+
+
+def normalize_whitespace(text: str) -> str:
+    """pdfminer 출력 정리 (문단 안 줄바꿈/연속 공백은 공백 하나로, 문단은 줄바꿈 하나로)"""
+    text = _PDF_CID.sub("", text).replace("\x0c", "\n\n")
+    paragraphs = (" ".join(p.split()) for p in _PARAGRAPH_BREAK.split(text))
+    return "\n".join(p for p in paragraphs if p)
+
+
+def trim_text(text: str, max_chars: int = CONTEXT_DOC_MAX_CHARS) -> str:
+    """max_chars 글자 이내로 자르기 (가능하면 단어 경계에서)"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "…"
+
+
+def compact_text(doc: Document) -> str:
+    """프롬프트에 실제로 들어갈 문서 본문"""
+    return trim_text(normalize_whitespace(doc.page_content))
+
+
+def dedupe_documents(docs: Sequence[Document]) -> List[Document]:
+    """같은 출처의 같은 내용 문서 제거 (처음 나온 것만 유지)"""
+    seen = set()
+    unique = []
+    for doc in docs:
+        key = content_key(doc)
+        if key not in seen:
+            seen.add(key)
+            unique.append(doc)
+    return unique
+
+
+def text_terms(text: str) -> List[str]:
+    # 조사가 붙는 한국어를 위해 단어와 글자 2-gram을 함께 사용
+    terms = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(word)
+        terms.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def analysis_keywords(analysis: str) -> List[str]:
+    """질문 분석 JSON에서 키워드/주제 추출 (파싱 실패 시 빈 목록)"""
+    try:
+        data = json.loads(analysis)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(data, dict):
+        return []
+    keywords = [str(k) for k in data.get("keywords", [])]
+    if data.get("main_topic"):
+        keywords.append(str(data["main_topic"]))
+    return keywords
+
+
+def rerank_documents(
+    query: str, docs: Sequence[Document], keywords: Sequence[str] = ()
+) -> List[Tuple[float, Document]]:
+    """질문 + 키워드 기준 BM25 점수로 문서 정렬 (높은 순)
+
+    후보 문서 집합 자체를 말뭉치로 보고 IDF를 계산하는 로컬 리랭커라 모델 호출이 없다.
+    """
+    if not docs:
+        return []
+    query_terms = set(text_terms(" ".join([query, *keywords])))
+    doc_terms = [Counter(text_terms(doc.page_content)) for doc in docs]
+    lengths = [sum(terms.values()) for terms in doc_terms]
+    avg_length = (sum(lengths) / len(lengths)) or 1.0
+
+    n_docs = len(docs)
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for terms in doc_terms if term in terms)
+        idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    scored = []
+    for doc, terms, length in zip(docs, doc_terms, lengths):
+        score = 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        for term in query_terms:
+            tf = terms.get(term)
+            if tf:
+                score += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+        scored.append((score, doc))
+
+    # 점수가 같으면 원래 순서 유지 (sorted는 안정 정렬)
+    return sorted(scored, key=lambda item: item[0], reverse=True)
+
+
+def pack_documents(
+    scored: Sequence[Tuple[float, Document]], token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> List[Document]:
+    """점수 높은 문서부터 토큰 예산 안에 들어가는 만큼 선택
+
+    예산을 넘는 문서는 건너뛰고 더 짧은 다음 문서를 시도한다. 가장 관련 높은 문서는
+    예산을 넘더라도 항상 포함한다.
+    """
+    packed = []
+    used = 0
+    for _, doc in scored:
+        tokens = estimate_tokens(compact_text(doc))
+        if not packed or not token_budget or used + tokens <= token_budget:
+            packed.append(doc)
+            used += tokens
+    return packed
+
+
+def assemble_context(
+    query: str,
+    docs: Sequence[Document],
+    analysis: str = "",
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> List[Document]:
+    """검색 결과 → 중복 제거 → 리랭킹 → 토큰 예산 내 선택"""
+    unique = dedupe_documents(docs)
+    scored = rerank_documents(query, unique, analysis_keywords(analysis))
+    return pack_documents(scored, token_budget)
+
+
+def citation_label(doc: Document) -> str:
+    """출처 표시 (파일은 파일명만, 웹 문서는 제목 + URL, 페이지가 있으면 함께)"""
+    metadata = doc.metadata or {}
+    source = str(metadata.get("source", "") or "")
+    if source and not source.startswith(("http://", "https://")):
+        source = os.path.basename(source)
+    parts = [p for p in (metadata.get("title"), source) if p]
+    page = metadata.get("page", metadata.get("page_number"))
+    if page not in (None, ""):
+        parts.append(f"p.{page}")
+    return " | ".join(str(p) for p in parts) or "출처 미상"
+
+
+def format_context(
+    docs: Sequence[Document], retrieved: Optional[Sequence[Document]] = None
+) -> Tuple[str, Dict[str, int]]:
+    """컨텍스트 문서를 번호 붙은 인용 블록 텍스트로 변환
+
+    Document repr 대신 "[번호] 출처" 줄과 정리된 본문만 넣는다. 이전 방식 대비
+    절약한 토큰 수를 함께 돌려준다. 이전 방식은 검색 결과 전체(retrieved, 중복
+    제거/예산 적용 전)를 리스트 repr로 넣었으므로 그것을 기준으로 센다 (없으면 docs).
+    """
+    blocks = [
+        f"[{i}] {citation_label(doc)}\n{compact_text(doc)}"
+        for i, doc in enumerate(docs, start=1)
+    ]
+    text = "\n\n".join(blocks)
+
+    repr_tokens = estimate_tokens(str(list(docs if retrieved is None else retrieved)))
+    tokens = estimate_tokens(text)
+    stats = {
+        "documents": len(blocks),
+        "tokens": tokens,
+        "tokens_saved": max(repr_tokens - tokens, 0),
+    }
+    logger.info(
+        f"Context formatted: {stats['documents']} docs, {tokens} tokens "
+        f"({stats['tokens_saved']} saved)"
+    )
+    return text, stats
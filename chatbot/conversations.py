@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .cache import invalidate_user_lists
+from .models import Conversation, Message
+
+
+def message_count():
+    """대화별 메시지 수 (Conversation 쿼리에 annotate할 상관 서브쿼리)"""
+    counts = (
+        Message.objects.filter(conversation=OuterRef("pk"))
+        .order_by()
+        .values("conversation")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def title_from_message(user_message):
+    return user_message[:50] + "..." if len(user_message) > 50 else user_message
+
+
+def save_exchange(conversation, user_msg, assistant_content):
+    """생성이 끝난 질문/답변을 짧은 트랜잭션 하나로 저장 (쿼리 2개)
+
+    두 메시지를 bulk_create하고, 대화 수정 시각과 (첫 질문이면) 제목을 조건부
+    UPDATE 한 번으로 갱신한다. LLM 호출 중에는 트랜잭션/쓰기 쿼리가 없다.
+    """
+    now = timezone.now()
+    assistant_msg = Message(
+        conversation=conversation, role='assistant', content=assistant_content, created_at=now
+    )
+    title = title_from_message(user_msg.content)
+    earlier = Message.objects.filter(
+        conversation=OuterRef("pk"), created_at__lt=user_msg.created_at
+    )
+    with transaction.atomic():
+        Message.objects.bulk_create([user_msg, assistant_msg])
+        # 이 질문보다 먼저 저장된 메시지가 없을 때만 제목 변경
+        Conversation.objects.filter(pk=conversation.pk).update(
+            updated_at=now,
+            title=Case(When(Exists(earlier), then=F("title")), default=Value(title)),
+        )
+
+    # bulk_create/update는 저장 시그널이 없으므로 목록 캐시를 직접 무효화
+    invalidate_user_lists(conversation.user_id)
+
+    if not conversation.message_count:
+        conversation.title = title
+    conversation.message_count += 2
+    conversation.updated_at = now
+    return assistant_msg
+
@@ -0,0 +1,135 @@
+import re
+import csv
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .context import text_terms
+
+# 참고 자료 표기에서 문서 이름 비교 시 무시할 단어
+_REFERENCE_STOPWORDS = {"lg", "매뉴얼", "manual", "pdf"}
+_PAGE_PATTERN = re.compile(r"p\.?\s*(\d+)(?:\s*[-~]\s*(\d+))?", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def load_golden_dataset(path: str) -> List[Dict[str, str]]:
+    """골든 데이터셋 CSV (input_question, output_answer, contexts)"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return [row for row in csv.DictReader(f) if row.get("input_question")]
+
+
+def parse_references(contexts: str) -> List[Tuple[set, Optional[Tuple[int, int]]]]:
+    """"문서명 p.3-4 / 문서명 p.11" → [(문서명 단어 집합, (시작, 끝 페이지)), ...]"""
+    references = []
+    for part in contexts.split("/"):
+        part = part.strip()
+        if not part:
+            continue
+        pages = None
+        match = _PAGE_PATTERN.search(part)
+        if match:
+            start = int(match.group(1))
+            pages = (start, int(match.group(2) or start))
+            part = part[: match.start()]
+        words = {w.lower() for w in _WORD_PATTERN.findall(part)} - _REFERENCE_STOPWORDS
+        references.append((words, pages))
+    return references
+
+
+def matches_reference(label: str, reference: Tuple[set, Optional[Tuple[int, int]]]) -> bool:
+    """컨텍스트 출처 표시(citation_label)가 참고 자료와 맞는지
+
+    문서명 단어의 절반 이상이 출처에 있고, 양쪽에 페이지가 있으면 범위 안이어야 한다.
+    """
+    words, pages = reference
+    label_words = {w.lower() for w in _WORD_PATTERN.findall(label)}
+    if words and len(words & label_words) * 2 < len(words):
+        return False
+    if pages:
+        match = re.search(r"p\.(\d+)", label)
+        if match and not pages[0] <= int(match.group(1)) <= pages[1]:
+            return False
+    return bool(words) or bool(pages)
+
+
+def retrieval_hit(labels: Sequence[str], contexts: str) -> Optional[bool]:
+    """사용한 컨텍스트 중 하나라도 참고 자료와 맞으면 True (참고 자료가 없으면 None)"""
+    references = parse_references(contexts or "")
+    if not references:
+        return None
+    return any(matches_reference(label, ref) for label in labels for ref in references)
+
+
+def answer_similarity(answer: str, reference: str) -> float:
+    """단어 + 글자 2-gram 빈도 벡터의 코사인 유사도 (0~1)"""
+    a, b = Counter(text_terms(answer)), Counter(text_terms(reference))
+    dot = sum(count * b[term] for term, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values, dtype=float)
+    return {
+        "count": len(values),
+        "mean": round(float(array.mean()), 1),
+        "p50": round(float(np.percentile(array, 50)), 1),
+        "p95": round(float(np.percentile(array, 95)), 1),
+        "p99": round(float(np.percentile(array, 99)), 1),
+    }
+
+
+def summarize_results(results: List[Dict], wall_seconds: float) -> Dict:
+    """질문별 결과 → 단계별 지연 시간 분포, 처리량, 토큰, 검색 적중률, 답변 유사도"""
+    ok = [r for r in results if "error" not in r]
+
+    stage_ms: Dict[str, List[float]] = {}
+    for result in ok:
+        for span in result["spans"]:
+            stage_ms.setdefault(span["stage"], []).append(span["duration_ms"])
+    latency = {stage: percentiles(values) for stage, values in sorted(stage_ms.items())}
+    latency["request"] = percentiles([r["duration_ms"] for r in ok])
+
+    tokens = {}
+    for kind in sorted({kind for r in ok for kind in r["tokens"]}):
+        values = [r["tokens"].get(kind, 0) for r in ok]
+        tokens[kind] = {"total": sum(values), "mean": round(sum(values) / len(values), 1)}
+
+    hits = [r["retrieval_hit"] for r in ok if r["retrieval_hit"] is not None]
+    similarities = [r["answer_similarity"] for r in ok]
+
+    return {
+        "questions": len(results),
+        "errors": len(results) - len(ok),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_qps": round(len(ok) / wall_seconds, 3) if wall_seconds else 0.0,
+        "latency_ms": latency,
+        "tokens": tokens,
+        "retrieval_hit_rate": round(sum(hits) / len(hits), 3) if hits else None,
+        "answer_similarity": round(sum(similarities) / len(similarities), 3) if similarities else None,
+    }
+
+
+def compare_summaries(current: Dict, baseline: Dict) -> List[str]:
+    """이전 결과 대비 주요 지표 변화"""
+    lines = []
+
+    def row(name, now, before):
+        if now is None or before is None:
+            return
+        delta = now - before
+        ratio = f" ({delta / before:+.1%})" if before else ""
+        lines.append(f"{name}: {before} → {now}{ratio}")
+
+    row("throughput_qps", current["throughput_qps"], baseline.get("throughput_qps"))
+    for stage, stats in current["latency_ms"].items():
+        before = baseline.get("latency_ms", {}).get(stage, {})
+        row(f"{stage}.p95_ms", stats.get("p95"), before.get("p95"))
+    for kind, stats in current["tokens"].items():
+        before = baseline.get("tokens", {}).get(kind, {})
+        row(f"tokens.{kind}.mean", stats["mean"], before.get("mean"))
+    row("retrieval_hit_rate", current["retrieval_hit_rate"], baseline.get("retrieval_hit_rate"))
+    row("answer_similarity", current["answer_similarity"], baseline.get("answer_similarity"))
+    return lines
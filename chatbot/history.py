@@ -0,0 +1,109 @@
+import logging
+from typing import Dict, List
+from .conf import HISTORY_MAX_TURNS, HISTORY_TOKEN_BUDGET
+from .models import Conversation
+from .tokens import estimate_tokens
+
+ROLE_LABELS = {"user": "사용자", "assistant": "챗봇", "system": "시스템"}
+
+logger = logging.getLogger(__name__)
+
+
+def window_messages(
+    messages: List[Dict],
+    max_turns: int = HISTORY_MAX_TURNS,
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+) -> List[Dict]:
+    """최근 max_turns 턴 중 token_budget 안에 들어가는 메시지 (마지막 메시지는 항상 포함)
+
+    턴은 사용자 메시지 기준으로 센다 (답변이 아직 없는 현재 질문도 한 턴).
+    """
+    window = []
+    turns = 0
+    used = 0
+    for message in reversed(messages):
+        tokens = estimate_tokens(message["content"])
+        if window and (turns >= max_turns or used + tokens > token_budget):
+            break
+        window.append(message)
+        turns += message["role"] == "user"
+        used += tokens
+    return window[::-1]
+
+
+def with_summary(summary: str, messages: List[Dict]) -> List[Dict]:
+    """요약이 있으면 시스템 메시지로 최근 대화 앞에 붙인다"""
+    if not summary:
+        return messages
+    return [{"role": "system", "content": f"이전 대화 요약:\n{summary}"}] + messages
+
+
+def format_messages(messages: List[Dict]) -> str:
+    return "\n".join(
+        f"{ROLE_LABELS.get(m['role'], m['role'])}: {m['content']}" for m in messages
+    )
+
+
+async def _unsummarized_messages(conversation, limit=None) -> List[Dict]:
+    """요약에 아직 반영되지 않은 메시지 (limit이 있으면 마지막 limit개만)
+
+    최신순으로 필요한 개수만 role/content 컬럼만 읽는다 (Message(conversation,
+    created_at) 인덱스). conversation에 message_count가 annotate되어 있으면 개수
+    조회도 생략한다.
+    """
+    total = getattr(conversation, "message_count", None)
+    if total is None:
+        total = await conversation.messages.acount()
+    count = total - conversation.summary_message_count
+    if limit is not None:
+        count = min(count, limit)
+    if count <= 0:
+        return []
+    latest = conversation.messages.order_by("-created_at", "-id").values("role", "content")
+    messages = [message async for message in latest[:count]]
+    return messages[::-1]
+
+
+async def aload_history(conversation, pending: List[Dict] = ()) -> List[Dict]:
+    """LLM에 넘길 대화 이력 (누적 요약 + 최근 대화 창)
+
+    대화 길이와 상관없이 최근 HISTORY_MAX_TURNS 턴만 읽어서 요청당 비용이 일정하다.
+    pending은 아직 저장하지 않은 메시지 (생성이 끝난 뒤 답변과 함께 저장할 현재 질문).
+    """
+    messages = await _unsummarized_messages(conversation, limit=HISTORY_MAX_TURNS * 2)
+    return with_summary(conversation.summary, window_messages(messages + list(pending)))
+
+
+async def aupdate_summary(conversation) -> None:
+    """최근 대화 창 밖으로 밀려난 메시지만 기존 요약에 이어서 반영
+
+    전체를 다시 요약하지 않고 (기존 요약 + 새로 밀려난 메시지)만 LLM에 보낸다.
+    다른 요청이 먼저 요약을 갱신했으면 이번 결과는 버린다.
+    """
+    from .runtime import aget_runtime
+
+    messages = await _unsummarized_messages(conversation)
+    # 다음 요청에서 새 질문이 한 턴을 차지하므로 완료된 턴은 max_turns - 1개만 남김
+    keep = window_messages(messages, HISTORY_MAX_TURNS - 1) if HISTORY_MAX_TURNS > 1 else []
+    overflow = messages[: len(messages) - len(keep)]
+    if not overflow:
+        return
+
+    try:
+        runtime = await aget_runtime()
+        summary = await runtime.summary_chain.ainvoke(
+            {"summary": conversation.summary or "(없음)", "messages": format_messages(overflow)}
+        )
+    except Exception as e:
+        logger.warning(f"Failed to update conversation summary: {e}")
+        return
+
+    count = conversation.summary_message_count + len(overflow)
+    # updated_at은 건드리지 않도록 update 사용 (대화 목록 순서 유지)
+    updated = await Conversation.objects.filter(
+        pk=conversation.pk,
+        summary_message_count=conversation.summary_message_count,
+    ).aupdate(summary=summary.strip(), summary_message_count=count)
+    if updated:
+        conversation.summary = summary.strip()
+        conversation.summary_message_count = count
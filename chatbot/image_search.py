@@ -0,0 +1,260 @@
+import io
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image, ImageOps
+from chatbot.conf import IMAGE_HASH_MAX_DISTANCE, IMAGE_MATCH_THRESHOLD, IMAGE_MAX_PIXELS
+from chatbot.utils import summarize_image
+
+HASH_SIZE = 8
+THUMBNAIL_SIZE = 16
+COLOR_BINS = 4
+# 디코딩 해상도 (JPEG는 이 크기 근처로 바로 축소 디코딩)
+DECODE_SIZE = 128
+
+logger = logging.getLogger(__name__)
+
+
+class ImageTooLarge(ValueError):
+    """해상도가 IMAGE_MAX_PIXELS를 넘는 이미지"""
+
+
+def load_image(source) -> Image.Image:
+    """경로/파일 객체/bytes/PIL 이미지를 특징 추출용 RGB 이미지로 변환"""
+    if isinstance(source, Image.Image):
+        image = source
+    else:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        # open은 헤더만 읽으므로 픽셀 데이터를 풀기 전에 크기 확인
+        image = Image.open(source)
+        width, height = image.size
+        if width * height > IMAGE_MAX_PIXELS:
+            raise ImageTooLarge(f"Image too large: {width}x{height}")
+        # 원본 해상도로 다 풀지 않고 축소 디코딩 (JPEG에서 크게 빨라짐)
+        image.draft("RGB", (DECODE_SIZE, DECODE_SIZE))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((DECODE_SIZE, DECODE_SIZE))
+    return image
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """차이 해시 (가로로 이웃한 픽셀 밝기 비교, hash_size² 비트)"""
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def feature_vector(image: Image.Image) -> np.ndarray:
+    """축소 흑백 썸네일 + 색상 히스토그램을 이어붙인 정규화 특징 벡터
+
+    썸네일은 평균을 빼고 정규화해서 밝기/대비 변화에 덜 민감하고, 히스토그램은
+    위치와 무관하게 색 분포를 본다. 둘 다 크기 변경과 재압축에는 거의 변하지 않는다.
+    """
+    gray = image.convert("L").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.BILINEAR)
+    structure = np.asarray(gray, dtype=np.float32).flatten()
+    structure -= structure.mean()
+    norm = np.linalg.norm(structure)
+    if norm:
+        structure /= norm
+
+    pixels = np.asarray(image, dtype=np.uint16).reshape(-1, 3) * COLOR_BINS // 256
+    bins = pixels[:, 0] * COLOR_BINS * COLOR_BINS + pixels[:, 1] * COLOR_BINS + pixels[:, 2]
+    color = np.bincount(bins, minlength=COLOR_BINS**3).astype(np.float32)
+    color = np.sqrt(color)
+    norm = np.linalg.norm(color)
+    if norm:
+        color /= norm
+
+    vector = np.concatenate([structure, color])
+    return vector / np.linalg.norm(vector)
+
+
+def image_signature(source) -> Tuple[int, np.ndarray]:
+    """이미지 한 장의 (지각 해시, 특징 벡터)"""
+    image = load_image(source)
+    return dhash(image), feature_vector(image)
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    """64비트 해시 배열과 값 사이의 해밍 거리"""
+    diff = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class ImageCatalog:
+    """이미지 카탈로그의 메모리 인덱스 (모델명, 지각 해시, 특징 벡터 행렬)
+
+    조회는 행렬-벡터 곱 한 번과 해시 XOR로 끝나서 네트워크 호출 없이
+    수 ms 안에 응답한다. npz 파일 하나로 저장/로드한다.
+    """
+
+    def __init__(self, labels: List[str], hashes: np.ndarray, vectors: np.ndarray):
+        self.labels = list(labels)
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def build(
+        cls,
+        image_files: Iterable[Union[str, Path]],
+        label: Callable[[str], str] = summarize_image,
+    ) -> "ImageCatalog":
+        """이미지 파일 목록으로 카탈로그 생성 (읽지 못한 파일은 건너뜀)"""
+        labels, hashes, vectors = [], [], []
+        for image_path in image_files:
+            try:
+                image_hash, vector = image_signature(image_path)
+            except Exception as e:
+                logger.error(f"Failed to read image {image_path}: {e}")
+                continue
+            labels.append(label(str(image_path)))
+            hashes.append(image_hash)
+            vectors.append(vector)
+
+        dimension = THUMBNAIL_SIZE**2 + COLOR_BINS**3
+        return cls(
+            labels,
+            np.array(hashes, dtype=np.uint64),
+            np.stack(vectors) if vectors else np.zeros((0, dimension), dtype=np.float32),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ImageCatalog":
+        with np.load(path) as data:
+            return cls(data["labels"].tolist(), data["hashes"], data["vectors"])
+
+    def save(self, path: Union[str, Path]) -> None:
+        # 임시 파일에 쓰고 교체 (서빙 중인 프로세스가 깨진 파일을 읽지 않도록)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_path,
+            labels=np.array(self.labels, dtype=str),
+            hashes=self.hashes,
+            vectors=self.vectors,
+        )
+        os.replace(tmp_path, path)
+
+    def search(self, source, k: int = 1) -> List[Tuple[str, float, int]]:
+        """가장 비슷한 k개의 (모델명, 코사인 유사도, 해시 거리)"""
+        if not self.labels:
+            return []
+        image_hash, vector = image_signature(source)
+        scores = self.vectors @ vector
+        distances = hamming_distances(self.hashes, image_hash)
+
+        k = min(k, len(self.labels))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.labels[i], float(scores[i]), int(distances[i])) for i in top]
+
+    def match_batch(
+        self,
+        signatures: List[Tuple[int, np.ndarray]],
+        threshold: float = IMAGE_MATCH_THRESHOLD,
+        max_distance: int = IMAGE_HASH_MAX_DISTANCE,
+    ) -> List[Tuple[Any, float, int]]:
+        """이미지 여러 장의 (모델명 또는 -1, 코사인 유사도, 해시 거리)
+
+        모든 질의를 행렬 곱 한 번으로 비교한다. 유사도가 threshold 이상인 후보만
+        일치로 보고, 그중 해시 거리가 max_distance 이하인 후보(같은 사진의 리사이즈/
+        재압축)가 있으면 해시가 가장 가까운 것을 고른다. dHash는 64비트뿐이라 같은
+        양식의 다른 모델 명판도 거리가 가까울 수 있어서 해시만으로는 확정하지 않는다.
+        """
+        if not self.labels or not signatures:
+            return [(-1, 0.0, HASH_SIZE * HASH_SIZE) for _ in signatures]
+        queries = np.stack([vector for _, vector in signatures])
+        scores = queries @ self.vectors.T
+
+        results = []
+        for (image_hash, _), row in zip(signatures, scores):
+            distances = hamming_distances(self.hashes, image_hash)
+            near = np.flatnonzero((distances <= max_distance) & (row >= threshold))
+            if near.size:
+                # 해시 거리가 같으면 유사도가 높은 쪽
+                nearest = int(near[np.lexsort((-row[near], distances[near]))[0]])
+                results.append((self.labels[nearest], float(row[nearest]), int(distances[nearest])))
+                continue
+
+            best = int(np.argmax(row))
+            label = self.labels[best] if row[best] >= threshold else -1
+            results.append((label, float(row[best]), int(distances[best])))
+        return results
+
+    def identify(
+        self,
+        source,
+        threshold: float = IMAGE_MATCH_THRESHOLD,
+        max_distance: int = IMAGE_HASH_MAX_DISTANCE,
+    ):
+        """이미지의 모델명 반환 (일치하는 이미지가 없으면 -1)"""
+        if not self.labels:
+            return -1
+        label, _, _ = self.match_batch([image_signature(source)], threshold, max_distance)[0]
+        return label
+
+
+def consensus(matches: List[Tuple[Any, float, int]]):
+    """여러 이미지 식별 결과의 합의 모델명 (유사도 합이 가장 큰 모델, 없으면 -1)"""
+    votes = {}
+    for label, score, _ in matches:
+        if label != -1:
+            votes[label] = votes.get(label, 0.0) + score
+    if not votes:
+        return -1
+    return max(votes, key=votes.get)
+
+
+class CatalogFile:
+    """npz 파일의 카탈로그를 들고 있다가 파일이 바뀌면 다시 로드
+
+    재인덱싱(build_image_catalog)은 파일을 통째로 교체하므로 수정 시각/크기만 보고
+    바뀐 것을 알 수 있다. 조회마다 stat 한 번만 하고, 로드는 바뀌었을 때만 한다.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._catalog: Optional[ImageCatalog] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _stat_version(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> Optional[ImageCatalog]:
+        """현재 카탈로그 (파일이 없거나 읽을 수 없으면 None)"""
+        version = self._stat_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._catalog = load_catalog(self.path) if version else None
+                    self._version = version
+                    if self._catalog is not None:
+                        logger.info(f"Loaded image catalog: {len(self._catalog)} images")
+        return self._catalog
+
+
+def load_catalog(path: Union[str, Path]) -> Optional[ImageCatalog]:
+    """저장된 카탈로그 로드 (없거나 읽을 수 없으면 None)"""
+    if not Path(path).exists():
+        return None
+    try:
+        return ImageCatalog.load(path)
+    except Exception as e:
+        logger.warning(f"Failed to load image catalog {path}: {e}")
+        return None
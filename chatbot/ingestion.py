@@ -0,0 +1,490 @@
+import os
+import json
+import time
+import queue
+import random
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from .conf import (
+    EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    EMBED_MAX_RETRIES,
+    INGEST_QUEUE_SIZE,
+    INGEST_MANIFEST_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """iterable을 size개씩 묶어서 반환"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """429 / RateLimitError 여부"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+def embed_with_retry(
+    embeddings: Embeddings,
+    texts: List[str],
+    max_retries: int = EMBED_MAX_RETRIES,
+    backoff: float = 1.0,
+) -> List[List[float]]:
+    """embed_documents 호출, rate limit이면 지수 백오프(+지터) 후 재시도"""
+    for attempt in range(max_retries + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            delay = backoff * (2**attempt) + random.uniform(0, backoff)
+            logger.warning(f"Rate limited, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+def embed_batches(
+    embeddings: Embeddings,
+    batches: Iterable[List[Any]],
+    key: Callable[[Any], str] = lambda item: item,
+    max_concurrency: int = EMBED_CONCURRENCY,
+    max_retries: int = EMBED_MAX_RETRIES,
+    skip_failed: bool = True,
+) -> Iterator[Tuple[List[Any], List[List[float]]]]:
+    """배치마다 embed_documents를 한 번씩 호출해서 (batch, vectors)를 입력 순서대로 반환
+
+    동시에 요청 중인 배치는 최대 max_concurrency개이고, 재시도 후에도 실패한 배치는
+    로그만 남기고 건너뛴다 (skip_failed=False면 (batch, None)으로 반환).
+    """
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        inflight = deque()
+
+        def submit(batch):
+            texts = [key(item) for item in batch]
+            if not texts:
+                inflight.append((batch, None))
+                return
+            inflight.append((batch, pool.submit(embed_with_retry, embeddings, texts, max_retries)))
+
+        def collect():
+            batch, future = inflight.popleft()
+            if future is None:
+                return batch, []
+            try:
+                return batch, future.result()
+            except Exception as e:
+                logger.error(f"Failed to embed batch of {len(batch)} items: {e}")
+                return batch, None
+
+        for batch in batches:
+            submit(batch)
+            if len(inflight) >= max_concurrency:
+                batch, vectors = collect()
+                if vectors is not None or not skip_failed:
+                    yield batch, vectors
+
+        while inflight:
+            batch, vectors = collect()
+            if vectors is not None or not skip_failed:
+                yield batch, vectors
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = object()
+
+
+class ExtractionFailed:
+    """extract 단계에서 처리하지 못한 파일 표시
+
+    extract는 실패한 파일을 (source, ExtractionFailed(error))로 반환하고,
+    파이프라인은 그 파일을 stats["failed"]에 넣는다.
+    """
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def buffered(items: Iterable[Any], maxsize: int = INGEST_QUEUE_SIZE) -> Iterator[Any]:
+    """items를 백그라운드 스레드에서 미리 꺼내 최대 maxsize개까지 큐에 쌓아두는 단계
+
+    앞 단계와 뒤 단계가 동시에 진행되고, 큐가 차면 앞 단계가 멈추므로 메모리는
+    큐 크기만큼만 쓴다. 앞 단계의 예외는 소비하는 쪽에서 다시 발생한다.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_END)
+        except BaseException as e:
+            put(_Failure(e))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def file_fingerprint(path: str) -> str:
+    """파일 크기 + 수정 시각"""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def file_hash(path: str) -> str:
+    """파일 내용 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """인덱싱된 파일 목록 (JSON 파일 + 추가 기록 로그)
+
+    파일 경로마다 내용 해시, 크기/수정 시각, 청커 버전, 저장된 벡터 id 목록을
+    기록한다. 인덱싱 중에는 checkpoint()로 바뀐 항목만 로그 파일(<이름>.log,
+    JSON Lines)에 덧붙이므로 중단된 인덱싱을 이어서 실행하는 체크포인트 역할을
+    하면서도 배치마다 전체를 다시 쓰지 않는다. save()는 전체를 JSON 파일로 쓰고
+    로그를 비운다. 읽을 때는 JSON 파일 위에 로그를 순서대로 적용한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.log_path = self.path.with_suffix(".log")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # 마지막 checkpoint/save 이후 바뀐 파일 경로
+        self._changed: set = set()
+        # 로그 마지막 줄이 중간에 끊겨 있으면 덧붙이지 않고 다음 checkpoint에서 전체 저장
+        self._log_truncated = False
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        if self.log_path.exists():
+            self._replay()
+
+    def _replay(self) -> None:
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    # 기록 도중 중단된 마지막 줄
+                    logger.warning(f"Ignoring truncated manifest log line in {self.log_path}")
+                    self._log_truncated = True
+                    continue
+                if change["entry"] is None:
+                    self.entries.pop(change["source"], None)
+                else:
+                    self.entries[change["source"]] = change["entry"]
+
+    def is_current(self, source: str, chunker_version: str) -> Tuple[bool, Optional[str]]:
+        """(이미 같은 내용으로 인덱싱돼 있는지, 내용 해시)
+
+        크기/수정 시각이 같으면 해시 계산 없이 최신으로 본다.
+        """
+        entry = self.entries.get(source)
+        if entry and entry.get("chunker") == chunker_version:
+            if entry.get("fingerprint") == file_fingerprint(source):
+                return True, entry["hash"]
+        content_hash = file_hash(source)
+        if entry and entry.get("chunker") == chunker_version and entry.get("hash") == content_hash:
+            # 내용은 같고 수정 시각만 바뀐 경우
+            entry["fingerprint"] = file_fingerprint(source)
+            self._changed.add(source)
+            return True, content_hash
+        return False, content_hash
+
+    def ids(self, source: str) -> List[str]:
+        return list(self.entries.get(source, {}).get("ids", []))
+
+    def record(self, source: str, content_hash: str, chunker_version: str, ids: List[str]) -> None:
+        self.entries[source] = {
+            "hash": content_hash,
+            "fingerprint": file_fingerprint(source),
+            "chunker": chunker_version,
+            "ids": ids,
+        }
+        self._changed.add(source)
+
+    def remove(self, source: str) -> None:
+        self.entries.pop(source, None)
+        self._changed.add(source)
+
+    def checkpoint(self) -> None:
+        """마지막 checkpoint/save 이후 바뀐 항목만 로그에 덧붙임"""
+        if not self._changed:
+            return
+        if self._log_truncated:
+            self.save()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            for source in sorted(self._changed):
+                change = {"source": source, "entry": self.entries.get(source)}
+                f.write(json.dumps(change, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._changed.clear()
+
+    def save(self) -> None:
+        # 임시 파일에 쓰고 교체 (쓰는 도중 중단돼도 이전 내용 + 로그 유지)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        # 로그 내용은 모두 JSON 파일에 반영됨
+        self.log_path.unlink(missing_ok=True)
+        self._changed.clear()
+        self._log_truncated = False
+
+    def clear(self) -> None:
+        self.entries = {}
+        self._changed.clear()
+        self._log_truncated = False
+        self.path.unlink(missing_ok=True)
+        self.log_path.unlink(missing_ok=True)
+
+
+class RecordBatch(list):
+    """임베딩/업서트 단위 레코드 묶음
+
+    finished: 이 배치까지 업서트하면 모든 레코드가 저장되는 파일 목록
+    failed: 추출/청크 분할에 실패한 파일 목록
+    """
+
+    def __init__(self, records=()):
+        super().__init__(records)
+        self.finished: List[str] = []
+        self.failed: List[str] = []
+
+
+class _FileEnd:
+    def __init__(self, source: str):
+        self.source = source
+
+
+class _FileFailed(_FileEnd):
+    pass
+
+
+class IngestionPipeline:
+    """discover → extract → chunk → embed → upsert 스트리밍 인덱싱 파이프라인
+
+    각 단계는 크기가 제한된 큐로 이어져 있어서 코퍼스 크기와 관계없이 메모리가
+    일정하고, 앞쪽 파일의 벡터는 뒤쪽 파일을 파싱하는 동안 이미 저장된다.
+
+    manifest가 있으면 증분 인덱싱을 한다: 내용과 청커 버전이 그대로인 파일은
+    건너뛰고, 바뀐 파일은 다시 임베딩한 뒤 더 이상 쓰지 않는 벡터를 지운다.
+    run(prune=True)면 sources를 전체 파일 목록으로 보고 거기서 사라진 파일의
+    벡터도 지운다. 파일의 모든 레코드가 업서트되면 manifest에 기록하므로 중단 후
+    다시 실행하면 이어서 처리한다.
+
+    - extract(sources): (source, payload)를 반환하는 iterator (실패는 payload가 ExtractionFailed)
+    - chunk(source, payload): {"id", "text", "metadata"} 레코드를 반환하는 iterator
+    - upsert(vectors): {"id", "values", "metadata", "text"} 목록을 벡터 DB에 저장
+    - delete(ids): 벡터 id 목록 삭제
+    - existing_ids(source): 저장소에 이미 있는 그 파일의 벡터 id (manifest에 기록이
+      없는 파일에만 호출, manifest 도입 전에 다른 id 체계로 저장된 벡터 정리용)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        extract: Callable[[Iterable[str]], Iterator[Tuple[str, Any]]],
+        chunk: Callable[[str, Any], Iterator[Dict[str, Any]]],
+        upsert: Callable[[List[Dict[str, Any]]], None],
+        delete: Optional[Callable[[List[str]], None]] = None,
+        manifest: Optional[IndexManifest] = None,
+        existing_ids: Optional[Callable[[str], Iterable[str]]] = None,
+        chunker_version: str = "1",
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_concurrency: int = EMBED_CONCURRENCY,
+        queue_size: int = INGEST_QUEUE_SIZE,
+    ):
+        self.embeddings = embeddings
+        self.extract = extract
+        self.chunk = chunk
+        self.upsert = upsert
+        self.delete = delete
+        self.manifest = manifest
+        self.existing_ids = existing_ids
+        self.chunker_version = chunker_version
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+
+    def _records(self, extracted) -> Iterator[Any]:
+        for source, payload in extracted:
+            if isinstance(payload, ExtractionFailed):
+                yield _FileFailed(source)
+                continue
+            try:
+                for record in self.chunk(source, payload):
+                    record["source"] = source
+                    yield record
+            except Exception as e:
+                logger.error(f"Failed to chunk {source}: {e}")
+                yield _FileFailed(source)
+                continue
+            yield _FileEnd(source)
+
+    def _batches(self, records) -> Iterator[RecordBatch]:
+        batch = RecordBatch()
+        for record in records:
+            if isinstance(record, _FileFailed):
+                batch.failed.append(record.source)
+                continue
+            if isinstance(record, _FileEnd):
+                batch.finished.append(record.source)
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = RecordBatch()
+        if batch or batch.finished or batch.failed:
+            yield batch
+
+    def _delete(self, ids: List[str]) -> None:
+        if self.delete and ids:
+            for batch in batched(ids, 1000):
+                self.delete(batch)
+
+    def _previous_ids(self, source: str) -> List[str]:
+        if source in self.manifest.entries:
+            return self.manifest.ids(source)
+        if self.existing_ids:
+            return list(self.existing_ids(source))
+        return []
+
+    def run(self, sources: Iterable[str], prune: bool = False) -> Dict[str, Any]:
+        """파이프라인 실행 후 처리 통계 반환
+
+        prune=True는 sources가 인덱스의 전체 파일 목록일 때만 쓴다 (일부 파일만
+        넘기면 나머지 파일의 벡터가 지워진다).
+        """
+        stats = {"skipped": 0, "files": 0, "vectors": 0, "deleted": 0, "failed": set()}
+        seen_sources = set()
+        content_hashes: Dict[str, str] = {}
+        ids_by_source: Dict[str, List[str]] = {}
+
+        def discover():
+            for source in map(str, sources):
+                seen_sources.add(source)
+                if self.manifest:
+                    try:
+                        current, content_hash = self.manifest.is_current(
+                            source, self.chunker_version
+                        )
+                    except OSError as e:
+                        logger.error(f"Failed to read {source}: {e}")
+                        stats["failed"].add(source)
+                        continue
+                    if current:
+                        stats["skipped"] += 1
+                        continue
+                    content_hashes[source] = content_hash
+                yield source
+
+        extracted = buffered(self.extract(discover()), self.queue_size)
+        records = buffered(self._records(extracted), self.queue_size * self.batch_size)
+        embedded = embed_batches(
+            self.embeddings,
+            self._batches(records),
+            key=lambda record: record["text"],
+            max_concurrency=self.max_concurrency,
+            skip_failed=False,
+        )
+
+        for batch, vectors in embedded:
+            stats["failed"].update(batch.failed)
+            for source in batch.failed:
+                ids_by_source.pop(source, None)
+            if vectors is None:
+                stats["failed"].update(record["source"] for record in batch)
+            elif batch:
+                self.upsert(
+                    [
+                        {
+                            "id": record["id"],
+                            "values": vector,
+                            "metadata": record["metadata"],
+                            "text": record["text"],
+                        }
+                        for record, vector in zip(batch, vectors)
+                    ]
+                )
+                stats["vectors"] += len(batch)
+                for record in batch:
+                    ids_by_source.setdefault(record["source"], []).append(record["id"])
+
+            # 실패한 레코드가 없는 파일만 완료 처리
+            finished = [source for source in batch.finished if source not in stats["failed"]]
+            stats["files"] += len(finished)
+            if self.manifest and finished:
+                for source in finished:
+                    new_ids = ids_by_source.pop(source, [])
+                    # 바뀐 파일에서 더 이상 쓰지 않는 벡터 삭제
+                    stale_ids = sorted(set(self._previous_ids(source)) - set(new_ids))
+                    self._delete(stale_ids)
+                    stats["deleted"] += len(stale_ids)
+                    self.manifest.record(
+                        source, content_hashes.get(source, ""), self.chunker_version, new_ids
+                    )
+                self.manifest.checkpoint()
+
+        if self.manifest and prune:
+            # sources에서 사라진 파일의 벡터 삭제
+            for source in sorted(set(self.manifest.entries) - seen_sources):
+                stale_ids = self.manifest.ids(source)
+                self._delete(stale_ids)
+                stats["deleted"] += len(stale_ids)
+                self.manifest.remove(source)
+
+        if self.manifest:
+            # 배치마다 덧붙인 로그를 JSON 파일 하나로 합침
+            self.manifest.save()
+
+        stats["failed"] = sorted(stats["failed"])
+        return stats
@@ -0,0 +1,433 @@
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Optional, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from .conf import (
+    GENERATION_CONCURRENCY,
+    GENERATION_IN_PROCESS,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_POLL_INTERVAL,
+    JOB_POLL_INTERVAL,
+    JOB_PROGRESS_INTERVAL,
+    JOB_QUEUE_TIMEOUT,
+    JOB_TIMEOUT,
+)
+from .conversations import message_count, save_exchange
+from .history import aload_history, aupdate_summary
+from .models import Conversation, GenerationJob, Message
+from .rag_engine import astream_chatbot
+from .runtime import RAGRuntime, use_runtime
+from .telemetry import Trace
+
+ACTIVE_STATUSES = (GenerationJob.QUEUED, GenerationJob.RUNNING)
+
+logger = logging.getLogger(__name__)
+
+# 이 프로세스의 작업 워커가 실행 중인 작업 {작업 id: (실행 시작 시각, 단계, 생성 중인 답변)}
+# 같은 프로세스에서 기다리는 클라이언트는 DB를 조회하지 않고 여기서 바로 읽는다
+_live = {}
+# 작업 id별로 변경을 기다리는 (이벤트 루프, asyncio.Event)
+_waiters = {}
+_live_lock = threading.Lock()
+
+
+def _wake(waiters) -> None:
+    # 워커는 자기 스레드의 이벤트 루프에서 돌므로 기다리는 쪽 루프에서 이벤트를 켬
+    for loop, event in waiters:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # 이미 닫힌 루프
+
+
+def _publish(job: GenerationJob, **changes) -> None:
+    """실행 중인 작업의 단계/생성 중인 답변을 기록하고 기다리는 클라이언트를 깨움"""
+    with _live_lock:
+        started_at, stage, partial = _live.get(job.pk, (job.started_at, "", ""))
+        _live[job.pk] = (
+            started_at, changes.get("stage", stage), changes.get("partial", partial)
+        )
+        waiters = list(_waiters.get(job.pk, ()))
+    _wake(waiters)
+
+
+def _unpublish(job: GenerationJob) -> None:
+    """작업 결과를 DB에 쓴 뒤 호출 (기다리는 클라이언트는 DB에서 결과를 읽음)"""
+    with _live_lock:
+        _live.pop(job.pk, None)
+        waiters = list(_waiters.get(job.pk, ()))
+    _wake(waiters)
+
+
+@contextmanager
+def _subscribe(job_id):
+    waiter = (asyncio.get_running_loop(), asyncio.Event())
+    with _live_lock:
+        _waiters.setdefault(job_id, set()).add(waiter)
+    try:
+        yield waiter[1]
+    finally:
+        with _live_lock:
+            waiters = _waiters.get(job_id, set())
+            waiters.discard(waiter)
+            if not waiters:
+                _waiters.pop(job_id, None)
+
+
+def enqueue_generation(conversation, question: str) -> GenerationJob:
+    """답변 생성 작업 등록 (처리는 작업 워커가 담당)"""
+    return GenerationJob.objects.create(conversation=conversation, question=question)
+
+
+def _claim(pk, conversation_id) -> bool:
+    """대기 작업 하나를 실행 중으로 바꿈 (이미 가져갔거나 같은 대화가 실행 중이면 False)
+
+    후보를 고른 뒤 다른 워커가 같은 대화의 작업을 가져갔을 수 있으므로 UPDATE에서
+    다시 확인한다. PostgreSQL에서는 대화 행을 잠가서 같은 대화를 가져가려는 워커끼리
+    순서를 정한다 (SQLite는 쓰기 트랜잭션이 원래 하나씩 실행됨).
+    """
+    running = GenerationJob.objects.filter(
+        conversation_id=conversation_id, status=GenerationJob.RUNNING
+    )
+    with transaction.atomic():
+        list(
+            Conversation.objects.select_for_update()
+            .filter(pk=conversation_id)
+            .values_list("pk", flat=True)
+        )
+        claimed = (
+            GenerationJob.objects.filter(pk=pk, status=GenerationJob.QUEUED)
+            .exclude(Exists(running))
+            .update(
+                status=GenerationJob.RUNNING,
+                started_at=timezone.now(),
+                attempts=F("attempts") + 1,
+            )
+        )
+    return bool(claimed)
+
+
+def claim_job() -> Optional[GenerationJob]:
+    """가장 오래된 대기 작업 하나를 실행 중으로 바꾸고 반환 (없으면 None)
+
+    조건부 UPDATE로 가져가므로 여러 워커 프로세스가 같은 작업을 중복 실행하지 않는다.
+    같은 대화의 작업이 이미 실행 중이면 대화 순서가 섞이지 않도록 건너뛴다.
+    """
+    close_old_connections()
+    running = GenerationJob.objects.filter(
+        conversation=OuterRef("conversation"), status=GenerationJob.RUNNING
+    )
+    candidates = (
+        GenerationJob.objects.filter(status=GenerationJob.QUEUED)
+        .exclude(Exists(running))
+        .order_by("created_at")
+        .values_list("pk", "conversation_id")[:10]
+    )
+    for pk, conversation_id in candidates:
+        if _claim(pk, conversation_id):
+            return GenerationJob.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """JOB_TIMEOUT의 두 배가 지나도 실행 중인 작업 (워커가 죽은 경우) 재시도 또는 실패 처리"""
+    cutoff = timezone.now() - timedelta(seconds=JOB_TIMEOUT * 2)
+    stale = GenerationJob.objects.filter(status=GenerationJob.RUNNING, started_at__lt=cutoff)
+    requeued = stale.filter(attempts__lt=JOB_MAX_ATTEMPTS).update(
+        status=GenerationJob.QUEUED, stage="", partial=""
+    )
+    stale.update(
+        status=GenerationJob.FAILED,
+        error="Generation worker stopped before finishing",
+        finished_at=timezone.now(),
+    )
+    return requeued
+
+
+def _progress_key(job: GenerationJob) -> str:
+    return f"chatbot:jobs:progress:{job.pk}"
+
+
+async def _share_progress(job: GenerationJob, stage: str, partial: str) -> None:
+    """생성 중인 답변을 다른 프로세스와 공유
+
+    공유 캐시(Redis)가 있으면 캐시에만 쓰고 (DB 쓰기 없음), 없으면 작업의 partial에 쓴다.
+    캐시 항목은 작업이 끝나면 지우고, 워커가 죽어도 멈춘 작업 기준 시간이 지나면 사라진다.
+    """
+    if settings.SHARED_CACHE:
+        await cache.aset(_progress_key(job), (stage, partial), timeout=JOB_TIMEOUT * 2)
+    else:
+        await GenerationJob.objects.filter(pk=job.pk).aupdate(partial=partial)
+
+
+async def _shared_progress(job: GenerationJob) -> Optional[Tuple[str, str]]:
+    """다른 프로세스의 워커가 공유 캐시에 쓴 (단계, 생성 중인 답변) (없으면 None)"""
+    if not settings.SHARED_CACHE or job.status != GenerationJob.RUNNING:
+        return None
+    return await cache.aget(_progress_key(job))
+
+
+async def _generate(job: GenerationJob, trace: Trace) -> Tuple[Conversation, str]:
+    """답변 생성 (진행 상태만 기록하고 메시지는 저장하지 않음)"""
+    conversation = await Conversation.objects.annotate(
+        message_count=message_count()
+    ).aget(pk=job.conversation_id)
+    history = await aload_history(conversation, pending=[{"role": "user", "content": job.question}])
+
+    jobs = GenerationJob.objects.filter(pk=job.pk)
+    tokens = []
+    stage = ""
+    shared_at = time.monotonic()
+    async for event in astream_chatbot(job.question, history=history, trace=trace):
+        if event["type"] == "status":
+            stage = event["stage"]
+            _publish(job, stage=stage)
+            await jobs.aupdate(stage=stage)
+        elif event["type"] == "token":
+            tokens.append(event["content"])
+            partial = "".join(tokens)
+            _publish(job, partial=partial)
+            # 다른 프로세스에서 기다리는 클라이언트용 (JOB_PROGRESS_INTERVAL마다)
+            if time.monotonic() - shared_at >= JOB_PROGRESS_INTERVAL:
+                await _share_progress(job, stage, partial)
+                shared_at = time.monotonic()
+    return conversation, "".join(tokens)
+
+
+def _save(job: GenerationJob, conversation: Conversation, answer: str) -> bool:
+    """질문/답변 저장 후 작업 완료 처리 (작업이 이미 실패/재대기 처리됐으면 저장하지 않음)
+
+    작업을 실행 중일 때만 완료로 바꾸고 같은 트랜잭션에서 메시지를 저장하므로,
+    시간 초과로 실패 처리되는 것과 겹쳐도 둘 중 먼저 커밋한 쪽만 반영된다.
+    """
+    # 같은 대화의 작업은 하나씩 실행되므로 질문 시각을 실행 시작 시각으로 두면
+    # 이전 작업의 답변 뒤에 정렬된다
+    user_msg = Message(
+        conversation=conversation, role='user', content=job.question, created_at=job.started_at
+    )
+    jobs = GenerationJob.objects.filter(pk=job.pk)
+    with transaction.atomic():
+        finished = jobs.filter(status=GenerationJob.RUNNING).update(
+            status=GenerationJob.DONE, stage="done", partial="", finished_at=timezone.now()
+        )
+        if not finished:
+            return False
+        assistant_msg = save_exchange(conversation, user_msg, answer)
+        jobs.update(user_message=user_msg, assistant_message=assistant_msg)
+    return True
+
+
+async def _run(job: GenerationJob, trace: Trace) -> Optional[Conversation]:
+    conversation, answer = await _generate(job, trace)
+    if await sync_to_async(_save)(job, conversation, answer):
+        return conversation
+    return None
+
+
+async def run_job(job: GenerationJob) -> None:
+    """작업 하나 실행 (예외는 작업 실패로 기록)
+
+    시간 제한(JOB_TIMEOUT)은 이력 로드/검색/생성/저장을 포함한 작업 전체에 건다.
+    실패한 작업의 질문은 작업에 남으므로 클라이언트가 작업 조회로 받아서 다시 보낼 수 있다.
+    """
+    trace = Trace("messages-job")
+    await GenerationJob.objects.filter(pk=job.pk).aupdate(trace_id=trace.trace_id)
+    _publish(job)
+    try:
+        conversation = await asyncio.wait_for(_run(job, trace), timeout=JOB_TIMEOUT)
+    except Exception as e:
+        error = "Generation timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        # 저장이 먼저 끝났거나 멈춘 작업으로 재대기된 경우에는 그대로 둠
+        failed = await GenerationJob.objects.filter(
+            pk=job.pk, status=GenerationJob.RUNNING
+        ).aupdate(status=GenerationJob.FAILED, error=error, finished_at=timezone.now())
+        if failed:
+            logger.warning(f"Generation job {job.pk} failed: {error}")
+        return
+    finally:
+        # 결과를 DB에 쓴 뒤라, 기다리는 클라이언트는 이제 DB에서 결과를 읽음
+        if settings.SHARED_CACHE:
+            await cache.adelete(_progress_key(job))
+        _unpublish(job)
+        trace.finish()
+
+    if conversation is None:
+        logger.warning(f"Generation job {job.pk} was no longer running, answer discarded")
+        return
+
+    # 답변을 저장한 뒤에 요약 갱신 (작업 결과와 무관)
+    try:
+        await aupdate_summary(conversation)
+    except Exception as e:
+        logger.warning(f"Failed to update summary after job {job.pk}: {e}")
+
+
+async def serve(
+    concurrency: int = GENERATION_CONCURRENCY,
+    poll_interval: float = JOB_POLL_INTERVAL,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """대기 작업을 가져와서 최대 concurrency개까지 동시에 실행하는 워커 루프
+
+    LLM/임베딩/웹 검색 클라이언트는 이 이벤트 루프 전용 RAGRuntime으로 새로 만든다
+    (다른 이벤트 루프의 async 커넥션 풀을 공유하지 않음).
+    """
+    use_runtime(await asyncio.to_thread(RAGRuntime))
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+    last_recovery = 0.0
+
+    while stop is None or not stop.is_set():
+        await slots.acquire()
+        if time.monotonic() - last_recovery >= JOB_TIMEOUT:
+            try:
+                requeued = await sync_to_async(requeue_stale_jobs)()
+                if requeued:
+                    logger.warning(f"Requeued {requeued} stale generation jobs")
+            except Exception as e:
+                logger.warning(f"Failed to requeue stale generation jobs: {e}")
+            last_recovery = time.monotonic()
+
+        try:
+            job = await sync_to_async(claim_job)()
+        except Exception as e:
+            logger.warning(f"Failed to claim generation job: {e}")
+            job = None
+        if job is None:
+            slots.release()
+            await asyncio.sleep(poll_interval)
+            continue
+
+        task = asyncio.create_task(run_job(job))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _expires_in(job: GenerationJob) -> float:
+    """기다리는 작업을 포기할 때까지 남은 시간 (초)
+
+    대기 중인 작업은 JOB_QUEUE_TIMEOUT, 실행 중인 작업은 멈춘 작업으로 보는
+    JOB_TIMEOUT의 두 배까지 기다린다. 멈춰서 다시 대기열로 돌아간 작업은 되돌아간
+    시점(실행 시작 후 JOB_TIMEOUT의 두 배)부터 다시 JOB_QUEUE_TIMEOUT을 센다.
+    """
+    stalled = timedelta(seconds=JOB_TIMEOUT * 2)
+    if job.status == GenerationJob.QUEUED:
+        since = job.created_at if job.started_at is None else job.started_at + stalled
+        expires_at = since + timedelta(seconds=JOB_QUEUE_TIMEOUT)
+    else:
+        expires_at = (job.started_at or job.created_at) + stalled
+    return (expires_at - timezone.now()).total_seconds()
+
+
+async def _expire_queued(job: GenerationJob) -> bool:
+    """아직 대기 중인 작업을 실패로 바꿈 (그 사이 워커가 가져갔으면 False)"""
+    expired = await GenerationJob.objects.filter(
+        pk=job.pk, status=GenerationJob.QUEUED
+    ).aupdate(
+        status=GenerationJob.FAILED,
+        error="Generation job was queued too long",
+        finished_at=timezone.now(),
+    )
+    return bool(expired)
+
+
+async def watch_job(queryset, job: GenerationJob, wait: Optional[float] = None):
+    """작업의 상태/단계/생성 중인 답변이 바뀔 때마다 새로 조회한 작업 반환
+
+    작업이 끝나거나 wait 초가 지나면 멈춘다. 이 프로세스의 작업 워커가 실행 중인
+    작업은 워커가 바로 알려주는 진행 상태를 DB 조회 없이 받는다. 다른 프로세스가
+    실행하는 작업은 공유 캐시(있으면)나 DB를 조회하되, 변화가 없으면 조회 간격을
+    JOB_POLL_INTERVAL부터 JOB_MAX_POLL_INTERVAL까지 두 배씩 늘린다.
+
+    JOB_QUEUE_TIMEOUT이 지나도록 아무 워커도 가져가지 않은 작업은 실패로 바꿔서
+    반환하고, 멈춘 것으로 보이는 실행 중인 작업(_expires_in)은 더 기다리지 않는다.
+    """
+    deadline = None if wait is None else time.monotonic() + wait
+    interval = JOB_POLL_INTERVAL
+    seen = (job.status, job.stage, job.partial)
+    with _subscribe(job.pk) as changed:
+        while job.status in ACTIVE_STATUSES:
+            delay = min(interval, _expires_in(job))
+            if delay <= 0:
+                if job.status == GenerationJob.RUNNING:
+                    return
+                if await _expire_queued(job):
+                    yield await queryset.aget(pk=job.pk)
+                    return
+                # 방금 워커가 가져간 작업은 바로 다시 조회
+                delay = 0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                delay = min(delay, remaining)
+            try:
+                await asyncio.wait_for(changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+
+            with _live_lock:
+                live = _live.get(job.pk)
+            shared = None if live is not None else await _shared_progress(job)
+            if live is not None:
+                job.status = GenerationJob.RUNNING
+                job.started_at, job.stage, job.partial = live
+            elif shared is not None:
+                job.stage, job.partial = shared
+            else:
+                job = await queryset.aget(pk=job.pk)
+            state = (job.status, job.stage, job.partial)
+            if state == seen:
+                interval = min(interval * 2, JOB_MAX_POLL_INTERVAL)
+                continue
+            seen = state
+            interval = JOB_POLL_INTERVAL
+            yield job
+
+
+_in_process_worker: Optional[threading.Thread] = None
+_in_process_lock = threading.Lock()
+
+
+def _run_worker(concurrency: int) -> None:
+    try:
+        asyncio.run(serve(concurrency))
+    except Exception as e:
+        logger.error(f"In-process generation worker stopped: {e}")
+
+
+def start_in_process_worker(concurrency: int = GENERATION_CONCURRENCY) -> None:
+    """GENERATION_IN_PROCESS면 현재 (웹) 프로세스 안에 작업 워커 스레드 시작
+
+    웹 서버 기동 시(asgi.py/wsgi.py) 호출하므로, 재시작 전에 쌓인 대기 작업도 첫
+    요청을 기다리지 않고 바로 처리한다. 워커는 자기 스레드의 이벤트 루프에서
+    자기 클라이언트로 돈다. 별도 작업 워커(run_generation_workers) 없이 단일
+    서버에서 쓸 때 사용한다.
+    """
+    global _in_process_worker
+    if not GENERATION_IN_PROCESS:
+        return
+    with _in_process_lock:
+        if _in_process_worker is not None and _in_process_worker.is_alive():
+            return
+        _in_process_worker = threading.Thread(
+            target=_run_worker,
+            args=(concurrency,),
+            name="generation-worker",
+            daemon=True,
+        )
+        _in_process_worker.start()
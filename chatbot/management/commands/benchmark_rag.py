@@ -0,0 +1,135 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from chatbot import runtime
+from chatbot.evaluation import (
+    answer_similarity,
+    compare_summaries,
+    load_golden_dataset,
+    retrieval_hit,
+    summarize_results,
+)
+from chatbot.providers import get_embeddings, get_llm, get_web_search
+from chatbot.rag_engine import run_chatbot
+from chatbot.telemetry import Trace
+
+
+class Command(BaseCommand):
+    help = "골든 데이터셋 질문을 run_chatbot으로 재생해서 단계별 지연 시간/토큰/검색 적중률/답변 유사도 측정"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", default="test/golden_dataset_lg.csv")
+        parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리할 질문 수")
+        parser.add_argument("--limit", type=int, default=0, help="앞에서부터 N개 질문만 사용")
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="해시 임베딩/에코 LLM/픽스처 웹 검색으로 네트워크 없이 실행",
+        )
+        parser.add_argument("--llm-latency", type=float, default=0.0, help="오프라인 LLM 지연 (초)")
+        parser.add_argument("--search-latency", type=float, default=0.0, help="오프라인 웹 검색 지연 (초)")
+        parser.add_argument("--embedding-latency", type=float, default=0.0, help="오프라인 임베딩 지연 (초)")
+        parser.add_argument("--search-fixtures", default="", help="오프라인 웹 검색 결과 JSON 파일")
+        parser.add_argument(
+            "--use-answer-cache", action="store_true", help="유사 질문 답변 캐시 사용 (기본은 끔)"
+        )
+        parser.add_argument("--output", default="", help="결과 JSON 경로")
+        parser.add_argument("--baseline", default="", help="비교할 이전 결과 JSON")
+
+    def handle(self, *args, **options):
+        try:
+            rows = load_golden_dataset(options["dataset"])
+        except OSError as e:
+            raise CommandError(f"Failed to read dataset: {e}")
+        if options["limit"]:
+            rows = rows[: options["limit"]]
+
+        rag_runtime = self._build_runtime(options)
+        if not options["use_answer_cache"]:
+            rag_runtime.answer_cache = None
+        runtime.set_runtime(rag_runtime)
+
+        self.stdout.write(
+            f"Replaying {len(rows)} questions (concurrency={options['concurrency']}, "
+            f"offline={options['offline']})"
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(self._run_one, rows))
+        wall_seconds = time.perf_counter() - started
+
+        summary = summarize_results(results, wall_seconds)
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                key: options[key]
+                for key in (
+                    "dataset",
+                    "concurrency",
+                    "limit",
+                    "offline",
+                    "llm_latency",
+                    "search_latency",
+                    "embedding_latency",
+                    "use_answer_cache",
+                )
+            },
+            "summary": summary,
+            "results": results,
+        }
+
+        output = Path(
+            options["output"]
+            or f"./cache/benchmark/benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        self.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2))
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)["summary"]
+            self.stdout.write("Compared with baseline:")
+            for line in compare_summaries(summary, baseline):
+                self.stdout.write(f"  {line}")
+        self.stdout.write(self.style.SUCCESS(f"Saved results to {output}"))
+
+    def _build_runtime(self, options):
+        if not options["offline"]:
+            return runtime.RAGRuntime()
+        return runtime.RAGRuntime(
+            embeddings=get_embeddings(
+                runtime.EMBEDDINGS_MODEL, backend="hash", latency=options["embedding_latency"]
+            ),
+            llm=get_llm(runtime.MODEL_NAME, backend="echo", latency=options["llm_latency"]),
+            tavily_tool=get_web_search(
+                backend="fixture",
+                fixtures=options["search_fixtures"],
+                latency=options["search_latency"],
+            ),
+        )
+
+    def _run_one(self, row):
+        question = row["input_question"]
+        trace = Trace("benchmark")
+        try:
+            answer = run_chatbot(question, history=[], trace=trace)
+        except Exception as e:
+            return {"question": question, "error": str(e)}
+
+        summary = trace.finish()
+        sources = summary["annotations"].get("context_sources", [])
+        return {
+            "question": question,
+            "answer": answer,
+            "duration_ms": summary["duration_ms"],
+            "spans": summary["spans"],
+            "tokens": summary["tokens"],
+            "context_sources": sources,
+            "retrieval_hit": retrieval_hit(sources, row.get("contexts", "")),
+            "answer_similarity": round(answer_similarity(answer, row.get("output_answer", "")), 3),
+        }
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from skn4th.database import parse_database_url
+
+SOURCE_ALIAS = "copy_source"
+
+# migrate가 이미 만든 행을 원본 행으로 바꾸는 모델 (사용자 권한 등이 원본 id를 참조)
+REPLACED_MODELS = {"contenttypes.ContentType", "auth.Permission"}
+
+
+def copy_order():
+    """복사할 모델 목록 (설치된 앱의 모든 테이블, 외래 키의 부모 → 자식 순서)
+
+    ManyToMany 중간 테이블(User_groups, User_user_permissions 등)도 포함한다.
+    """
+    ordered = []
+    visiting = set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for field in model._meta.concrete_fields:
+            if field.related_model is not None and field.related_model is not model:
+                visit(field.related_model._meta.concrete_model)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.managed and not model._meta.proxy:
+            visit(model)
+    return ordered
+
+
+@contextmanager
+def keep_auto_now(model):
+    """복사하는 동안 auto_now 필드(updated_at)가 현재 시각으로 바뀌지 않도록 끔"""
+    fields = [f for f in model._meta.local_fields if getattr(f, "auto_now", False)]
+    for field in fields:
+        field.auto_now = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now = True
+
+
+class Command(BaseCommand):
+    help = "기존 SQLite 등 다른 DB의 모든 테이블을 현재 DATABASE_URL DB로 복사 (id 유지)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source", default="sqlite:///db.sqlite3", help="복사할 원본 DB URL"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        source = parse_database_url(options["source"], settings.BASE_DIR)
+        # 기본값(TIME_ZONE 등)이 채워진 설정으로 원본 DB 연결 추가
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings(
+            {**settings.DATABASES, SOURCE_ALIAS: source}
+        )[SOURCE_ALIAS]
+        target = connections["default"]
+        if target.settings_dict["NAME"] == connections[SOURCE_ALIAS].settings_dict["NAME"]:
+            raise CommandError("Source and target databases are the same")
+
+        models = copy_order()
+        replaced = [model for model in models if model._meta.label in REPLACED_MODELS]
+        for model in models:
+            if model in replaced:
+                continue
+            if model._default_manager.using("default").exists():
+                raise CommandError(
+                    f"Target table {model._meta.db_table} is not empty (run migrate on an empty database)"
+                )
+        source_tables = set(connections[SOURCE_ALIAS].introspection.table_names())
+
+        with transaction.atomic(using="default"):
+            # migrate가 만든 콘텐츠 타입/권한은 id가 원본과 다를 수 있으므로 원본 것으로 교체
+            for model in reversed(replaced):
+                model._base_manager.using("default").all().delete()
+            for model in models:
+                if model._meta.db_table not in source_tables:
+                    # 원본이 그 테이블을 만든 마이그레이션 전 상태
+                    self.stdout.write(f"{model._meta.label}: not in source, skipped")
+                    continue
+                copied = self._copy(model, options["batch_size"])
+                self.stdout.write(f"{model._meta.label}: {copied} rows")
+
+            # id를 그대로 옮겼으므로 PostgreSQL 시퀀스를 최댓값 다음으로 맞춤
+            sql = target.ops.sequence_reset_sql(no_style(), models)
+            with target.cursor() as cursor:
+                for statement in sql:
+                    cursor.execute(statement)
+
+        ContentType.objects.clear_cache()
+        connections[SOURCE_ALIAS].close()
+        self.stdout.write(self.style.SUCCESS("Copied database"))
+
+    def _copy(self, model, batch_size):
+        with keep_auto_now(model):
+            return self._copy_rows(model, batch_size)
+
+    def _copy_rows(self, model, batch_size):
+        rows = model._base_manager.using(SOURCE_ALIAS).order_by("pk").iterator(chunk_size=batch_size)
+        batch = []
+        copied = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                model._base_manager.using("default").bulk_create(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            model._base_manager.using("default").bulk_create(batch)
+            copied += len(batch)
+        return copied
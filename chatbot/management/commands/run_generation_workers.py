@@ -0,0 +1,34 @@
+import asyncio
+import socket
+from django.core.management.base import BaseCommand
+from chatbot import jobs
+from chatbot.telemetry import clear_metrics
+
+
+class Command(BaseCommand):
+    help = "답변 생성 작업 큐를 처리하는 작업 워커 실행 (웹 서버와 별도로 확장할 때 사용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=jobs.GENERATION_CONCURRENCY,
+            help="동시에 처리할 작업 수",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=jobs.JOB_POLL_INTERVAL,
+            help="대기 작업이 없을 때 큐 확인 간격 (초)",
+        )
+
+    def handle(self, *args, **options):
+        # 이 호스트(컨테이너)의 이전 실행이 남긴 지표 파일 삭제
+        clear_metrics(host=socket.gethostname())
+        self.stdout.write(
+            f"Generation worker started (concurrency={options['concurrency']})"
+        )
+        try:
+            asyncio.run(jobs.serve(options["concurrency"], options["poll_interval"]))
+        except KeyboardInterrupt:
+            self.stdout.write("Generation worker stopped")
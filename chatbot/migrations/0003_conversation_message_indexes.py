@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot", "0002_conversation_summary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "is_active", "-updated_at"],
+                name="chatbot_conv_user_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "created_at"],
+                name="chatbot_msg_conv_created_idx",
+            ),
+        ),
+    ]
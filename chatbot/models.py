@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -11,9 +12,17 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # 최근 대화 창 밖으로 밀려난 메시지들의 누적 요약
+    summary = models.TextField(blank=True, default="")
+    # summary에 반영된 메시지 수 (오래된 순서로 앞에서부터)
+    summary_message_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # 사이드바 대화 목록 (사용자별 활성 대화 최신순 커서 페이지)
+            models.Index(fields=['user', 'is_active', '-updated_at'], name='chatbot_conv_user_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -33,10 +42,53 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # 대화별 메시지 페이지 / 메시지 수 / 마지막 메시지 조회
+            models.Index(fields=['conversation', 'created_at'], name='chatbot_msg_conv_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.conversation.title} - {self.role}: {self.content[:50]}"
 
+class GenerationJob(models.Model):
+    """백그라운드에서 처리하는 답변 생성 작업 (DB 기반 작업 큐)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, '대기'),
+        (RUNNING, '생성 중'),
+        (DONE, '완료'),
+        (FAILED, '실패'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='jobs')
+    question = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # 진행 단계 (retrieval, generation 등)와 생성 중인 답변 앞부분 (폴링 응답용)
+    stage = models.CharField(max_length=30, blank=True, default="")
+    partial = models.TextField(blank=True, default="")
+    user_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    assistant_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    trace_id = models.CharField(max_length=32, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # 대기 중인 작업을 오래된 순으로 가져오기
+            models.Index(fields=['status', 'created_at'], name='chatbot_job_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.conversation.title} - {self.status}"
+
 class UploadedImage(models.Model):
     """업로드된 이미지를 나타내는 모델"""
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='images')
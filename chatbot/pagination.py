@@ -0,0 +1,73 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, pk: int) -> str:
+    """(정렬 시각, id) → URL에 그대로 쓸 수 있는 커서 문자열"""
+    raw = f"{timestamp.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded).decode("utf-8").rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def page_size(request, default: int) -> int:
+    """limit 파라미터 (1 ~ MAX_PAGE_SIZE, 잘못된 값이면 기본값)"""
+    try:
+        limit = int(request.GET.get("limit", default))
+    except ValueError:
+        return default
+    return max(1, min(limit, settings.MAX_PAGE_SIZE))
+
+
+def _ordered_page(queryset, field: str, cursor: Optional[str], limit: int):
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{field}__lt": timestamp}) | Q(**{field: timestamp, "id__lt": pk})
+        )
+    # 다음 페이지가 있는지 알기 위해 하나 더 조회
+    return queryset.order_by(f"-{field}", "-id")[: limit + 1]
+
+
+def keyset_page(
+    queryset, field: str, cursor: Optional[str], limit: int
+) -> Tuple[List, Optional[str]]:
+    """(field, id) 내림차순 커서 기반 페이지 → (항목 목록, 다음 페이지 커서)
+
+    OFFSET 없이 마지막으로 본 (field, id)보다 작은 행만 조회하므로 페이지가 뒤로
+    갈수록 느려지지 않는다. queryset이 .values()면 항목은 dict, 아니면 모델 객체.
+    """
+    rows = list(_ordered_page(queryset, field, cursor, limit))
+    return _page(rows, field, limit)
+
+
+async def akeyset_page(
+    queryset, field: str, cursor: Optional[str], limit: int
+) -> Tuple[List, Optional[str]]:
+    """keyset_page의 비동기 버전"""
+    rows = [row async for row in _ordered_page(queryset, field, cursor, limit)]
+    return _page(rows, field, limit)
+
+
+def _page(rows: List, field: str, limit: int) -> Tuple[List, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last[field], last["id"])
+    return rows, encode_cursor(getattr(last, field), last.id)
@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer
+from pdfminer.pdfpage import PDFPage
+from .ingestion import ExtractionFailed
+from .conf import PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK, PDF_EXTRACT_CACHE_DIR
+
+# pdfminer 경고 무시
+logging.getLogger("pdfminer").setLevel(logging.ERROR)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageText:
+    """PDF 한 페이지의 텍스트 (page는 1부터 시작)"""
+
+    page: int
+    text: str
+
+
+def count_pages(pdf_path: str) -> int:
+    """PDF 페이지 수"""
+    with open(pdf_path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def extract_page_range(pdf_path: str, start: int = 0, end: Optional[int] = None) -> List[PageText]:
+    """[start, end) 범위 페이지의 텍스트 추출 (0부터 시작하는 인덱스, 워커 프로세스에서 실행)"""
+    page_numbers = range(start, end) if end is not None else None
+    pages = []
+    for offset, layout in enumerate(extract_pages(pdf_path, page_numbers=page_numbers)):
+        text = "".join(
+            element.get_text() for element in layout if isinstance(element, LTTextContainer)
+        )
+        pages.append(PageText(page=start + offset + 1, text=text))
+    return pages
+
+
+class ExtractionCache:
+    """파일 해시 + 수정 시각을 키로 하는 추출 결과 디스크 캐시"""
+
+    def __init__(self, cache_dir: str = PDF_EXTRACT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def file_key(pdf_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        mtime = os.stat(pdf_path).st_mtime_ns
+        return f"{digest.hexdigest()}_{mtime}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[PageText]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return [PageText(**page) for page in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Broken extraction cache {path}: {e}")
+            return None
+
+    def put(self, key: str, pages: List[PageText]) -> None:
+        # 임시 파일에 쓰고 교체 (동시에 읽는 프로세스가 깨진 파일을 보지 않도록)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(page) for page in pages], f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def extract_pdf(pdf_path: str, cache: Optional[ExtractionCache] = None) -> List[PageText]:
+    """단일 PDF 페이지별 텍스트 추출 (캐시 사용)"""
+    cache = cache or ExtractionCache()
+    key = cache.file_key(pdf_path)
+    pages = cache.get(key)
+    if pages is None:
+        pages = extract_page_range(pdf_path)
+        cache.put(key, pages)
+    return pages
+
+
+def extract_pdfs(
+    pdf_paths: Iterable[str],
+    max_workers: int = PDF_EXTRACT_WORKERS,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    cache: Optional[ExtractionCache] = None,
+    max_inflight: Optional[int] = None,
+) -> Iterator[Tuple[str, Union[List[PageText], ExtractionFailed]]]:
+    """여러 PDF를 프로세스 풀에서 병렬 추출해서 (경로, 페이지 목록)을 끝나는 순서대로 반환
+
+    캐시에 있는 파일은 바로 반환하고, 나머지는 pages_per_task 페이지 단위 작업으로
+    나눠서 워커에 분배한다. 작업은 필요할 때마다 제출해서 동시에 걸려 있는 작업을
+    max_inflight개(기본 max_workers의 2배)로 제한하므로, 소비하는 쪽이 멈추면 추출도
+    멈춘다. 추출에 실패한 파일은 (경로, ExtractionFailed)로 반환한다.
+    """
+    cache = cache or ExtractionCache()
+    max_inflight = max_inflight or 2 * max_workers
+    pending: Dict[str, Dict] = {}
+
+    def work():
+        # 캐시 결과/실패는 (경로, 결과), 추출할 범위는 (경로, start, end)로 반환
+        for pdf_path in map(str, pdf_paths):
+            try:
+                key = cache.file_key(pdf_path)
+                pages = cache.get(key)
+                if pages is not None:
+                    yield pdf_path, pages
+                    continue
+
+                page_count = count_pages(pdf_path)
+                ranges = [
+                    (start, min(start + pages_per_task, page_count))
+                    for start in range(0, page_count, pages_per_task)
+                ] or [(0, None)]
+            except Exception as e:
+                logger.error(f"Failed to read PDF {pdf_path}: {e}")
+                yield pdf_path, ExtractionFailed(e)
+                continue
+
+            pending[pdf_path] = {"key": key, "remaining": len(ranges), "pages": []}
+            for start, end in ranges:
+                if pdf_path not in pending:
+                    break  # 앞 범위가 실패하면 남은 범위는 제출하지 않음
+                yield pdf_path, start, end
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        items = work()
+        exhausted = False
+        try:
+            while True:
+                # 동시 작업 수가 max_inflight가 될 때까지 다음 작업 제출
+                while not exhausted and len(futures) < max_inflight:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                    elif len(item) == 2:
+                        yield item
+                    else:
+                        pdf_path, start, end = item
+                        futures[pool.submit(extract_page_range, pdf_path, start, end)] = pdf_path
+                if not futures:
+                    return
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_path = futures.pop(future)
+                    state = pending.get(pdf_path)
+                    if state is None:
+                        continue  # 이미 실패 처리된 파일
+
+                    try:
+                        state["pages"].extend(future.result())
+                    except Exception as e:
+                        logger.error(f"Failed to extract PDF {pdf_path}: {e}")
+                        del pending[pdf_path]
+                        yield pdf_path, ExtractionFailed(e)
+                        continue
+
+                    state["remaining"] -= 1
+                    if state["remaining"] == 0:
+                        pages = sorted(state["pages"], key=lambda page: page.page)
+                        cache.put(state["key"], pages)
+                        del pending[pdf_path]
+                        yield pdf_path, pages
+        finally:
+            # 소비하는 쪽이 중간에 멈추면 아직 시작하지 않은 작업 취소
+            for future in futures:
+                future.cancel()
@@ -1,8 +1,13 @@
 import os
+import sys
+from pathlib import Path
 from typing import List, Dict, Any
 from dotenv import load_dotenv
-from pinecone import Pinecone
-from langchain_openai import OpenAIEmbeddings
+
+# 스크립트로 직접 실행해도 chatbot 패키지를 import 할 수 있도록 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.providers import get_embeddings, get_vector_client
 
 # 환경변수 로드
 load_dotenv()
@@ -24,11 +29,11 @@ class PineConeIndexer:
         self.config = config
 
         # Pinecone 클라이언트 초기화
-        self.pc = Pinecone(api_key=config.api)
+        self.pc = get_vector_client(config.api)
         self.index = self.pc.Index(config.index_name)
 
         # 임베딩 모델 초기화
-        self.embeddings = OpenAIEmbeddings(model=config.embedding_model)
+        self.embeddings = get_embeddings(config.embedding_model)
 
     def similarity_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -114,7 +119,7 @@ def search_manuals(
 
 def main():
     # 먼저 사용 가능한 인덱스들 확인
-    pc = Pinecone(PINECONE_API_KEY)
+    pc = get_vector_client(PINECONE_API_KEY)
     existing_indexes = [idx.name for idx in pc.list_indexes()]
     print(f"존재하는 인덱스: {existing_indexes}")
 
@@ -4,11 +4,17 @@ import hashlib
 import time
 from tqdm import tqdm
 from pathlib import Path
-from pinecone import Pinecone, ServerlessSpec
-from pdfminer.high_level import extract_text
-from langchain_openai import OpenAIEmbeddings
+from pinecone import ServerlessSpec
 from dotenv import load_dotenv
-from utils import image_to_base64
+
+# 스크립트로 직접 실행해도 chatbot 패키지를 import 할 수 있도록 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.utils import image_to_base64
+from chatbot.pdf_extraction import extract_pdfs
+from chatbot.providers import get_embeddings, get_vector_client
+from chatbot.ingestion import ExtractionFailed, IndexManifest, IngestionPipeline, batched
+from chatbot.conf import EMBED_BATCH_SIZE, EMBED_CONCURRENCY, INGEST_MANIFEST_DIR
 
 # 환경변수 로드
 load_dotenv()
@@ -18,6 +24,10 @@ CURRENT_DIR = Path(__file__).parent
 IMG_DIR = CURRENT_DIR / "data" / "imgs"
 PDF_DIR = CURRENT_DIR / "data" / "manuals"
 
+# 청크 분할 방식이 바뀌면 버전을 올려서 전체 재인덱싱
+IMAGE_CHUNKER_VERSION = "img-b64-800-v1"
+PDF_CHUNKER_VERSION = "pdf-page-1000-v1"
+
 print(f"📁 이미지: {IMG_DIR}")
 print(f"📁 PDF: {PDF_DIR}")
 
@@ -26,6 +36,11 @@ print(f"📁 PDF: {PDF_DIR}")
 # =============================================================================
 
 
+def pdf_id_prefix(pdf_file) -> str:
+    """PDF 청크 벡터 id 앞부분 (파일 경로 해시)"""
+    return f"pdf_{hashlib.md5(str(pdf_file).encode()).hexdigest()[:8]}_chunk_"
+
+
 def extract_model_name(filename: str) -> str:
     """파일명에서 모델명 추출"""
     name = os.path.splitext(filename)[0]
@@ -47,10 +62,17 @@ def extract_model_name(filename: str) -> str:
 
 
 class PineconeUploader:
-    def __init__(self):
+    def __init__(
+        self,
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        embed_concurrency: int = EMBED_CONCURRENCY,
+    ):
         pinecone_key = os.getenv("PINECONE_API_KEY")
-        self.pc = Pinecone(api_key=pinecone_key)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.pc = get_vector_client(pinecone_key)
+        self.embeddings = get_embeddings("text-embedding-3-small")
+        # 임베딩 배치 크기 / 동시에 요청할 배치 수
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
 
     def get_or_create_index(self, index_name: str):
         """인덱스 생성 또는 가져오기"""
@@ -116,6 +138,142 @@ class PineconeUploader:
 
         print("=" * 40)
 
+    def _run_pipeline(
+        self,
+        name,
+        index,
+        sources,
+        extract,
+        chunk,
+        chunker_version,
+        upsert_batch_size,
+        id_prefix=None,
+    ):
+        """스트리밍 증분 인덱싱 실행 (새로 추가/변경된 파일만 임베딩, 삭제된 파일은 벡터 삭제)
+
+        id_prefix(source)를 주면 manifest에 없는 파일은 인덱스에서 그 prefix로 시작하는
+        기존 벡터를 찾아서, 새 청크 id에 없는 것(이전 청크 방식의 벡터)을 지운다.
+        """
+
+        def upsert(vectors):
+            for batch in batched(vectors, upsert_batch_size):
+                index.upsert(
+                    vectors=[
+                        {
+                            "id": vector["id"],
+                            "values": vector["values"],
+                            "metadata": vector["metadata"],
+                        }
+                        for vector in batch
+                    ]
+                )
+
+        def delete(ids):
+            index.delete(ids=ids)
+
+        def existing_ids(source):
+            try:
+                return [i for page in index.list(prefix=id_prefix(source)) for i in page]
+            except Exception as e:
+                # pod 기반 인덱스는 list를 지원하지 않음
+                print(f"⚠️ 기존 벡터 조회 실패 {Path(source).name}: {e}")
+                return []
+
+        pipeline = IngestionPipeline(
+            self.embeddings,
+            extract=extract,
+            chunk=chunk,
+            upsert=upsert,
+            delete=delete,
+            existing_ids=existing_ids if id_prefix else None,
+            manifest=IndexManifest(INGEST_MANIFEST_DIR / f"pinecone_{name}.json"),
+            chunker_version=chunker_version,
+            batch_size=self.embed_batch_size,
+            max_concurrency=self.embed_concurrency,
+        )
+        # sources는 디렉토리 전체 파일 목록이므로 사라진 파일의 벡터도 정리
+        stats = pipeline.run(tqdm(sources, desc=name), prune=True)
+
+        if stats["skipped"]:
+            print(f"⏭️ 변경 없는 파일 {stats['skipped']}개 건너뜀")
+        if stats["deleted"]:
+            print(f"🗑️ 삭제/변경된 파일의 벡터 {stats['deleted']}개 삭제")
+        if stats["failed"]:
+            print(f"❌ 실패한 파일 {len(stats['failed'])}개 (다시 실행하면 이어서 처리)")
+        return stats
+
+    def _extract_images(self, img_files):
+        """이미지 → base64 (앞 800자), 실패한 이미지는 (경로, ExtractionFailed)"""
+        for img_file in img_files:
+            try:
+                # base64 변환
+                b64_image = image_to_base64(str(img_file))
+                if not b64_image:
+                    raise ValueError("empty image file")
+            except Exception as e:
+                print(f"❌ 이미지 처리 실패 {Path(img_file).name}: {e}")
+                yield str(img_file), ExtractionFailed(e)
+                continue
+
+            yield str(img_file), b64_image[:800]  # 길이 제한
+
+    def _chunk_image(self, source, b64_image):
+        """이미지 한 장 → 레코드 1개"""
+        img_file = Path(source)
+
+        # 메타데이터
+        model_name = extract_model_name(img_file.name)
+        brand = img_file.parent.name
+
+        yield {
+            "id": f"img_{hashlib.md5(str(img_file).encode()).hexdigest()}",
+            "text": b64_image,
+            "metadata": {
+                "model_name": model_name,
+                "brand": brand,
+                "filename": img_file.name,
+                "content_type": "image",
+            },
+        }
+
+    def _chunk_pdf(self, source, pages):
+        """PDF 페이지 목록 → 청크 레코드 (페이지별 1000자씩, 페이지 번호 유지)"""
+        pdf_file = Path(source)
+
+        if not any(page.text.strip() for page in pages):
+            print(f"❌ 텍스트 없음: {pdf_file.name}")
+            return
+
+        model_name = extract_model_name(pdf_file.name)
+        brand = pdf_file.parent.name
+        id_prefix = pdf_id_prefix(pdf_file)
+
+        chunk_size = 1000
+        chunk_index = 0
+        for page in pages:
+            text = page.text
+            for start in range(0, len(text), chunk_size):
+                chunk = text[start : start + chunk_size]
+                i = chunk_index
+                chunk_index += 1
+
+                if len(chunk.strip()) < 50:
+                    continue
+
+                yield {
+                    "id": f"{id_prefix}{i}",
+                    "text": chunk,
+                    "metadata": {
+                        "model_name": model_name,
+                        "brand": brand,
+                        "filename": pdf_file.name,
+                        "page": page.page,
+                        "chunk_index": i,
+                        "content": chunk,
+                        "content_type": "pdf",
+                    },
+                }
+
     def upload_images(self):
         """이미지 업로드"""
         print("\n🖼️ 이미지 업로드 시작")
@@ -139,62 +297,28 @@ class PineconeUploader:
         # 인덱스 준비
         index = self.get_or_create_index("imgs-index")
 
-        # 이미지 처리 및 업로드
-        vectors = []
-        for img_file in tqdm(img_files, desc="이미지 처리"):
-            try:
-                # base64 변환
-                b64_image = image_to_base64(str(img_file))
-                if not b64_image:
-                    continue
-
-                b64_image = b64_image[:800]  # 길이 제한
-
-                # 임베딩 생성
-                embedding = self.embeddings.embed_query(b64_image)
-
-                if not embedding:
-                    continue
-
-                # 메타데이터
-                model_name = extract_model_name(img_file.name)
-                brand = img_file.parent.name
-
-                vector = {
-                    "id": f"img_{hashlib.md5(str(img_file).encode()).hexdigest()}",
-                    "values": embedding,
-                    "metadata": {
-                        "model_name": model_name,
-                        "brand": brand,
-                        "filename": img_file.name,
-                        "content_type": "image",
-                    },
-                }
-                vectors.append(vector)
-
-            except Exception as e:
-                print(f"❌ 이미지 처리 실패 {img_file.name}: {e}")
-                continue
-
-        print(f"✅ 처리된 이미지: {len(vectors)}개")
-
-        # Pinecone 업로드
-        if vectors:
-            try:
-                # 배치로 업로드
-                batch_size = 50
-                for i in tqdm(range(0, len(vectors), batch_size), desc="업로드"):
-                    batch = vectors[i : i + batch_size]
-                    index.upsert(vectors=batch)
+        # 이미지 처리 → 배치 임베딩 → 업로드 (스트리밍)
+        try:
+            stats = self._run_pipeline(
+                "imgs-index",
+                index,
+                img_files,
+                extract=self._extract_images,
+                chunk=self._chunk_image,
+                chunker_version=IMAGE_CHUNKER_VERSION,
+                upsert_batch_size=50,
+            )
+        except Exception as e:
+            print(f"❌ 업로드 실패: {e}")
+            return False
 
-                time.sleep(3)
-                stats = index.describe_index_stats()
-                print(f"🎉 이미지 업로드 완료! 총: {stats['total_vector_count']}개")
-                return True
+        print(f"✅ 처리된 이미지: {stats['vectors']}개")
 
-            except Exception as e:
-                print(f"❌ 업로드 실패: {e}")
-                return False
+        if stats["vectors"] or stats["skipped"] or stats["deleted"]:
+            time.sleep(3)
+            stats = index.describe_index_stats()
+            print(f"🎉 이미지 업로드 완료! 총: {stats['total_vector_count']}개")
+            return True
 
         return False
 
@@ -217,83 +341,29 @@ class PineconeUploader:
         # 인덱스 준비
         index = self.get_or_create_index("manuals-index")
 
-        # PDF 처리
-        all_vectors = []
-        for pdf_file in pdf_files:
-            try:
-                print(f"📖 처리 중: {pdf_file.name}")
-
-                # 텍스트 추출
-                text = extract_text(str(pdf_file))
-                if not text.strip():
-                    print(f"❌ 텍스트 없음: {pdf_file.name}")
-                    continue
-
-                # 간단한 청크 분할 (1000자씩)
-                chunk_size = 1000
-                chunks = [
-                    text[i : i + chunk_size] for i in range(0, len(text), chunk_size)
-                ]
-
-                # 청크별 벡터 생성
-                for i, chunk in enumerate(chunks):
-                    if len(chunk.strip()) < 50:
-                        continue
-
-                    try:
-                        embedding = self.embeddings.embed_query(chunk)
-
-                        if not embedding:
-                            continue
-
-                        model_name = extract_model_name(pdf_file.name)
-                        brand = pdf_file.parent.name
-                        pdf_hash = hashlib.md5(str(pdf_file).encode()).hexdigest()[:8]
-
-                        vector = {
-                            "id": f"pdf_{pdf_hash}_chunk_{i}",
-                            "values": embedding,
-                            "metadata": {
-                                "model_name": model_name,
-                                "brand": brand,
-                                "filename": pdf_file.name,
-                                "chunk_index": i,
-                                "content": chunk,
-                                "content_type": "pdf",
-                            },
-                        }
-                        all_vectors.append(vector)
-
-                    except Exception as e:
-                        print(f"❌ 청크 처리 실패: {e}")
-                        continue
-
-                print(
-                    f"✅ {pdf_file.name}: {len([v for v in all_vectors if pdf_hash in v['id']])}개 청크"
-                )
-
-            except Exception as e:
-                print(f"❌ PDF 처리 실패 {pdf_file.name}: {e}")
-                continue
-
-        print(f"✅ 총 처리된 청크: {len(all_vectors)}개")
-
-        # Pinecone 업로드
-        if all_vectors:
-            try:
-                batch_size = 100
-                for i in tqdm(range(0, len(all_vectors), batch_size), desc="업로드"):
-                    batch = all_vectors[i : i + batch_size]
-                    index.upsert(vectors=batch)
+        # 병렬 추출 → 청크 분할 → 배치 임베딩 → 업로드 (스트리밍)
+        try:
+            stats = self._run_pipeline(
+                "manuals-index",
+                index,
+                pdf_files,
+                extract=extract_pdfs,
+                chunk=self._chunk_pdf,
+                chunker_version=PDF_CHUNKER_VERSION,
+                upsert_batch_size=100,
+                id_prefix=pdf_id_prefix,
+            )
+        except Exception as e:
+            print(f"❌ 업로드 실패: {e}")
+            return False
 
-                time.sleep(3)
-                stats = index.describe_index_stats()
-                print(f"🎉 PDF 업로드 완료! 총: {stats['total_vector_count']}개")
-                return True
+        print(f"✅ 총 처리된 청크: {stats['vectors']}개")
 
-            except Exception as e:
-                print(f"❌ 업로드 실패: {e}")
-                return False
+        if stats["vectors"] or stats["skipped"] or stats["deleted"]:
+            time.sleep(3)
+            stats = index.describe_index_stats()
+            print(f"🎉 PDF 업로드 완료! 총: {stats['total_vector_count']}개")
+            return True
 
         return False
 
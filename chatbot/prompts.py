@@ -0,0 +1,83 @@
+from langchain_core.prompts import ChatPromptTemplate
+
+
+def create_analysis_prompt() -> ChatPromptTemplate:
+    """질문 분석(키워드 추출) 프롬프트"""
+    return ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                """당신은 사용자의 질문을 분석하는 전문가입니다.
+                주어진 질문에서 다음을 추출하세요:
+                1. 주요 키워드 (3-5개)
+                2. 질문의 핵심 주제
+                3. 구체적인 조건이나 요구사항
+                4. 답변에서 다뤄야 할 세부 사항들
+
+                JSON 형식으로 출력하세요:
+                {{
+                    "keywords": ["키워드1", "키워드2", "키워드3"],
+                    "main_topic": "주제",
+                    "conditions": ["조건1"],
+                    "details": ["세부사항1"]
+                }}
+                """,
+            ),
+            ("human", "질문: {query}"),
+        ]
+    )
+
+
+def create_cot_prompt() -> ChatPromptTemplate:
+    """최종 답변 생성(Chain of Thought) 프롬프트"""
+    return ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                """
+            Elaborate on the topic using a Tree of Thoughts and backtrack when necessary to construct a clear, cohesive Chain of Thought reasoning.
+            당신은 스마트한 가전 도우미입니다. 질문을 분석한 후에 관련 정보를 수집한 후, 체계적으로 답변하세요.:
+            ## 답변 지침
+            - 조건들을 나열하기보다는 통합하여 하나의 흐름으로 설명하십시오.
+            - 반복되거나 유사한 내용을 중복해서 설명하지 마십시오.
+            - 논리적 구조를 갖춘 명확한 문단 형태로 답변하십시오.
+            - 필요 시 예시나 유사 상황을 들어 이해를 도우십시오.
+
+
+            예시 출력 :
+
+
+            - [체계적인 통합 설명을 한 문단 이상으로 기술]
+
+            ### 추가 안내
+            - [관련된 팁이나 참고 정보가 있으면 제공]
+            """,
+            ),
+            (
+                "human",
+                """
+            질문: {query}
+            분석: {analysis}
+            컨텍스트: {context}
+            """,
+            ),
+        ]
+    )
+
+
+def create_summary_prompt() -> ChatPromptTemplate:
+    """대화 이력 누적 요약 프롬프트"""
+    return ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                """당신은 가전 고객지원 대화를 요약하는 도우미입니다.
+                기존 요약에 새 대화 내용을 반영해서 하나의 요약으로 다시 작성하세요.
+                - 제품 모델명, 증상, 이미 안내한 해결 방법, 사용자가 확인한 사항을 유지하세요.
+                - 인사말이나 반복되는 내용은 생략하세요.
+                - 300자 이내의 한국어 문단으로 작성하세요.
+                """,
+            ),
+            ("human", "기존 요약:\n{summary}\n\n새 대화:\n{messages}"),
+        ]
+    )
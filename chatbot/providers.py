@@ -0,0 +1,402 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from chatbot.conf import (
+    EMBEDDING_BACKEND,
+    LLM_BACKEND,
+    WEB_SEARCH_BACKEND,
+    WEB_SEARCH_FIXTURES,
+    VECTOR_STORE_BACKEND,
+    EMBEDDING_LATENCY,
+    LLM_LATENCY,
+    WEB_SEARCH_LATENCY,
+)
+from chatbot.embedding_cache import cached_embeddings
+
+EMBEDDING_DIMENSION = 1536
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashEmbeddings(Embeddings):
+    """네트워크 없이 동작하는 결정적 로컬 임베딩
+
+    단어와 글자 2-gram을 해시해서 고정 차원에 누적하는 feature hashing 방식이라
+    같은 텍스트는 항상 같은 벡터가 되고, 겹치는 단어가 많을수록 코사인 유사도가 높다.
+    latency(초)를 주면 호출마다 그만큼 지연시켜 API 호출을 흉내낸다.
+    """
+
+    def __init__(self, size: int = EMBEDDING_DIMENSION, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+
+    def _features(self, text: str):
+        for word in _TOKEN_PATTERN.findall(text.lower()):
+            yield word
+            for i in range(len(word) - 1):
+                yield word[i : i + 2]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class EchoChatModel(BaseChatModel):
+    """네트워크 없이 동작하는 결정적 로컬 LLM
+
+    질문 분석 프롬프트에는 질문 단어로 만든 키워드 JSON을, 그 외에는 프롬프트의
+    컨텍스트 앞부분(없으면 질문)을 그대로 돌려준다. latency(초)만큼 지연시켜
+    API 호출을 흉내낸다.
+    """
+
+    latency: float = 0.0
+    max_chars: int = 300
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        system = " ".join(str(m.content) for m in messages if m.type == "system")
+        last = str(messages[-1].content) if messages else ""
+
+        if '"keywords"' in system:
+            # 질문 분석: 자주 나온 단어 순으로 키워드 3개
+            question = last.split("질문:", 1)[-1]
+            words = [w for w in _TOKEN_PATTERN.findall(question) if len(w) > 1]
+            keywords = [w for w, _ in Counter(words).most_common(3)] or [question.strip()]
+            return json.dumps(
+                {"keywords": keywords, "main_topic": question.strip()}, ensure_ascii=False
+            )
+
+        if "컨텍스트:" in last:
+            context = last.split("컨텍스트:", 1)[1].strip()
+            if context:
+                return context[: self.max_chars]
+        return last.strip()[: self.max_chars]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        message = AIMessage(content=self._respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = AIMessage(content=self._respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FixtureWebSearch(Runnable):
+    """웹 검색 도구 대체 (JSON 픽스처에서 질문과 단어가 많이 겹치는 결과 반환)
+
+    픽스처는 Tavily 결과 형식({"content", "url", "title"})의 목록이다.
+    TavilySearch와 같은 {"query": ...} 입력 / {"results": [...]} 출력 형식을 쓴다.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_results: int = 5, latency: float = 0.0):
+        self.max_results = max_results
+        self.latency = latency
+        self.results: List[Dict[str, Any]] = []
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.results = json.load(f)
+
+    def _search(self, query: str) -> Dict[str, Any]:
+        words = set(_TOKEN_PATTERN.findall(query.lower()))
+        scored = []
+        for item in self.results:
+            text = f"{item.get('title', '')} {item.get('content', '')}".lower()
+            overlap = len(words & set(_TOKEN_PATTERN.findall(text)))
+            if overlap:
+                scored.append((overlap, item))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return {"query": query, "results": [item for _, item in scored[: self.max_results]]}
+
+    def invoke(self, input, config=None, **kwargs) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._search(input["query"])
+
+    async def ainvoke(self, input, config=None, **kwargs) -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._search(input["query"])
+
+
+class Record(dict):
+    """Pinecone 응답처럼 속성(.matches)과 키(["matches"]) 둘 다로 읽을 수 있는 dict"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class InMemoryIndex:
+    """Pinecone Index 대체 (upsert / query / delete / list / describe_index_stats)
+
+    벡터는 id → (값, 메타데이터)로 보관하고, 검색 시 변경이 있었을 때만 NumPy
+    행렬을 다시 만들어 한 번의 행렬 곱으로 점수를 계산한다.
+    """
+
+    def __init__(self, name: str, dimension: int, metric: str = "cosine"):
+        if metric not in ("cosine", "dotproduct", "euclidean"):
+            raise ValueError(f"Unknown metric: {metric}")
+        self.name = name
+        self.dimension = dimension
+        self.metric = metric
+        self._records: Dict[str, tuple] = {}
+        self._ids: List[str] = []
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _vector(self, values) -> np.ndarray:
+        vector = np.asarray(values, dtype=np.float32)
+        if vector.shape != (self.dimension,):
+            raise ValueError(
+                f"Vector dimension {vector.size} does not match index dimension {self.dimension}"
+            )
+        if self.metric == "cosine":
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector = vector / norm
+        return vector
+
+    def upsert(self, vectors: Iterable, namespace: str = "", **kwargs) -> Record:
+        """vectors: {"id", "values", "metadata"} dict 또는 (id, values[, metadata]) 튜플"""
+        rows = []
+        for item in vectors:
+            if isinstance(item, dict):
+                vector_id, values, metadata = item["id"], item["values"], item.get("metadata")
+            else:
+                vector_id, values, metadata = item[0], item[1], (item[2] if len(item) > 2 else None)
+            rows.append((str(vector_id), self._vector(values), dict(metadata or {})))
+        with self._lock:
+            for vector_id, vector, metadata in rows:
+                self._records[vector_id] = (vector, metadata)
+            self._dirty = True
+        return Record(upserted_count=len(rows))
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, **kwargs) -> Record:
+        with self._lock:
+            if delete_all:
+                self._records.clear()
+            for vector_id in ids or []:
+                self._records.pop(str(vector_id), None)
+            self._dirty = True
+        return Record()
+
+    def list(self, prefix: str = "", limit: int = 100, namespace: str = "", **kwargs):
+        """prefix로 시작하는 id를 limit개씩 묶어서 반환 (Pinecone serverless Index.list)"""
+        with self._lock:
+            ids = sorted(i for i in self._records if i.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            yield ids[start : start + limit]
+
+    def _snapshot(self):
+        with self._lock:
+            if self._dirty:
+                self._ids = list(self._records)
+                self._matrix = (
+                    np.stack([self._records[i][0] for i in self._ids])
+                    if self._ids
+                    else np.zeros((0, self.dimension), dtype=np.float32)
+                )
+                self._dirty = False
+            return self._ids, self._matrix, self._records
+
+    def query(
+        self,
+        vector,
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        **kwargs,
+    ) -> Record:
+        ids, matrix, records = self._snapshot()
+        if not ids:
+            return Record(matches=[], namespace="")
+
+        query = self._vector(vector)
+        if self.metric == "euclidean":
+            # Pinecone과 같이 제곱 거리 (작을수록 가까움)
+            scores = ((matrix - query) ** 2).sum(axis=1)
+            order = np.argsort(scores)
+        else:
+            scores = matrix @ query
+            order = np.argsort(-scores)
+
+        matches = []
+        for row in order[:top_k]:
+            vector_id = ids[row]
+            match = Record(id=vector_id, score=float(scores[row]), metadata=None, values=[])
+            stored = records.get(vector_id)
+            if stored is not None:
+                if include_metadata:
+                    match["metadata"] = dict(stored[1])
+                if include_values:
+                    match["values"] = stored[0].tolist()
+            matches.append(match)
+        return Record(matches=matches, namespace="")
+
+    def describe_index_stats(self, **kwargs) -> Record:
+        with self._lock:
+            count = len(self._records)
+        return Record(
+            dimension=self.dimension,
+            total_vector_count=count,
+            namespaces={"": Record(vector_count=count)} if count else {},
+        )
+
+
+# 인덱스 이름 → InMemoryIndex (같은 프로세스의 모든 클라이언트가 공유)
+_memory_indexes: Dict[str, InMemoryIndex] = {}
+_memory_indexes_lock = threading.Lock()
+
+
+class InMemoryPinecone:
+    """Pinecone 클라이언트 대체 (list_indexes / create_index / Index / delete_index)
+
+    인덱스는 프로세스 메모리에만 있으므로 업로드 처리량 측정이나 같은 프로세스 안의
+    검색 테스트에 쓴다.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        pass
+
+    def list_indexes(self) -> List[Record]:
+        with _memory_indexes_lock:
+            return [
+                Record(name=index.name, dimension=index.dimension, metric=index.metric)
+                for index in _memory_indexes.values()
+            ]
+
+    def has_index(self, name: str) -> bool:
+        return name in _memory_indexes
+
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", spec=None, **kwargs):
+        with _memory_indexes_lock:
+            if name in _memory_indexes:
+                raise ValueError(f"Index already exists: {name}")
+            _memory_indexes[name] = InMemoryIndex(name, dimension, metric)
+
+    def delete_index(self, name: str) -> None:
+        with _memory_indexes_lock:
+            _memory_indexes.pop(name, None)
+
+    def Index(self, name: str) -> InMemoryIndex:
+        index = _memory_indexes.get(name)
+        if index is None:
+            raise ValueError(f"Index not found: {name}")
+        return index
+
+
+def get_embeddings(
+    model: str, backend: Optional[str] = None, latency: Optional[float] = None
+) -> Embeddings:
+    """EMBEDDING_BACKEND 설정에 맞는 임베딩 객체 (임베딩 캐시 포함)
+
+    backend/latency를 넘기면 환경변수 설정 대신 사용한다.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "hash":
+        embeddings = HashEmbeddings(
+            latency=EMBEDDING_LATENCY if latency is None else latency
+        )
+        # 실제 모델 벡터와 캐시 키가 섞이지 않도록 모델명 구분
+        return cached_embeddings(f"hash:{model}", embeddings)
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        return cached_embeddings(model, OpenAIEmbeddings(model=model))
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+
+def get_llm(
+    model: str,
+    temperature: float = 0.3,
+    backend: Optional[str] = None,
+    latency: Optional[float] = None,
+    **kwargs,
+) -> BaseChatModel:
+    """LLM_BACKEND 설정에 맞는 채팅 모델 (kwargs는 ChatOpenAI에만 전달)"""
+    backend = backend or LLM_BACKEND
+    if backend == "echo":
+        return EchoChatModel(latency=LLM_LATENCY if latency is None else latency)
+    if backend == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(model=model, temperature=temperature, **kwargs)
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+
+
+def get_web_search(
+    max_results: int = 5,
+    backend: Optional[str] = None,
+    fixtures: Optional[str] = None,
+    latency: Optional[float] = None,
+) -> Runnable:
+    """WEB_SEARCH_BACKEND 설정에 맞는 웹 검색 도구 ({"query": ...} → {"results": [...]})"""
+    backend = backend or WEB_SEARCH_BACKEND
+    if backend == "fixture":
+        return FixtureWebSearch(
+            fixtures or WEB_SEARCH_FIXTURES,
+            max_results=max_results,
+            latency=WEB_SEARCH_LATENCY if latency is None else latency,
+        )
+    if backend == "tavily":
+        from langchain_tavily import TavilySearch
+
+        return TavilySearch(max_results=max_results)
+    raise ValueError(f"Unknown WEB_SEARCH_BACKEND: {backend}")
+
+
+def get_vector_client(api_key: Optional[str] = None, backend: Optional[str] = None):
+    """VECTOR_STORE_BACKEND 설정에 맞는 Pinecone (호환) 클라이언트"""
+    backend = backend or VECTOR_STORE_BACKEND
+    if backend == "memory":
+        return InMemoryPinecone()
+    if backend == "pinecone":
+        from pinecone import Pinecone
+
+        return Pinecone(api_key=api_key or os.getenv("PINECONE_API_KEY"))
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
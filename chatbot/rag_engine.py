@@ -3,104 +3,122 @@ import json
 import asyncio
 import logging
 from dotenv import load_dotenv
-from pdfminer.high_level import extract_text
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_tavily import TavilySearch
 from langchain_core.documents import Document
-from .rag_indexer_class import IndexConfig, RAGIndexer
-from .utils import image_to_base64
+from .prompts import create_analysis_prompt
+from .context import assemble_context, citation_label, format_context
+from .telemetry import activate, annotate, record_tokens, span
+from .tokens import estimate_tokens
+from .pdf_extraction import extract_pdf
+from .providers import get_web_search
+from .runtime import MODEL_NAME, aget_runtime, get_runtime
+from .utils import image_head_to_base64
+from .image_search import consensus, image_signature
+from contextlib import ExitStack
 from concurrent.futures import ThreadPoolExecutor
 
 
 # pdfminer 경고 무시
 logging.getLogger("pdfminer").setLevel(logging.ERROR)
 
+logger = logging.getLogger(__name__)
+
 # 환경변수 로드
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
 
 def search_vector_db_image(img_path):
-    """백터 디비에서 이미지의 모델을 가져온다"""
+    """백터 디비에서 이미지의 모델을 가져온다
 
-    # 설정 생성
-    config = IndexConfig(
-        persistent_directory="./chroma",
-        collection_name="imgs",
-        embedding_model="text-embedding-3-small",
-    )
+    img_path는 경로 외에 업로드 파일 객체나 bytes/memoryview도 받는다.
+    """
+    runtime = get_runtime()
 
-    # 인덱서 생성 및 실행
-    indexer = RAGIndexer(config)
+    # 로컬 특징 카탈로그가 있으면 네트워크 호출 없이 식별
+    catalog = runtime.image_catalog
+    if catalog is not None:
+        return catalog.identify(img_path)
 
-    # 이미지 로드해서 모델명 검색
-    img_base64 = image_to_base64(img_path)
+    # 워커 공용 인덱서 사용
+    indexer = runtime.image_indexer
+
+    # 검색에 쓰는 base64 앞부분만 읽어서 인코딩
+    img_base64 = image_head_to_base64(img_path)
 
     # 유사도 검색
     model_nm = indexer.search_and_show(img_base64)
     return model_nm
 
 
+def search_vector_db_images(images):
+    """이미지 여러 장의 모델을 한 번에 식별
+
+    images는 경로나 파일 객체 목록이다. 이미지마다 {"model_code", "score"}와
+    전체 합의 모델코드를 돌려준다 (score는 로컬 카탈로그의 코사인 유사도).
+    """
+    runtime = get_runtime()
+
+    catalog = runtime.image_catalog
+    if catalog is not None:
+        # 디코딩/특징 추출은 스레드풀에서 병렬로, 비교는 행렬 곱 한 번으로
+        signatures = list(runtime.executor.map(image_signature, images))
+        matches = catalog.match_batch(signatures)
+    else:
+        encoded = [image_head_to_base64(image) for image in images]
+        model_codes = runtime.image_indexer.search_and_show_batch(encoded)
+        matches = [(model_code, None, None) for model_code in model_codes]
+
+    results = [
+        {"model_code": model_code, "score": score}
+        for model_code, score, _ in matches
+    ]
+    return results, consensus([(m, s or 1.0, d) for m, s, d in matches])
+
+
 def extract_text_from_pdf(pdf_path):
-    """PDF 텍스트 추출"""
+    """PDF 텍스트 추출 (파일 해시/수정 시각 기준 추출 캐시 사용)"""
     try:
-        return extract_text(pdf_path)
+        return "".join(page.text for page in extract_pdf(str(pdf_path)))
     except Exception as e:
-        print(f"PDF 읽기 실패 {pdf_path}: {e}")
+        logger.warning(f"PDF 읽기 실패 {pdf_path}: {e}")
         return ""
 
 
 def create_prompt_chain(llm):
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """당신은 사용자의 질문을 분석하는 전문가입니다. 
-                주어진 질문에서 다음을 추출하세요:
-                1. 주요 키워드 (3-5개)
-                2. 질문의 핵심 주제
-                3. 구체적인 조건이나 요구사항
-                4. 답변에서 다뤄야 할 세부 사항들
-                
-                JSON 형식으로 출력하세요:
-                {{
-                    "keywords": ["키워드1", "키워드2", "키워드3"],
-                    "main_topic": "주제",
-                    "conditions": ["조건1"],
-                    "details": ["세부사항1"]
-                }}
-                """,
-            ),
-            ("human", "질문: {query}"),
-        ]
-    )
-    return prompt | llm | StrOutputParser()
+    return create_analysis_prompt() | llm | StrOutputParser()
 
 
-async def analyze_with_llm(query, llm, executor):
-    chain = create_prompt_chain(llm)
+async def _call(func, arg, executor=None):
+    """executor가 있으면 동기 invoke를 스레드에서, 없으면 ainvoke를 이벤트 루프에서 실행"""
+    if executor is None:
+        return await func.ainvoke(arg)
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(executor, chain.invoke, {"query": query})
+    return await loop.run_in_executor(executor, func.invoke, arg)
 
 
-async def search_with_tavily(query, tavily_tool, executor):
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(executor, tavily_tool.invoke, {"query": query})
+async def analyze_with_llm(query, llm, executor=None, chain=None):
+    if chain is None:
+        chain = create_prompt_chain(llm)
+    with span("analysis"):
+        return await _call(chain, {"query": query}, executor)
 
 
-async def retrieve_from_vector(keywords, retriever, executor):
-    loop = asyncio.get_running_loop()
+async def search_with_tavily(query, tavily_tool, executor=None):
+    with span("web_search"):
+        return await _call(tavily_tool, {"query": query}, executor)
+
+
+async def retrieve_from_vector(keywords, retriever, executor=None):
     all_docs = []
 
     async def get_docs(keyword):
         try:
-            return await loop.run_in_executor(executor, retriever.invoke, keyword)
+            with span("retrieval", keyword=keyword):
+                return await _call(retriever, keyword, executor)
         except Exception as e:
-            print(f"[벡터 검색 오류] '{keyword}': {e}")
+            logger.warning(f"[벡터 검색 오류] '{keyword}': {e}")
             return []
 
     tasks = [get_docs(k) for k in keywords]
@@ -116,52 +134,186 @@ def parse_analysis_result(result: str, fallback_query: str):
         keywords = data.get("keywords", [])
         return keywords, result  # JSON 파싱 성공
     except json.JSONDecodeError as e:
-        print(f"[LLM 분석 결과 JSON 파싱 실패]: {e}")
+        logger.warning(f"[LLM 분석 결과 JSON 파싱 실패]: {e}")
         return [fallback_query], ""  # fallback 처리
 
 
-async def analyze_query_and_retrieve_async(query: str, retriever, llm, tavily_tool):
-    all_contexts = []
+def web_results_to_documents(search_result):
+    """Tavily 검색 결과 → 문서화"""
+    docs = []
+    web_results = search_result.get("results", [])
+    for item in web_results:
+        content = item.get("content", "")
+        url = item.get("url", "")
+        if content:
+            doc = Document(
+                page_content=content,
+                metadata={"source": url, "title": item.get("title", "")},
+            )
+            docs.append(doc)
+    return docs
+
+
+async def speculative_retrieve_async(
+    query: str,
+    retriever,
+    llm,
+    tavily_tool,
+    analysis_chain=None,
+    executor=None,
+    time_budget=None,
+):
+    """원 질문 벡터 검색을 LLM 분석/웹 검색과 동시에 시작하는 추측 실행 모드
+
+    분석 결과가 도착하면 그 키워드로 추가 벡터 검색을 띄우고 (이미 검색한 키워드/
+    문서는 제외), time_budget(초)을 넘기면 남은 단계는 취소하고 지금까지 모인
+    컨텍스트로 진행한다.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + time_budget if time_budget else None
 
-    # with로 executor 명시적 자원관리
-    with ThreadPoolExecutor() as executor:
+    async def get_docs(keyword):
         try:
-            # LLM 분석 + 웹 검색 병렬 처리
-            llm_task = analyze_with_llm(query, llm, executor)
-            tavily_task = search_with_tavily(query, tavily_tool, executor)
-            analysis_result, search_result = await asyncio.gather(llm_task, tavily_task)
-
-            # 분석 결과에서 키워드 추출
-            keywords, parsed_result = parse_analysis_result(analysis_result, query)
-
-            # Tavily 검색 결과 → 문서화
-            web_results = search_result.get("results", [])
-            for item in web_results:
-                content = item.get("content", "")
-                url = item.get("url", "")
-                if content:
-                    doc = Document(
-                        page_content=content,
-                        metadata={"source": url, "title": item.get("title", "")},
-                    )
-                    all_contexts.append(doc)
-
-            # 벡터 검색도 병렬 처리
-            vector_docs = await retrieve_from_vector(keywords, retriever, executor)
-            all_contexts.extend(vector_docs)
-
-            return all_contexts, parsed_result
+            with span("retrieval", keyword=keyword):
+                return await _call(retriever, keyword, executor)
+        except Exception as e:
+            logger.warning(f"[벡터 검색 오류] '{keyword}': {e}")
+            return []
 
+    analysis_task = asyncio.ensure_future(
+        analyze_with_llm(query, llm, executor, chain=analysis_chain)
+    )
+    tavily_task = asyncio.ensure_future(search_with_tavily(query, tavily_tool, executor))
+    pending = {analysis_task, tavily_task, asyncio.ensure_future(get_docs(query))}
+    searched_keywords = {query}
+
+    web_docs, vector_docs, parsed_result = [], [], ""
+    seen_docs = set()
+
+    while pending:
+        timeout = None if deadline is None else max(0, deadline - loop.time())
+        done, pending = await asyncio.wait(
+            pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            logger.warning(f"[시간 초과] {time_budget}초 초과, {len(pending)}개 단계 생략")
+            for task in pending:
+                task.cancel()
+            break
+
+        for task in done:
+            try:
+                result = task.result()
+            except Exception as e:
+                logger.error(f"[단계 처리 오류]: {e}")
+                continue
+
+            if task is analysis_task:
+                # 분석 결과 키워드 중 아직 검색하지 않은 것만 추가 검색
+                keywords, parsed_result = parse_analysis_result(result, query)
+                for keyword in keywords:
+                    if keyword not in searched_keywords:
+                        searched_keywords.add(keyword)
+                        pending.add(asyncio.ensure_future(get_docs(keyword)))
+            elif task is tavily_task:
+                web_docs = web_results_to_documents(result)
+            else:
+                for doc in result:
+                    key = (doc.page_content, doc.metadata.get("source"))
+                    if key not in seen_docs:
+                        seen_docs.add(key)
+                        vector_docs.append(doc)
+
+    return web_docs + vector_docs, parsed_result
+
+
+async def analyze_query_and_retrieve_async(
+    query: str,
+    retriever,
+    llm,
+    tavily_tool,
+    analysis_chain=None,
+    executor=None,
+    speculative=False,
+    time_budget=None,
+):
+    """질문 분석 + 웹 검색 + 벡터 검색
+
+    executor를 넘기면 동기 클라이언트를 스레드풀에서 실행하고 (asyncio.run 경로),
+    생략하면 ainvoke로 현재 이벤트 루프에서 바로 실행한다 (ASGI 경로).
+    speculative=True면 분석을 기다리지 않고 벡터 검색을 먼저 시작한다.
+    """
+    if speculative:
+        try:
+            return await speculative_retrieve_async(
+                query,
+                retriever,
+                llm,
+                tavily_tool,
+                analysis_chain=analysis_chain,
+                executor=executor,
+                time_budget=time_budget,
+            )
         except Exception as e:
-            print(f"[전체 처리 오류]: {e}")
+            logger.error(f"[전체 처리 오류]: {e}")
             return [], ""
 
+    all_contexts = []
 
-def enhanced_chain(query: str, retriever, llm, cot_prompt, history=[]):
-    tavily_tool = TavilySearch(max_results=5)
-    context, analysis = asyncio.run(
-        analyze_query_and_retrieve_async(query, retriever, llm, tavily_tool)
-    )
+    try:
+        # LLM 분석 + 웹 검색 병렬 처리
+        llm_task = analyze_with_llm(query, llm, executor, chain=analysis_chain)
+        tavily_task = search_with_tavily(query, tavily_tool, executor)
+        analysis_result, search_result = await asyncio.gather(llm_task, tavily_task)
+
+        # 분석 결과에서 키워드 추출
+        keywords, parsed_result = parse_analysis_result(analysis_result, query)
+
+        # Tavily 검색 결과 → 문서화
+        all_contexts.extend(web_results_to_documents(search_result))
+
+        # 벡터 검색도 병렬 처리
+        vector_docs = await retrieve_from_vector(keywords, retriever, executor)
+        all_contexts.extend(vector_docs)
+
+        return all_contexts, parsed_result
+
+    except Exception as e:
+        logger.error(f"[전체 처리 오류]: {e}")
+        return [], ""
+
+
+def prepare_context(query, context, analysis):
+    """중복 제거 + 리랭킹 + 토큰 예산 적용 후 인용 블록 텍스트로 변환
+
+    (선택된 문서, 프롬프트용 텍스트, 통계)를 돌려준다.
+    """
+    with span("context_assembly"):
+        selected = assemble_context(query, context, analysis)
+        # 절약한 토큰은 검색 결과 전체를 그대로 넣던 이전 방식 기준
+        context_text, context_stats = format_context(selected, retrieved=context)
+    record_tokens("context", context_stats["tokens"])
+    annotate("context_sources", [citation_label(doc) for doc in selected])
+    return selected, context_text, context_stats
+
+
+def record_usage(messages, content, usage=None):
+    """LLM 사용 토큰 기록 (응답에 사용량 정보가 없으면 추정치)"""
+    if usage:
+        record_tokens("prompt", usage.get("input_tokens", 0))
+        record_tokens("completion", usage.get("output_tokens", 0))
+    else:
+        record_tokens("prompt", sum(estimate_tokens(m["content"]) for m in messages))
+        record_tokens("completion", estimate_tokens(content))
+
+
+def build_messages(query, context, analysis, cot_prompt, history=[]):
+    """history + 현재 질문 prompt를 합쳐 messages 구성
+
+    context는 문서 목록이나 format_context로 미리 만든 텍스트.
+    """
+    if not isinstance(context, str):
+        context, _ = format_context(context)
 
     prompt_value = cot_prompt.invoke(
         {"query": query, "analysis": analysis, "context": context}
@@ -169,76 +321,249 @@ def enhanced_chain(query: str, retriever, llm, cot_prompt, history=[]):
 
     prompt_str = prompt_value.to_string()
 
-    # history + 현재 질문 prompt를 합쳐 messages 구성
-    messages = history + [{"role": "user", "content": prompt_str}]
+    return history + [{"role": "user", "content": prompt_str}]
+
+
+def enhanced_chain(
+    query: str,
+    retriever,
+    llm,
+    cot_prompt,
+    history=[],
+    tavily_tool=None,
+    analysis_chain=None,
+    executor=None,
+    speculative=False,
+    time_budget=None,
+):
+    if tavily_tool is None:
+        tavily_tool = get_web_search(max_results=5)
+
+    # with로 executor 명시적 자원관리 (넘겨받은 executor는 호출자가 관리)
+    with ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ThreadPoolExecutor())
+        context, analysis = asyncio.run(
+            analyze_query_and_retrieve_async(
+                query,
+                retriever,
+                llm,
+                tavily_tool,
+                analysis_chain=analysis_chain,
+                executor=executor,
+                speculative=speculative,
+                time_budget=time_budget,
+            )
+        )
+
+    # 중복 제거 + 리랭킹 + 토큰 예산 적용
+    _, context_text, _ = prepare_context(query, context, analysis)
+    messages = build_messages(query, context_text, analysis, cot_prompt, history)
 
     # LLM에 messages 전달
-    response = llm.invoke(messages)
+    with span("generation"):
+        response = llm.invoke(messages)
+    record_usage(messages, response.content, response.usage_metadata)
 
     return response
 
 
-def run_chatbot(query, image_path=None, history=[]):
-    EMBEDDINGS_MODEL = "text-embedding-3-small"
-    COLLECTION_NAME = "manuals"
-    VECTOR_DB_DIR = "./chroma"
-
-    # 설정 생성
-    config = IndexConfig(
-        persistent_directory=VECTOR_DB_DIR,
-        collection_name=COLLECTION_NAME,
-        embedding_model=EMBEDDINGS_MODEL,
+async def aenhanced_chain(
+    query: str,
+    retriever,
+    llm,
+    cot_prompt,
+    history=[],
+    tavily_tool=None,
+    analysis_chain=None,
+    speculative=False,
+    time_budget=None,
+):
+    """enhanced_chain의 비동기 버전 (이벤트 루프에서 ainvoke로 직접 실행)"""
+    if tavily_tool is None:
+        tavily_tool = get_web_search(max_results=5)
+    context, analysis = await analyze_query_and_retrieve_async(
+        query,
+        retriever,
+        llm,
+        tavily_tool,
+        analysis_chain=analysis_chain,
+        speculative=speculative,
+        time_budget=time_budget,
     )
 
-    # 인덱서 생성 및 실행
-    indexer = RAGIndexer(config)
+    _, context_text, _ = prepare_context(query, context, analysis)
+    messages = build_messages(query, context_text, analysis, cot_prompt, history)
 
-    retriever = indexer.vectordb.as_retriever(
-        search_type="mmr", search_kwargs={"k": 8, "fetch_k": 20}
-    )
+    with span("generation"):
+        response = await llm.ainvoke(messages)
+    record_usage(messages, response.content, response.usage_metadata)
+    return response
+
+
+def with_model_code(query, model_code):
+    """이미지 검색 결과 모델코드를 질문에 덧붙인다"""
+    if model_code == -1:
+        return f"{query} (모델코드: 확인불가)"
+    return f"{query} (모델코드: {model_code})"
+
+
+def history_is_empty(history, query):
+    """이전 대화 없이 현재 질문만 있는지 여부 (답변 캐시 사용 조건)"""
+    return not history or (len(history) == 1 and history[0].get("content") == query)
 
-    if image_path:
-        model_code = search_vector_db_image(image_path)
-        if model_code == -1:
-            query = f"{query} (모델코드: 확인불가)"
-        else:
-            query = f"{query} (모델코드: {model_code})"
-
-    llm = ChatOpenAI(model=MODEL_NAME, temperature=0.3)
-
-    cot_prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """
-            Elaborate on the topic using a Tree of Thoughts and backtrack when necessary to construct a clear, cohesive Chain of Thought reasoning.
-            당신은 스마트한 가전 도우미입니다. 질문을 분석한 후에 관련 정보를 수집한 후, 체계적으로 답변하세요.:
-            ## 답변 지침
-            - 조건들을 나열하기보다는 통합하여 하나의 흐름으로 설명하십시오.
-            - 반복되거나 유사한 내용을 중복해서 설명하지 마십시오.
-            - 논리적 구조를 갖춘 명확한 문단 형태로 답변하십시오.
-            - 필요 시 예시나 유사 상황을 들어 이해를 도우십시오.
-
-            
-            예시 출력 :
-            
-       
-            - [체계적인 통합 설명을 한 문단 이상으로 기술]
-
-            ### 추가 안내
-            - [관련된 팁이나 참고 정보가 있으면 제공]
-            """,
-            ),
-            (
-                "human",
-                """
-            질문: {query}
-            분석: {analysis}
-            컨텍스트: {context}
-            """,
-            ),
-        ]
-    )
 
-    result = enhanced_chain(query, retriever, llm, cot_prompt, history=history)
-    return result.content
+def lookup_answer_cache(runtime, query, scope):
+    """유사 질문 캐시 조회 → (질문 임베딩, 캐시된 답변 또는 None)"""
+    try:
+        runtime.answer_cache.check_version(runtime.collection_version())
+        vector = runtime.embeddings.embed_query(query)
+        return vector, runtime.answer_cache.lookup(vector, scope)
+    except Exception as e:
+        logger.warning(f"[답변 캐시 조회 오류]: {e}")
+        return None, None
+
+
+async def alookup_answer_cache(runtime, query, scope):
+    """lookup_answer_cache의 비동기 버전"""
+    try:
+        runtime.answer_cache.check_version(runtime.collection_version())
+        vector = await runtime.embeddings.aembed_query(query)
+        return vector, runtime.answer_cache.lookup(vector, scope)
+    except Exception as e:
+        logger.warning(f"[답변 캐시 조회 오류]: {e}")
+        return None, None
+
+
+def run_chatbot(query, image_path=None, history=[], trace=None):
+    # trace를 넘기면 단계별 소요 시간/토큰 수를 거기에 기록
+    with activate(trace):
+        # 워커 공용 런타임 (Chroma/LLM/프롬프트/웹 검색 도구 재사용)
+        runtime = get_runtime()
+        use_cache = runtime.answer_cache is not None and history_is_empty(history, query)
+
+        model_code = None
+        if image_path:
+            with span("image_lookup"):
+                model_code = search_vector_db_image(image_path)
+            query = with_model_code(query, model_code)
+
+        vector = None
+        if use_cache:
+            with span("cache_lookup"):
+                vector, cached = lookup_answer_cache(runtime, query, model_code)
+            if cached is not None:
+                return cached
+
+        result = enhanced_chain(
+            query,
+            runtime.retriever,
+            runtime.llm,
+            runtime.cot_prompt,
+            history=history,
+            tavily_tool=runtime.tavily_tool,
+            analysis_chain=runtime.analysis_chain,
+            executor=runtime.executor,
+            speculative=runtime.speculative,
+            time_budget=runtime.time_budget,
+        )
+        if vector is not None:
+            runtime.answer_cache.store(vector, model_code, result.content)
+        return result.content
+
+
+async def arun_chatbot(query, image_path=None, history=[], trace=None):
+    """run_chatbot의 비동기 버전 (ASGI 뷰에서 사용)"""
+    with activate(trace):
+        runtime = await aget_runtime()
+        use_cache = runtime.answer_cache is not None and history_is_empty(history, query)
+
+        model_code = None
+        if image_path:
+            with span("image_lookup"):
+                model_code = await asyncio.to_thread(search_vector_db_image, image_path)
+            query = with_model_code(query, model_code)
+
+        vector = None
+        if use_cache:
+            with span("cache_lookup"):
+                vector, cached = await alookup_answer_cache(runtime, query, model_code)
+            if cached is not None:
+                return cached
+
+        result = await aenhanced_chain(
+            query,
+            runtime.retriever,
+            runtime.llm,
+            runtime.cot_prompt,
+            history=history,
+            tavily_tool=runtime.tavily_tool,
+            analysis_chain=runtime.analysis_chain,
+            speculative=runtime.speculative,
+            time_budget=runtime.time_budget,
+        )
+        if vector is not None:
+            runtime.answer_cache.store(vector, model_code, result.content)
+        return result.content
+
+
+async def astream_chatbot(query, image_path=None, history=[], trace=None):
+    """검색 진행 상태와 답변 토큰을 순서대로 내보내는 스트리밍 버전
+
+    {"type": "status", "stage": ...} 이벤트 뒤에 {"type": "token", "content": ...}
+    이벤트가 이어진다.
+    """
+    with activate(trace):
+        runtime = await aget_runtime()
+        use_cache = runtime.answer_cache is not None and history_is_empty(history, query)
+
+        yield {"type": "status", "stage": "retrieval"}
+
+        model_code = None
+        if image_path:
+            with span("image_lookup"):
+                model_code = await asyncio.to_thread(search_vector_db_image, image_path)
+            query = with_model_code(query, model_code)
+
+        vector = None
+        if use_cache:
+            with span("cache_lookup"):
+                vector, cached = await alookup_answer_cache(runtime, query, model_code)
+            if cached is not None:
+                yield {"type": "status", "stage": "cache"}
+                yield {"type": "token", "content": cached}
+                return
+
+        context, analysis = await analyze_query_and_retrieve_async(
+            query,
+            runtime.retriever,
+            runtime.llm,
+            runtime.tavily_tool,
+            analysis_chain=runtime.analysis_chain,
+            speculative=runtime.speculative,
+            time_budget=runtime.time_budget,
+        )
+        context, context_text, context_stats = prepare_context(query, context, analysis)
+
+        yield {
+            "type": "status",
+            "stage": "generation",
+            "context_count": len(context),
+            "context_tokens": context_stats["tokens"],
+            "tokens_saved": context_stats["tokens_saved"],
+        }
+
+        messages = build_messages(query, context_text, analysis, runtime.cot_prompt, history)
+        tokens = []
+        usage = None
+        with span("generation"):
+            async for chunk in runtime.llm.astream(messages):
+                if chunk.usage_metadata:
+                    usage = chunk.usage_metadata
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+        record_usage(messages, "".join(tokens), usage)
+
+        if vector is not None:
+            runtime.answer_cache.store(vector, model_code, "".join(tokens))
@@ -1,18 +1,29 @@
 import os
+import uuid
+import hashlib
 import logging
+import threading
 from tqdm import tqdm
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from dataclasses import dataclass
 from langchain_chroma.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from chatbot.utils import image_to_base64, summarize_image
+from chatbot.providers import get_embeddings
+from chatbot.ingestion import ExtractionFailed, IndexManifest, IngestionPipeline
+from chatbot.image_search import ImageCatalog
+from chatbot.vector_index import VectorIndex
+from chatbot.conf import IMAGE_DISTANCE_THRESHOLD, IMAGE_INDEX_IN_MEMORY
 from dotenv import load_dotenv
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# 이미지 레코드 생성 방식이 바뀌면 버전을 올려서 전체 재인덱싱
+IMAGE_CHUNKER_VERSION = "img-b64-800-v1"
+
 
 @dataclass
 class IndexConfig:
@@ -33,11 +44,32 @@ class IndexConfig:
 class RAGIndexer:
     """RAG 인덱서 클래스"""
 
-    def __init__(self, config: IndexConfig):
+    def __init__(self, config: IndexConfig, embeddings: Optional[Embeddings] = None):
         self.config = config
         self.logger = self._setup_logger()
-        self.embeddings = OpenAIEmbeddings(model=config.embedding_model)
+        # 임베딩 클라이언트를 넘겨받으면 재사용 (컬렉션 간 공유)
+        self.embeddings = embeddings or get_embeddings(config.embedding_model)
         self.vectordb = self._initialize_vectordb()
+        # 컬렉션에 인덱싱된 파일 목록 (Chroma 디렉토리에 함께 저장)
+        self.manifest = IndexManifest(
+            Path(config.persistent_directory or ".")
+            / f"{config.collection_name}_manifest.json"
+        )
+        # 로컬 이미지 식별용 특징 카탈로그 (index_images에서 생성)
+        self.catalog_path = (
+            Path(config.persistent_directory or ".")
+            / f"{config.collection_name}_features.npz"
+        )
+        # 인덱싱할 때마다 새 값을 쓰는 컬렉션 버전 파일 (메모리 인덱스/답변 캐시 무효화 기준)
+        self.version_path = (
+            Path(config.persistent_directory or ".")
+            / f"{config.collection_name}_version"
+        )
+        # 메모리 검색 인덱스 (워커 시작 시 RAGRuntime.load_image_index에서 생성, 컬렉션
+        # 버전이 바뀌면 교체)
+        self._vector_index: Optional[VectorIndex] = None
+        self._vector_index_version = None
+        self._refresh_lock = threading.Lock()
 
     def _setup_logger(self) -> logging.Logger:
         """로거 설정"""
@@ -107,25 +139,58 @@ class RAGIndexer:
             self.logger.error(f"Failed to process image {image_path}: {e}")
             return None
 
-    def _batch_add_to_vectordb(
-        self, processed_images: List[Dict[str, Any]], batch_size: int = 100
-    ) -> None:
-        """배치 단위로 벡터 데이터베이스에 추가"""
-        for i in range(0, len(processed_images), batch_size):
-            batch = processed_images[i : i + batch_size]
+    def _extract_images(self, image_files: List[Path]):
+        """이미지 처리 단계 (실패한 이미지는 (경로, ExtractionFailed)로 반환)"""
+        for image_path in tqdm(image_files, desc="Processing images"):
+            processed_image = self._process_single_image(image_path)
+            if processed_image is None:
+                yield str(image_path), ExtractionFailed(ValueError("image processing failed"))
+            else:
+                yield str(image_path), processed_image
+
+    def _image_records(self, source: str, processed_image: Dict[str, Any]):
+        """이미지 한 장 → 레코드 (경로 기반 고정 id)"""
+        yield {
+            "id": f"img_{hashlib.md5(source.encode()).hexdigest()}",
+            "text": processed_image["text"],
+            "metadata": processed_image["metadata"],
+        }
+
+    def _upsert_to_vectordb(self, vectors: List[Dict[str, Any]]) -> None:
+        """미리 계산한 임베딩으로 벡터 데이터베이스에 저장"""
+        try:
+            self.vectordb._collection.upsert(
+                ids=[vector["id"] for vector in vectors],
+                embeddings=[vector["values"] for vector in vectors],
+                metadatas=[vector["metadata"] for vector in vectors],
+                documents=[vector["text"] for vector in vectors],
+            )
+            self.logger.info(f"Upserted batch: {len(vectors)} items")
+        except Exception as e:
+            self.logger.error(f"Failed to upsert batch: {e}")
+            raise
 
-            texts = [item["text"] for item in batch]
-            metadatas = [item["metadata"] for item in batch]
+    def _delete_from_vectordb(self, ids: List[str]) -> None:
+        """벡터 데이터베이스에서 id 목록 삭제"""
+        self.vectordb._collection.delete(ids=ids)
+        self.logger.info(f"Deleted {len(ids)} stale items")
 
-            try:
-                self.vectordb.add_texts(texts=texts, metadatas=metadatas)
-                self.logger.info(f"Added batch {i//batch_size + 1}: {len(batch)} items")
-            except Exception as e:
-                self.logger.error(f"Failed to add batch {i//batch_size + 1}: {e}")
-                raise
+    def _delete_legacy_vectors(self) -> None:
+        """manifest 도입 전에 임의 id(uuid)로 저장된 벡터 삭제 (첫 증분 인덱싱 전 한 번)
+
+        경로 기반 id(img_...)로 다시 저장되므로 남겨두면 검색 결과가 중복된다.
+        """
+        ids = self.vectordb._collection.get(include=[])["ids"]
+        legacy_ids = [i for i in ids if not i.startswith("img_")]
+        for start in range(0, len(legacy_ids), 1000):
+            self._delete_from_vectordb(legacy_ids[start : start + 1000])
 
     def index_images(self, batch_size: int = 100) -> None:
-        """이미지 인덱싱 메인 메서드"""
+        """이미지 인덱싱 메인 메서드
+
+        이미지 처리 → 배치 임베딩 → 저장을 스트리밍으로 진행한다. manifest를 보고
+        새로 추가/변경된 이미지만 임베딩하고, 폴더에서 사라진 이미지의 벡터는 지운다.
+        """
         try:
             # 이미지 파일 목록 가져오기
             image_files = self._get_image_files()
@@ -134,50 +199,155 @@ class RAGIndexer:
                 self.logger.warning("No image files found")
                 return
 
-            # 이미지 처리
-            processed_images = []
-            self.logger.info("Processing images...")
+            pipeline = IngestionPipeline(
+                self.embeddings,
+                extract=self._extract_images,
+                chunk=self._image_records,
+                upsert=self._upsert_to_vectordb,
+                delete=self._delete_from_vectordb,
+                manifest=self.manifest,
+                chunker_version=IMAGE_CHUNKER_VERSION,
+                batch_size=batch_size,
+            )
 
-            for image_path in tqdm(image_files, desc="Processing images"):
-                processed_image = self._process_single_image(image_path)
-                if processed_image:
-                    processed_images.append(processed_image)
+            if not self.manifest.entries:
+                self._delete_legacy_vectors()
+
+            self.logger.info("Processing images...")
+            # image_files는 폴더 전체 목록이므로 사라진 이미지의 벡터도 정리
+            stats = pipeline.run(image_files, prune=True)
+            if stats["vectors"] or stats["deleted"]:
+                self.mark_updated()
+            self.build_image_catalog(image_files)
+            if IMAGE_INDEX_IN_MEMORY:
+                self.refresh_vector_index()
 
             # 성공적으로 처리된 이미지 수 로그
             self.logger.info(
-                f"Successfully processed {len(processed_images)}/{len(image_files)} images"
+                f"Successfully indexed {stats['vectors']}/{len(image_files)} images "
+                f"({stats['skipped']} unchanged, {stats['deleted']} stale vectors deleted)"
             )
 
-            # 벡터 데이터베이스에 배치 저장
-            if processed_images:
-                self.logger.info("Adding to vector database...")
-                self._batch_add_to_vectordb(processed_images, batch_size)
-                self.logger.info("Indexing completed successfully")
+            if stats["failed"]:
+                self.logger.warning(
+                    f"{len(stats['failed'])} images failed, re-run to resume"
+                )
             else:
-                self.logger.warning("No images were successfully processed")
+                self.logger.info("Indexing completed successfully")
 
         except Exception as e:
             self.logger.error(f"Indexing failed: {e}")
             raise
 
-    def search_and_show(self, user_img: str, k: int = 1) -> str:
-        """쿼리로 검색하고 결과 표시"""
-
-        # base64 길이 800으로 제한
-        user_img = user_img[:800]
+    def build_image_catalog(self, image_files: Optional[List[Path]] = None) -> ImageCatalog:
+        """로컬 이미지 식별용 특징 카탈로그 생성 후 저장"""
+        if image_files is None:
+            image_files = self._get_image_files()
+        catalog = ImageCatalog.build(image_files)
+        catalog.save(self.catalog_path)
+        self.logger.info(f"Image catalog saved: {len(catalog)} images -> {self.catalog_path}")
+        return catalog
 
-        # 유사도 검색
-        results = self.vectordb.similarity_search_with_score(user_img, k=k)
+    def index_version(self) -> Optional[str]:
+        """컬렉션 버전 (mark_updated가 기록한 값, 기록이 없으면 None)"""
+        try:
+            return self.version_path.read_text(encoding="utf-8").strip() or None
+        except OSError:
+            return None
 
-        if not results:
+    def mark_updated(self) -> str:
+        """컬렉션 내용이 바뀌었음을 새 버전으로 기록
+
+        실행 중인 서버는 버전이 바뀌면 메모리 인덱스와 답변 캐시를 새로 만든다.
+        이 인덱서 밖에서 컬렉션을 다시 만들었으면 직접 호출한다.
+        """
+        version = uuid.uuid4().hex
+        self.version_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.version_path.with_suffix(".tmp")
+        tmp_path.write_text(version, encoding="utf-8")
+        os.replace(tmp_path, self.version_path)
+        return version
+
+    def refresh_vector_index(self) -> VectorIndex:
+        """컬렉션 임베딩으로 메모리 인덱스를 새로 만들어 교체
+
+        새 인덱스를 다 만든 뒤에 참조만 바꾸므로 그동안의 검색은 기존 인덱스로 응답한다.
+        """
+        version = self.index_version()
+        index = VectorIndex.from_collection(self.vectordb._collection)
+        self._vector_index, self._vector_index_version = index, version
+        self.logger.info(f"In-memory index loaded: {len(index)} vectors")
+        return index
+
+    def _refresh_in_background(self) -> None:
+        # 이미 다른 스레드가 교체 중이면 기다리지 않고 기존 인덱스 사용
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh_vector_index()
+            except Exception as e:
+                self.logger.error(f"Failed to refresh in-memory index: {e}")
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name="vector-index-refresh", daemon=True).start()
+
+    def get_vector_index(self) -> VectorIndex:
+        """메모리 인덱스 반환 (처음이면 생성, 컬렉션 버전이 바뀌었으면 백그라운드로 교체)"""
+        index = self._vector_index
+        if index is None:
+            with self._refresh_lock:
+                if self._vector_index is None:
+                    self.refresh_vector_index()
+            return self._vector_index
+        if self.index_version() != self._vector_index_version:
+            self._refresh_in_background()
+        return index
+
+    def _match_model_name(self, matches, threshold: float):
+        if not matches:
             return -1
-
-        doc, score = results[0]
-        if score <= 0.3:
-            return doc.metadata.get("model_name", -1)
+        doc_metadata, score = matches[0]
+        if score <= threshold:
+            return doc_metadata.get("model_name", -1)
         else:
             return -1
 
+    def search_and_show(
+        self, user_img: str, k: int = 1, threshold: float = IMAGE_DISTANCE_THRESHOLD
+    ) -> str:
+        """쿼리로 검색하고 결과 표시"""
+        return self.search_and_show_batch([user_img], k=k, threshold=threshold)[0]
+
+    def search_and_show_batch(
+        self, user_imgs: List[str], k: int = 1, threshold: float = IMAGE_DISTANCE_THRESHOLD
+    ) -> List[str]:
+        """여러 이미지를 한 번에 검색 (이미지마다 모델명, 없으면 -1)"""
+
+        # base64 길이 800으로 제한
+        user_imgs = [user_img[:800] for user_img in user_imgs]
+
+        if not IMAGE_INDEX_IN_MEMORY:
+            # 유사도 검색
+            results = [
+                [
+                    (doc.metadata, score)
+                    for doc, score in self.vectordb.similarity_search_with_score(user_img, k=k)
+                ]
+                for user_img in user_imgs
+            ]
+        else:
+            # 질의 임베딩은 한 번에 요청하고 거리 계산은 행렬 곱 한 번
+            queries = self.embeddings.embed_documents(user_imgs)
+            results = [
+                [(match.metadata, match.distance) for match in matches]
+                for matches in self.get_vector_index().search_batch(queries, k=k)
+            ]
+
+        return [self._match_model_name(matches, threshold) for matches in results]
+
     def get_collection_info(self) -> Dict[str, Any]:
         """컬렉션 정보 조회"""
         try:
@@ -195,6 +365,10 @@ class RAGIndexer:
         """컬렉션 초기화"""
         try:
             self.vectordb._collection.delete()
+            # 컬렉션을 비웠으니 다음 인덱싱은 전체 재인덱싱
+            self.manifest.clear()
+            self._vector_index = None
+            self.mark_updated()
             self.logger.info("Collection cleared successfully")
         except Exception as e:
             self.logger.error(f"Failed to clear collection: {e}")
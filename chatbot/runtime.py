@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.output_parsers import StrOutputParser
+from .rag_indexer_class import IndexConfig, RAGIndexer
+from .prompts import create_analysis_prompt, create_cot_prompt, create_summary_prompt
+from .answer_cache import SemanticAnswerCache
+from .providers import get_embeddings, get_llm, get_web_search
+from .image_search import CatalogFile
+from .conf import (
+    MODEL_NAME,
+    SPECULATIVE_RETRIEVAL,
+    RETRIEVAL_TIME_BUDGET,
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL,
+    ANSWER_CACHE_SIZE,
+    IMAGE_SEARCH_BACKEND,
+    IMAGE_INDEX_IN_MEMORY,
+)
+
+EMBEDDINGS_MODEL = "text-embedding-3-small"
+VECTOR_DB_DIR = "./chroma"
+MANUALS_COLLECTION = "manuals"
+IMAGES_COLLECTION = "imgs"
+
+logger = logging.getLogger(__name__)
+
+
+class RAGRuntime:
+    """워커 프로세스 단위로 한 번만 생성해서 모든 요청이 공유하는 RAG 실행 객체
+
+    Chroma 클라이언트, 임베딩/LLM 클라이언트, 프롬프트 템플릿, 웹 검색 도구를
+    요청마다 새로 만들지 않고 여기서 보관한다. 각 클라이언트는 providers 설정
+    (LLM_BACKEND 등)에 따라 실제 API 또는 오프라인 구현으로 만들어진다.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, embeddings=None, llm=None, tavily_tool=None):
+        """embeddings/llm/tavily_tool을 넘기면 기본 클라이언트 대신 사용 (오프라인 벤치마크 등)"""
+        self.speculative = SPECULATIVE_RETRIEVAL
+        self.time_budget = RETRIEVAL_TIME_BUDGET or None
+
+        self.embeddings = embeddings or get_embeddings(EMBEDDINGS_MODEL)
+
+        self.manuals_indexer = RAGIndexer(
+            IndexConfig(
+                persistent_directory=VECTOR_DB_DIR,
+                collection_name=MANUALS_COLLECTION,
+                embedding_model=EMBEDDINGS_MODEL,
+            ),
+            embeddings=self.embeddings,
+        )
+        self.image_indexer = RAGIndexer(
+            IndexConfig(
+                persistent_directory=VECTOR_DB_DIR,
+                collection_name=IMAGES_COLLECTION,
+                embedding_model=EMBEDDINGS_MODEL,
+            ),
+            embeddings=self.embeddings,
+        )
+
+        # 로컬 이미지 카탈로그 (없으면 Chroma 검색으로 대체, 파일이 바뀌면 다시 로드)
+        self.catalog_file = None
+        if IMAGE_SEARCH_BACKEND == "local":
+            self.catalog_file = CatalogFile(self.image_indexer.catalog_path)
+            if self.catalog_file.get() is None:
+                logger.warning("Image catalog not found, falling back to Chroma image search")
+
+        self.retriever = self.manuals_indexer.vectordb.as_retriever(
+            search_type="mmr", search_kwargs={"k": 8, "fetch_k": 20}
+        )
+        # stream_usage: 스트리밍 응답에서도 토큰 사용량 수신
+        self.llm = llm or get_llm(model_name, temperature=0.3, stream_usage=True)
+        self.analysis_chain = create_analysis_prompt() | self.llm | StrOutputParser()
+        self.cot_prompt = create_cot_prompt()
+        self.summary_chain = create_summary_prompt() | self.llm | StrOutputParser()
+        self.tavily_tool = tavily_tool or get_web_search(max_results=5)
+
+        # 동기 경로(run_chatbot)에서 invoke를 돌릴 공용 스레드풀
+        self.executor = ThreadPoolExecutor(thread_name_prefix="rag")
+
+        self.answer_cache = None
+        if ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                threshold=ANSWER_CACHE_THRESHOLD,
+                ttl=ANSWER_CACHE_TTL,
+                max_entries=ANSWER_CACHE_SIZE,
+            )
+
+    @property
+    def image_catalog(self):
+        """현재 로컬 이미지 카탈로그 (IMAGE_SEARCH_BACKEND가 local이 아니거나 없으면 None)"""
+        return self.catalog_file.get() if self.catalog_file else None
+
+    def load_image_index(self) -> None:
+        """이미지 검색용 메모리 인덱스를 미리 생성 (첫 이미지 요청이 로드 비용을 내지 않게)
+
+        로컬 이미지 카탈로그로 식별할 때는 쓰지 않으므로 만들지 않는다.
+        """
+        if IMAGE_INDEX_IN_MEMORY and self.image_catalog is None:
+            self.image_indexer.get_vector_index()
+
+    def collection_version(self):
+        """manuals 컬렉션 버전 (인덱서가 mark_updated로 기록, 바뀌면 답변 캐시 무효화)"""
+        return self.manuals_indexer.index_version()
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+# 현재 컨텍스트(이벤트 루프)에서만 쓰는 RAGRuntime (use_runtime으로 지정)
+_context_runtime: ContextVar[Optional[RAGRuntime]] = ContextVar("rag_runtime", default=None)
+
+
+def get_runtime() -> RAGRuntime:
+    """현재 프로세스의 RAGRuntime 반환 (최초 호출 시 생성)
+
+    use_runtime으로 현재 컨텍스트의 런타임을 지정했으면 그것을 반환한다.
+    """
+    runtime = _context_runtime.get()
+    if runtime is not None:
+        return runtime
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = RAGRuntime()
+    return _runtime
+
+
+async def aget_runtime() -> RAGRuntime:
+    """get_runtime의 비동기 버전
+
+    클라이언트 생성(Chroma 로드 등)은 블로킹이므로, 런타임이 아직 없으면 스레드에서
+    만들어서 이벤트 루프를 막지 않는다. 이미 있으면 바로 반환한다.
+    """
+    runtime = _context_runtime.get() or _runtime
+    if runtime is not None:
+        return runtime
+    return await asyncio.to_thread(get_runtime)
+
+
+def set_runtime(runtime: RAGRuntime) -> None:
+    """현재 프로세스의 RAGRuntime 교체 (벤치마크 등에서 직접 만든 런타임 사용)"""
+    global _runtime
+    with _runtime_lock:
+        _runtime = runtime
+
+
+def use_runtime(runtime: RAGRuntime) -> None:
+    """현재 컨텍스트와 여기서 만드는 태스크에서 쓸 RAGRuntime 지정
+
+    async 클라이언트의 커넥션 풀은 만든 이벤트 루프에 묶이므로, 웹 서버와 다른
+    이벤트 루프에서 도는 작업 워커는 자기 런타임을 따로 만들어서 지정한다.
+    """
+    _context_runtime.set(runtime)
+
+
+def reset_runtime() -> None:
+    """RAGRuntime 폐기 (다음 get_runtime 호출 시 재생성)"""
+    global _runtime
+    with _runtime_lock:
+        _runtime = None
+
+
+def warmup() -> None:
+    """워커 시작 시 RAGRuntime과 이미지 검색 인덱스를 미리 생성 (실패해도 서버 기동은 계속)"""
+    try:
+        get_runtime().load_image_index()
+        logger.info("RAG runtime warmed up")
+    except Exception as e:
+        logger.warning(f"RAG runtime warmup failed: {e}")
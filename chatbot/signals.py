@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_user_lists
+from .models import Conversation, Message
+
+
+@receiver([post_save, post_delete], sender=Conversation)
+def conversation_changed(sender, instance, **kwargs):
+    invalidate_user_lists(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Message)
+def message_changed(sender, instance, **kwargs):
+    # 대화가 이미 로드돼 있으면 추가 조회 없이, 아니면 user_id만 조회
+    # (질문/답변 저장은 save_exchange가 bulk_create 후 한 번만 무효화)
+    if Message.conversation.is_cached(instance):
+        user_id = instance.conversation.user_id
+    else:
+        user_id = (
+            Conversation.objects.filter(pk=instance.conversation_id)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+    # 대화와 함께 삭제된 메시지는 conversation_changed에서 무효화
+    if user_id is not None:
+        invalidate_user_lists(user_id)
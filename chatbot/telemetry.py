@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import uuid
+import bisect
+import socket
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .conf import METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+# 단계별 소요 시간 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape_label(value: str) -> str:
+    """Prometheus 텍스트 형식의 라벨 값 이스케이프 (\\, ", 줄바꿈)"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _merge(snapshots: Iterable[Dict[str, object]], add) -> Dict[Tuple, object]:
+    """프로세스별 스냅샷(라벨 값 JSON → 값)을 라벨 값별로 합침"""
+    merged: Dict[Tuple, object] = {}
+    for snapshot in snapshots:
+        for labels, value in snapshot.items():
+            key = tuple(json.loads(labels))
+            merged[key] = add(merged[key], value) if key in merged else value
+    return merged
+
+
+class Histogram:
+    """Prometheus 텍스트 형식으로 내보내는 히스토그램 (프로세스별 값을 합쳐서 출력)"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # 라벨 값 → [버킷별 개수..., +Inf 개수], 합계
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        """라벨 값(JSON) → [버킷별 개수..., +Inf 개수, 합계]"""
+        with self._lock:
+            return {
+                json.dumps(key): counts + [self._sums[key]]
+                for key, counts in self._counts.items()
+            }
+
+    def render(self, snapshots: Iterable[Dict[str, List[float]]]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        merged = _merge(snapshots, lambda a, b: [x + y for x, y in zip(a, b)])
+        for key, values in sorted(merged.items()):
+            counts, total_sum = values[:-1], values[-1]
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            total = cumulative + counts[-1]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {total}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total_sum}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class Counter:
+    """Prometheus 텍스트 형식으로 내보내는 카운터 (프로세스별 값을 합쳐서 출력)"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        """라벨 값(JSON) → 값"""
+        with self._lock:
+            return {json.dumps(key): value for key, value in self._values.items()}
+
+    def render(self, snapshots: Iterable[Dict[str, float]]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        merged = _merge(snapshots, lambda a, b: a + b)
+        for key, value in sorted(merged.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "RAG pipeline stage latency", ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "rag_request_duration_seconds", "End-to-end chatbot request latency", ["endpoint"]
+)
+TOKENS = Counter("rag_tokens_total", "Tokens sent to / received from the LLM", ["kind"])
+ANSWER_CACHE_LOOKUPS = Counter(
+    "rag_answer_cache_lookups_total", "Semantic answer cache lookups", ["result"]
+)
+
+METRICS = [STAGE_SECONDS, REQUEST_SECONDS, TOKENS, ANSWER_CACHE_LOOKUPS]
+
+
+def _snapshot_path() -> Path:
+    # 작업 워커 컨테이너와 디렉터리를 같이 쓰므로 호스트 이름까지 붙여서 구분
+    return Path(METRICS_DIR) / f"metrics_{socket.gethostname()}_{os.getpid()}.json"
+
+
+def clear_metrics(host: Optional[str] = None) -> None:
+    """METRICS_DIR의 프로세스별 지표 파일 삭제 (host를 주면 그 호스트의 파일만)
+
+    종료된 프로세스의 파일도 /metrics에 계속 합산되므로 서버/작업 워커가 시작할 때
+    이전 실행의 파일을 지운다. 실행 중인 프로세스의 파일은 다음 기록 때 누적값 전체로
+    다시 생기므로 지워도 잠깐 빠질 뿐이다.
+    """
+    if not METRICS_DIR:
+        return
+    pattern = f"metrics_{host}_*" if host else "metrics_*"
+    for path in Path(METRICS_DIR).glob(pattern):
+        try:
+            path.unlink()
+        except OSError:
+            continue
+
+
+def flush_metrics() -> None:
+    """현재 프로세스의 지표를 METRICS_DIR에 기록 (원자적으로 교체)"""
+    if not METRICS_DIR:
+        return
+    path = _snapshot_path()
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(
+            json.dumps({metric.name: metric.snapshot() for metric in METRICS}),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write metrics to {path}: {e}")
+
+
+def _flush_periodically() -> None:
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        flush_metrics()
+
+
+def _start_flusher() -> None:
+    if METRICS_DIR:
+        threading.Thread(target=_flush_periodically, name="metrics-flusher", daemon=True).start()
+
+
+_start_flusher()
+# gunicorn 워커처럼 fork된 자식 프로세스에서도 자기 지표를 기록
+os.register_at_fork(after_in_child=_start_flusher)
+
+
+def _load_snapshots() -> List[Dict[str, Dict]]:
+    """METRICS_DIR의 프로세스별 지표 (시작 후 종료된 프로세스의 누적값 포함)"""
+    if not METRICS_DIR:
+        return [{metric.name: metric.snapshot() for metric in METRICS}]
+    flush_metrics()
+    snapshots = []
+    for path in Path(METRICS_DIR).glob("metrics_*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            # 다른 프로세스가 쓰는 중이거나 지워진 파일
+            continue
+    return snapshots
+
+
+def render_metrics() -> str:
+    """/metrics 응답 본문 (METRICS_DIR가 있으면 그 디렉터리에 기록한 모든 프로세스의 합)"""
+    snapshots = _load_snapshots()
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render(snapshot.get(metric.name, {}) for snapshot in snapshots))
+    return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """요청 하나의 단계별 소요 시간(span)과 토큰 수"""
+
+    def __init__(self, endpoint: str = ""):
+        self.trace_id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.tokens: Dict[str, int] = {}
+        # 단계 결과 요약 (사용한 컨텍스트 출처 등)
+        self.annotations: Dict[str, object] = {}
+        self._finished = False
+
+    def add_span(self, stage: str, start: float, duration: float, **attrs) -> None:
+        self.spans.append(
+            {
+                "stage": stage,
+                "start_ms": round((start - self.started) * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+                **attrs,
+            }
+        )
+
+    def add_tokens(self, kind: str, count: int) -> None:
+        self.tokens[kind] = self.tokens.get(kind, 0) + count
+        TOKENS.inc(count, kind=kind)
+
+    def summary(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "endpoint": self.endpoint,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "spans": self.spans,
+            "tokens": self.tokens,
+            "annotations": self.annotations,
+        }
+
+    def finish(self) -> Dict:
+        """요청 전체 소요 시간 기록 + 로그 (한 번만)"""
+        summary = self.summary()
+        if not self._finished:
+            self._finished = True
+            REQUEST_SECONDS.observe(summary["duration_ms"] / 1000, endpoint=self.endpoint)
+            logger.info(json.dumps(summary, ensure_ascii=False))
+        return summary
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("rag_trace", default=None)
+
+
+@contextmanager
+def activate(trace: Optional[Trace]):
+    """블록 안에서 현재 컨텍스트(요청)의 trace 지정, 끝나면 이전 값으로 되돌림
+
+    블록 안에서 만든 asyncio 태스크/asyncio.run에는 그대로 전달된다. None이면
+    블록 안의 단계는 어떤 trace에도 기록하지 않는다.
+    """
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # 다른 컨텍스트에서 닫힌 비동기 제너레이터 (그 컨텍스트는 이미 끝남)
+            pass
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """단계 소요 시간 측정 (히스토그램 + 현재 trace에 기록)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, start, duration, **attrs)
+
+
+def annotate(key: str, value) -> None:
+    """현재 trace에 단계 결과 요약 기록"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotations[key] = value
+
+
+def record_tokens(kind: str, count: int) -> None:
+    """현재 trace에 토큰 수 기록 (trace가 없으면 카운터만)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_tokens(kind, count)
+    else:
+        TOKENS.inc(count, kind=kind)
@@ -0,0 +1,70 @@
+from unittest import mock
+from django.test import SimpleTestCase
+from chatbot.answer_cache import SemanticAnswerCache
+
+FILTER = [1.0, 0.0, 0.0]
+FILTER_AGAIN = [0.99, 0.05, 0.0]
+FILTER_NEAR = [0.95, 0.3, 0.0]
+NOISE = [0.0, 1.0, 0.0]
+POWER = [0.0, 0.0, 1.0]
+
+
+class SemanticAnswerCacheTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("chatbot.answer_cache.time.monotonic", return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_similar_question_in_same_scope_hits(self):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store(FILTER, "M-100", "필터는 한 달에 한 번 씻어 주세요.")
+
+        self.assertEqual(cache.lookup(FILTER_AGAIN, "M-100"), "필터는 한 달에 한 번 씻어 주세요.")
+        self.assertIsNone(cache.lookup(NOISE, "M-100"))
+        # 모델코드가 다르면 같은 질문이어도 다른 답변
+        self.assertIsNone(cache.lookup(FILTER, "M-200"))
+
+    def test_entries_expire_after_ttl(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+        cache.store(FILTER, None, "답변")
+
+        self.clock.return_value = 1059.0
+        self.assertEqual(cache.lookup(FILTER, None), "답변")
+        self.clock.return_value = 1060.0
+        self.assertIsNone(cache.lookup(FILTER, None))
+        self.assertEqual(len(cache._entries), 0)
+
+    def test_expired_nearest_entry_falls_back_to_next_candidate(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+        cache.store(FILTER, None, "가장 가까운 질문의 답변")
+        self.clock.return_value = 1030.0
+        cache.store(FILTER_NEAR, None, "조금 먼 질문의 답변")
+
+        self.assertEqual(cache.lookup(FILTER, None), "가장 가까운 질문의 답변")
+        # 가장 가까운 항목이 만료되면 threshold를 넘는 다음 후보의 답변
+        self.clock.return_value = 1070.0
+        self.assertEqual(cache.lookup(FILTER, None), "조금 먼 질문의 답변")
+        self.clock.return_value = 1100.0
+        self.assertIsNone(cache.lookup(FILTER, None))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SemanticAnswerCache(threshold=0.9, max_entries=2)
+        cache.store(FILTER, None, "필터")
+        cache.store(NOISE, None, "소음")
+        # 필터 답변을 최근에 사용했으므로 소음 답변이 먼저 밀려남
+        cache.lookup(FILTER, None)
+        cache.store(POWER, None, "전원")
+
+        self.assertEqual(cache.lookup(FILTER, None), "필터")
+        self.assertIsNone(cache.lookup(NOISE, None))
+        self.assertEqual(cache.lookup(POWER, None), "전원")
+
+    def test_collection_version_change_clears_cache(self):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.check_version("v1")
+        cache.store(FILTER, None, "이전 답변")
+
+        cache.check_version("v1")
+        self.assertEqual(cache.lookup(FILTER, None), "이전 답변")
+        cache.check_version("v2")
+        self.assertIsNone(cache.lookup(FILTER, None))
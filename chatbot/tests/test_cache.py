@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from chatbot.cache import invalidate_user_lists, list_cache_key
+from chatbot.models import Conversation, Message
+
+
+@override_settings(CONVERSATION_CACHE_TTL=60)
+class ListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("cached", password="pw")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_invalidate_changes_key(self):
+        key = list_cache_key(self.user.id, "conversations", None, 30)
+        self.assertEqual(list_cache_key(self.user.id, "conversations", None, 30), key)
+        invalidate_user_lists(self.user.id)
+        self.assertNotEqual(list_cache_key(self.user.id, "conversations", None, 30), key)
+
+    @override_settings(CONVERSATION_CACHE_TTL=0)
+    def test_disabled_without_ttl(self):
+        self.assertIsNone(list_cache_key(self.user.id, "conversations", None, 30))
+
+    def test_saving_invalidates_cached_lists(self):
+        conversation = Conversation.objects.create(user=self.user, title="첫 대화")
+        self.assertEqual(self.client.get("/api/conversations/").json()["total"], 1)
+
+        Conversation.objects.create(user=self.user, title="두 번째 대화")
+        self.assertEqual(self.client.get("/api/conversations/").json()["total"], 2)
+
+        url = f"/api/conversations/{conversation.id}/messages/"
+        self.assertEqual(self.client.get(url).json()["messages"], [])
+        Message.objects.create(conversation=conversation, role="user", content="안녕하세요")
+        self.assertEqual(len(self.client.get(url).json()["messages"]), 1)
+
+    def test_message_signal_skips_lookup_when_conversation_is_loaded(self):
+        conversation = Conversation.objects.create(user=self.user)
+        key = list_cache_key(self.user.id, "conversations", None, 30)
+        # INSERT 한 번만 (대화의 user_id를 다시 조회하지 않음)
+        with self.assertNumQueries(1):
+            Message.objects.create(conversation=conversation, role="user", content="질문")
+        self.assertNotEqual(list_cache_key(self.user.id, "conversations", None, 30), key)
+
+        message = Message.objects.get(conversation=conversation)
+        key = list_cache_key(self.user.id, "conversations", None, 30)
+        # UPDATE + user_id 조회 (대화 전체를 읽지 않음)
+        with CaptureQueriesContext(connection) as queries:
+            message.save()
+        self.assertEqual(len(queries), 2)
+        self.assertIn('SELECT "chatbot_conversation"."user_id"', queries[1]["sql"])
+        self.assertNotEqual(list_cache_key(self.user.id, "conversations", None, 30), key)
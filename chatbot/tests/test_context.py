@@ -0,0 +1,137 @@
+from django.test import SimpleTestCase
+from langchain_core.documents import Document
+from chatbot.context import (
+    CONTEXT_DOC_MAX_CHARS,
+    analysis_keywords,
+    assemble_context,
+    dedupe_documents,
+    format_context,
+    pack_documents,
+    rerank_documents,
+)
+from chatbot.tokens import estimate_tokens
+
+
+def doc(text, source="manual.pdf", **metadata):
+    return Document(page_content=text, metadata={"source": source, **metadata})
+
+
+class DedupeTests(SimpleTestCase):
+    def test_whitespace_and_case_differences_are_duplicates(self):
+        first = doc("Filter cleaning:\n  rinse the filter", page=3)
+        docs = [first, doc("filter CLEANING: rinse the   filter", page=4)]
+        self.assertEqual(dedupe_documents(docs), [first])
+
+    def test_same_text_from_another_source_is_kept(self):
+        docs = [doc("Reset the timer"), doc("Reset the timer", source="https://example.com")]
+        self.assertEqual(len(dedupe_documents(docs)), 2)
+
+
+class RerankTests(SimpleTestCase):
+    def test_matching_document_ranks_first(self):
+        docs = [
+            doc("Installation requires two people and a level floor."),
+            doc("If the dryer shows error code E21, clean the lint filter."),
+            doc("The warranty covers parts for one year."),
+        ]
+        scored = rerank_documents("dryer error E21", docs)
+        self.assertIs(scored[0][1], docs[1])
+        self.assertGreater(scored[0][0], scored[1][0])
+
+    def test_analysis_keywords_boost_documents(self):
+        docs = [doc("Clean the lint filter after each load."), doc("Check the drain hose.")]
+        keywords = analysis_keywords('{"keywords": ["drain", "hose"], "main_topic": "배수"}')
+        self.assertEqual(keywords, ["drain", "hose", "배수"])
+        self.assertIs(rerank_documents("세탁기 문제", docs, keywords)[0][1], docs[1])
+
+    def test_ties_keep_retrieval_order(self):
+        docs = [doc("alpha"), doc("beta"), doc("gamma")]
+        self.assertEqual([d for _, d in rerank_documents("xyz", docs)], docs)
+
+    def test_invalid_analysis_has_no_keywords(self):
+        self.assertEqual(analysis_keywords("not json"), [])
+        self.assertEqual(analysis_keywords("[1, 2]"), [])
+
+
+class PackDocumentsTests(SimpleTestCase):
+    def scored(self, *sizes):
+        return [(float(-i), doc(f"doc{i} " + "x" * size)) for i, size in enumerate(sizes)]
+
+    def test_stays_within_budget_and_skips_oversized(self):
+        scored = self.scored(200, 400, 100)
+        packed = pack_documents(scored, token_budget=100)
+        # 두 번째 문서는 예산을 넘어서 건너뛰고 더 짧은 세 번째 문서를 넣음
+        self.assertEqual(packed, [scored[0][1], scored[2][1]])
+        self.assertLessEqual(sum(estimate_tokens(d.page_content) for d in packed), 100)
+
+    def test_top_document_is_always_included(self):
+        scored = self.scored(2000, 10)
+        # 예산을 넘는 첫 문서가 예산을 다 써서 다음 문서는 들어가지 않음
+        self.assertEqual(pack_documents(scored, token_budget=50), [scored[0][1]])
+
+    def test_zero_budget_means_no_limit(self):
+        scored = self.scored(400, 400, 400)
+        self.assertEqual(len(pack_documents(scored, token_budget=0)), 3)
+
+
+class AssembleContextTests(SimpleTestCase):
+    def test_dedupes_reranks_and_packs(self):
+        relevant = doc("Error E21 means the lint filter is blocked.")
+        docs = [
+            doc("The warranty covers parts for one year."),
+            relevant,
+            doc("error e21 means the lint  filter is blocked."),
+            doc("Unrelated text " * 100),
+        ]
+        context = assemble_context("E21 error", docs, token_budget=30)
+        self.assertEqual(context[0], relevant)
+        self.assertEqual(context.count(relevant), 1)
+        self.assertNotIn(docs[3], context)
+
+
+class FormatContextTests(SimpleTestCase):
+    def test_numbered_citation_blocks(self):
+        docs = [
+            doc("Clean the filter.", source="/data/manuals/WD-100.pdf", page=12),
+            doc("Reset guide", source="https://example.com/reset", title="Reset"),
+        ]
+        text, _ = format_context(docs)
+        self.assertEqual(
+            text,
+            "[1] WD-100.pdf | p.12\nClean the filter.\n\n"
+            "[2] Reset | https://example.com/reset\nReset guide",
+        )
+
+    def test_pdfminer_output_is_normalized_and_trimmed(self):
+        raw = "Error   E21\nmeans the filter\n\n\x0c(cid:12)is blocked.\n" + "word " * 400
+        text, _ = format_context([doc(raw)])
+        body = text.split("\n", 1)[1]
+        self.assertTrue(body.startswith("Error E21 means the filter\nis blocked. word"))
+        self.assertNotIn("(cid:", body)
+        self.assertLessEqual(len(body), CONTEXT_DOC_MAX_CHARS + 1)
+        self.assertTrue(body.endswith("word…"))
+
+    def test_reports_tokens_saved_against_document_repr(self):
+        docs = [
+            doc("Line one\n\n\nline   two " * 20, page=i, producer="pdfminer", total_pages=80)
+            for i in range(5)
+        ]
+        text, stats = format_context(docs)
+        repr_tokens = estimate_tokens(str(docs))
+        self.assertEqual(stats["documents"], 5)
+        self.assertEqual(stats["tokens"], estimate_tokens(text))
+        self.assertEqual(stats["tokens_saved"], repr_tokens - stats["tokens"])
+        self.assertLess(stats["tokens"], repr_tokens * 0.8)
+
+    def test_tokens_saved_counts_documents_dropped_before_formatting(self):
+        retrieved = [doc("Clean the filter monthly. " * 40, page=i) for i in range(6)]
+        retrieved.append(retrieved[0])
+        selected = assemble_context("filter", retrieved, token_budget=300)
+
+        text, stats = format_context(selected, retrieved=retrieved)
+
+        self.assertLess(len(selected), len(retrieved))
+        self.assertEqual(
+            stats["tokens_saved"], estimate_tokens(str(retrieved)) - estimate_tokens(text)
+        )
+        self.assertGreater(stats["tokens_saved"], format_context(selected)[1]["tokens_saved"])
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from chatbot.cache import invalidate_user_lists, list_cache_key
+from chatbot.conversations import message_count, save_exchange
+from chatbot.models import Conversation, Message
+
+
+def loaded(conversation):
+    """jobs._generate처럼 메시지 수를 annotate해서 다시 읽은 대화"""
+    return Conversation.objects.annotate(message_count=message_count()).get(pk=conversation.pk)
+
+
+def question(conversation, content, created_at=None):
+    return Message(
+        conversation=conversation,
+        role="user",
+        content=content,
+        created_at=created_at or timezone.now(),
+    )
+
+
+@override_settings(CONVERSATION_CACHE_TTL=60)
+class SaveExchangeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("exchanger", password="pw")
+
+    def setUp(self):
+        self.conversation = Conversation.objects.create(user=self.user)
+
+    def test_first_exchange_sets_title_and_bumps_updated_at(self):
+        before = Conversation.objects.get(pk=self.conversation.pk).updated_at
+        conversation = loaded(self.conversation)
+
+        assistant = save_exchange(conversation, question(conversation, "필터 " * 30), "답변")
+
+        saved = Conversation.objects.get(pk=conversation.pk)
+        self.assertEqual(saved.title, ("필터 " * 30)[:50] + "...")
+        self.assertGreater(saved.updated_at, before)
+        self.assertEqual(saved.updated_at, conversation.updated_at)
+        self.assertEqual((conversation.title, conversation.message_count), (saved.title, 2))
+        self.assertEqual(
+            list(saved.messages.order_by("created_at").values_list("role", "content")),
+            [("user", "필터 " * 30), ("assistant", "답변")],
+        )
+        self.assertIsNotNone(assistant.pk)
+
+    def test_later_exchange_keeps_title(self):
+        first = question(self.conversation, "첫 질문", timezone.now() - timedelta(minutes=1))
+        save_exchange(loaded(self.conversation), first, "첫 답변")
+
+        conversation = loaded(self.conversation)
+        save_exchange(conversation, question(conversation, "두 번째 질문"), "두 번째 답변")
+
+        self.assertEqual(Conversation.objects.get(pk=conversation.pk).title, "첫 질문")
+        self.assertEqual((conversation.title, conversation.message_count), ("첫 질문", 4))
+
+    def test_title_uses_question_time_not_save_order(self):
+        # 먼저 시작한 질문이 나중에 저장돼도 제목은 대화의 첫 질문
+        now = timezone.now()
+        save_exchange(loaded(self.conversation), question(self.conversation, "나중 질문", now), "답")
+        early = question(self.conversation, "먼저 질문", now - timedelta(minutes=1))
+        save_exchange(loaded(self.conversation), early, "답")
+
+        self.assertEqual(Conversation.objects.get(pk=self.conversation.pk).title, "먼저 질문")
+
+    def test_one_exchange_is_one_insert_and_one_update(self):
+        conversation = loaded(self.conversation)
+        user_msg = question(conversation, "질문")
+
+        # 테스트 트랜잭션 안이라 atomic은 SAVEPOINT/RELEASE로 실행됨
+        with self.assertNumQueries(4):
+            save_exchange(conversation, user_msg, "답변")
+
+    def test_invalidates_cached_lists_once(self):
+        key = list_cache_key(self.user.id, "conversations", None, 30)
+        conversation = loaded(self.conversation)
+
+        with mock.patch(
+            "chatbot.conversations.invalidate_user_lists", wraps=invalidate_user_lists
+        ) as invalidate:
+            save_exchange(conversation, question(conversation, "질문"), "답변")
+
+        invalidate.assert_called_once_with(self.user.id)
+        self.assertNotEqual(list_cache_key(self.user.id, "conversations", None, 30), key)
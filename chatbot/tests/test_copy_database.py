@@ -0,0 +1,79 @@
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import TransactionTestCase
+from chatbot.management.commands.copy_database import SOURCE_ALIAS, copy_order
+from chatbot.models import Conversation, GenerationJob, Message
+from skn4th.database import parse_database_url
+from uauth.models import UserDetail
+
+SEED_ALIAS = "copy_seed"
+
+
+class CopyDatabaseTests(TransactionTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.url = f"sqlite:///{Path(tmp.name) / 'source.sqlite3'}"
+        connections.settings[SEED_ALIAS] = connections.configure_settings(
+            {**settings.DATABASES, SEED_ALIAS: parse_database_url(self.url, settings.BASE_DIR)}
+        )[SEED_ALIAS]
+        # 원본 DB 연결(시드용, 명령이 여는 연결)을 이 테스트에서만 허용하고 끝나면 제거
+        patcher = mock.patch.object(
+            type(self), "databases", {"default", SEED_ALIAS, SOURCE_ALIAS}
+        )
+        patcher.start()
+        for alias in (SEED_ALIAS, SOURCE_ALIAS):
+            self.addCleanup(self.remove_connection, alias)
+        self.addCleanup(patcher.stop)
+        call_command("migrate", database=SEED_ALIAS, verbosity=0)
+        self.seed()
+
+    def remove_connection(self, alias):
+        if alias in connections.settings:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+    def seed(self):
+        user = User.objects.db_manager(SEED_ALIAS).create_user("copied", password="pw")
+        group = Group.objects.using(SEED_ALIAS).create(name="staff")
+        user.groups.add(group)
+        self.permission = Permission.objects.using(SEED_ALIAS).get(codename="view_conversation")
+        user.user_permissions.add(self.permission)
+        UserDetail.objects.using(SEED_ALIAS).create(user=user)
+        conversation = Conversation.objects.using(SEED_ALIAS).create(user=user, title="대화")
+        for role in ("user", "assistant"):
+            Message.objects.using(SEED_ALIAS).create(
+                conversation=conversation, role=role, content=role
+            )
+        GenerationJob.objects.using(SEED_ALIAS).create(conversation=conversation, question="질문")
+
+    def test_copies_every_table_with_ids(self):
+        call_command("copy_database", source=self.url, stdout=io.StringIO())
+
+        for model in copy_order():
+            self.assertEqual(
+                model._base_manager.count(),
+                model._base_manager.using(SEED_ALIAS).count(),
+                model._meta.label,
+            )
+        user = User.objects.get(username="copied")
+        self.assertTrue(UserDetail.objects.filter(user=user).exists())
+        # 권한은 원본 id 그대로라 사용자 권한이 같은 권한을 가리킴
+        self.assertEqual(
+            list(user.user_permissions.values_list("pk", "codename")),
+            [(self.permission.pk, "view_conversation")],
+        )
+        self.assertTrue(user.has_perm("chatbot.view_conversation"))
+
+    def test_refuses_non_empty_target(self):
+        User.objects.create_user("existing", password="pw")
+        with self.assertRaises(CommandError):
+            call_command("copy_database", source=self.url, stdout=io.StringIO())
@@ -0,0 +1,105 @@
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+from django.test import SimpleTestCase
+from langchain_core.embeddings import Embeddings
+from chatbot.embedding_cache import CachedEmbeddings, EmbeddingStore, embedding_key
+
+
+class CountingEmbeddings(Embeddings):
+    """텍스트 길이를 벡터로 돌려주고 모델에 보낸 텍스트를 기록하는 임베딩"""
+
+    def __init__(self):
+        self.sent = []
+
+    def embed_documents(self, texts):
+        self.sent.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class RecordingStore(EmbeddingStore):
+    """조회/저장이 실행된 스레드를 기록하는 EmbeddingStore"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def get_many(self, keys):
+        self.threads.append(threading.current_thread())
+        return super().get_many(keys)
+
+    def put_many(self, items):
+        self.threads.append(threading.current_thread())
+        super().put_many(items)
+
+
+class CachedEmbeddingsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = str(Path(tmp.name) / "embeddings.sqlite3")
+        self.model = CountingEmbeddings()
+
+    def cached(self, store=None, model="text-embedding-3-small"):
+        return CachedEmbeddings(self.model, model, store or EmbeddingStore(self.path))
+
+    def test_only_missing_texts_are_embedded(self):
+        embeddings = self.cached()
+        first = embeddings.embed_documents(["필터", "전원", "필터"])
+        self.assertEqual(self.model.sent, ["필터", "전원"])
+
+        second = embeddings.embed_documents(["전원", "소음"])
+        self.assertEqual(self.model.sent, ["필터", "전원", "소음"])
+        self.assertEqual(first, [[2.0, 1.0], [2.0, 1.0], [2.0, 1.0]])
+        self.assertEqual(second[0], first[1])
+
+    def test_query_and_documents_share_entries(self):
+        embeddings = self.cached()
+        embeddings.embed_documents(["필터 청소"])
+        self.assertEqual(embeddings.embed_query("필터 청소"), [5.0, 1.0])
+        self.assertEqual(self.model.sent, ["필터 청소"])
+
+    def test_vectors_persist_on_disk(self):
+        self.cached().embed_documents(["필터"])
+        # 새 프로세스처럼 메모리 캐시가 빈 저장소에서도 디스크로 적중
+        self.assertEqual(self.cached().embed_query("필터"), [2.0, 1.0])
+        self.assertEqual(self.model.sent, ["필터"])
+
+    def test_keys_depend_on_model(self):
+        store = EmbeddingStore(self.path)
+        self.cached(store).embed_query("필터")
+        self.cached(store, model="text-embedding-3-large").embed_query("필터")
+        self.assertEqual(self.model.sent, ["필터", "필터"])
+        self.assertNotEqual(
+            embedding_key("text-embedding-3-small", "필터"),
+            embedding_key("text-embedding-3-large", "필터"),
+        )
+
+    def test_memory_layer_is_bounded(self):
+        store = EmbeddingStore(self.path, memory_size=2)
+        self.cached(store).embed_documents(["a", "bb", "ccc"])
+        self.assertEqual(len(store._memory), 2)
+        self.assertEqual(self.cached(store).embed_query("a"), [1.0, 1.0])
+        self.assertEqual(self.model.sent, ["a", "bb", "ccc"])
+
+    def test_async_methods_use_store_off_the_event_loop(self):
+        store = RecordingStore(self.path)
+        embeddings = self.cached(store)
+
+        async def main():
+            loop_thread = threading.current_thread()
+            vectors = await embeddings.aembed_documents(["필터", "전원"])
+            vector = await embeddings.aembed_query("필터")
+            return loop_thread, vectors, vector
+
+        loop_thread, vectors, vector = asyncio.run(main())
+
+        self.assertEqual(vectors, [[2.0, 1.0], [2.0, 1.0]])
+        self.assertEqual(vector, [2.0, 1.0])
+        self.assertEqual(self.model.sent, ["필터", "전원"])
+        self.assertEqual(len(store.threads), 3)
+        self.assertNotIn(loop_thread, store.threads)
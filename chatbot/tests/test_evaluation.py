@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+from chatbot.evaluation import (
+    answer_similarity,
+    compare_summaries,
+    load_golden_dataset,
+    parse_references,
+    percentiles,
+    retrieval_hit,
+    summarize_results,
+)
+
+
+def result(duration_ms, search_ms, prompt_tokens, hit, similarity):
+    return {
+        "duration_ms": duration_ms,
+        "spans": [{"stage": "search", "duration_ms": search_ms}],
+        "tokens": {"prompt": prompt_tokens},
+        "retrieval_hit": hit,
+        "answer_similarity": similarity,
+    }
+
+
+class ReferenceTests(SimpleTestCase):
+    def test_parse_document_words_and_page_ranges(self):
+        self.assertEqual(
+            parse_references("LG 트롬 워시타워 매뉴얼 p.3-4 / LG 건조기 매뉴얼 p.11"),
+            [({"트롬", "워시타워"}, (3, 4)), ({"건조기"}, (11, 11))],
+        )
+
+    def test_hit_requires_document_and_page_in_range(self):
+        contexts = "LG 트롬 워시타워 매뉴얼 p.3-4"
+        self.assertTrue(retrieval_hit(["트롬 워시타워.pdf | p.4"], contexts))
+        self.assertFalse(retrieval_hit(["트롬 워시타워.pdf | p.9"], contexts))
+        self.assertFalse(retrieval_hit(["통돌이 세탁기.pdf | p.3"], contexts))
+
+    def test_no_reference_is_not_scored(self):
+        self.assertIsNone(retrieval_hit(["트롬 워시타워.pdf | p.4"], ""))
+
+
+class ScoringTests(SimpleTestCase):
+    def test_answer_similarity(self):
+        self.assertAlmostEqual(answer_similarity("필터를 청소하세요", "필터를 청소하세요"), 1.0)
+        self.assertEqual(answer_similarity("필터 청소", "전원 연결"), 0.0)
+        self.assertEqual(answer_similarity("", "전원 연결"), 0.0)
+
+    def test_percentiles(self):
+        self.assertEqual(
+            percentiles([1, 2, 3, 4, 100]),
+            {"count": 5, "mean": 22.0, "p50": 3.0, "p95": 80.8, "p99": 96.2},
+        )
+        self.assertEqual(percentiles([]), {"count": 0})
+
+    def test_summary_skips_errors_and_unscored_hits(self):
+        results = [
+            result(100, 40, 300, True, 0.5),
+            result(300, 60, 500, None, 0.7),
+            {"question": "실패", "error": "timeout"},
+        ]
+        summary = summarize_results(results, wall_seconds=2)
+
+        self.assertEqual((summary["questions"], summary["errors"]), (3, 1))
+        self.assertEqual(summary["throughput_qps"], 1.0)
+        self.assertEqual(summary["latency_ms"]["request"]["p50"], 200.0)
+        self.assertEqual(summary["latency_ms"]["search"]["mean"], 50.0)
+        self.assertEqual(summary["tokens"], {"prompt": {"total": 800, "mean": 400.0}})
+        self.assertEqual(summary["retrieval_hit_rate"], 1.0)
+        self.assertEqual(summary["answer_similarity"], 0.6)
+
+    def test_compare_with_baseline(self):
+        baseline = summarize_results([result(200, 80, 600, False, 0.5)], wall_seconds=1)
+        current = summarize_results([result(100, 40, 300, True, 0.5)], wall_seconds=1)
+        lines = compare_summaries(current, baseline)
+        self.assertIn("request.p95_ms: 200.0 → 100.0 (-50.0%)", lines)
+        self.assertIn("tokens.prompt.mean: 600.0 → 300.0 (-50.0%)", lines)
+        self.assertIn("retrieval_hit_rate: 0.0 → 1.0", lines)
+
+
+class GoldenDatasetTests(SimpleTestCase):
+    def test_every_row_has_question_answer_and_references(self):
+        rows = load_golden_dataset(settings.BASE_DIR / "test" / "golden_dataset_lg.csv")
+        self.assertTrue(rows)
+        for row in rows:
+            self.assertTrue(row["output_answer"])
+            self.assertTrue(parse_references(row["contexts"]), row["input_question"])
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from chatbot.history import aload_history, aupdate_summary, window_messages
+from chatbot.models import Conversation, Message
+
+
+def turns(count, size=10):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"질문 {i} " + "x" * size})
+        messages.append({"role": "assistant", "content": f"답변 {i} " + "x" * size})
+    return messages
+
+
+class WindowMessagesTests(SimpleTestCase):
+    def test_keeps_last_turns(self):
+        messages = turns(5)
+        self.assertEqual(window_messages(messages, max_turns=2, token_budget=10000), messages[-4:])
+
+    def test_pending_question_counts_as_a_turn(self):
+        messages = turns(5) + [{"role": "user", "content": "새 질문"}]
+        self.assertEqual(window_messages(messages, max_turns=2, token_budget=10000), messages[-3:])
+
+    def test_stops_at_token_budget(self):
+        messages = turns(3, size=400)
+        # 메시지 하나가 100토큰 남짓이라 예산 250이면 두 개까지
+        self.assertEqual(window_messages(messages, max_turns=3, token_budget=250), messages[-2:])
+
+    def test_last_message_is_always_included(self):
+        messages = turns(1, size=4000)
+        self.assertEqual(window_messages(messages, max_turns=3, token_budget=10), messages[-1:])
+
+
+@mock.patch("chatbot.history.HISTORY_MAX_TURNS", 3)
+class SummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("summarized", password="pw")
+
+    def setUp(self):
+        self.conversation = Conversation.objects.create(user=self.user)
+        now = timezone.now()
+        for i, message in enumerate(turns(4)):
+            Message.objects.create(
+                conversation=self.conversation,
+                created_at=now + timedelta(seconds=i),
+                **message,
+            )
+        self.summary_chain = mock.Mock()
+        self.summary_chain.ainvoke = mock.AsyncMock(return_value=" 요약 \n")
+        patcher = mock.patch(
+            "chatbot.runtime.aget_runtime",
+            mock.AsyncMock(return_value=SimpleNamespace(summary_chain=self.summary_chain)),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_folds_only_messages_outside_the_window(self):
+        await aupdate_summary(self.conversation)
+
+        # 완료된 턴은 2개(4개 메시지)만 남기고 앞의 2턴을 요약
+        prompt = self.summary_chain.ainvoke.call_args.args[0]
+        self.assertEqual(prompt["summary"], "(없음)")
+        self.assertIn("질문 1", prompt["messages"])
+        self.assertNotIn("질문 2", prompt["messages"])
+        await self.conversation.arefresh_from_db()
+        self.assertEqual(
+            (self.conversation.summary, self.conversation.summary_message_count), ("요약", 4)
+        )
+
+    async def test_next_update_sends_only_new_overflow(self):
+        await aupdate_summary(self.conversation)
+        await aupdate_summary(self.conversation)
+        self.assertEqual(self.summary_chain.ainvoke.await_count, 1)
+
+        now = timezone.now() + timedelta(minutes=1)
+        for i, message in enumerate(turns(1)):
+            await Message.objects.acreate(
+                conversation=self.conversation, created_at=now + timedelta(seconds=i), **message
+            )
+        await aupdate_summary(self.conversation)
+
+        prompt = self.summary_chain.ainvoke.call_args.args[0]
+        self.assertEqual(prompt["summary"], "요약")
+        self.assertIn("질문 2", prompt["messages"])
+        self.assertNotIn("질문 1", prompt["messages"])
+        self.assertEqual(self.conversation.summary_message_count, 6)
+
+    async def test_concurrent_update_wins(self):
+        async def summarize_while_another_request_updates(prompt):
+            await Conversation.objects.filter(pk=self.conversation.pk).aupdate(
+                summary="다른 요청의 요약", summary_message_count=2
+            )
+            return "늦은 요약"
+
+        self.summary_chain.ainvoke.side_effect = summarize_while_another_request_updates
+        await aupdate_summary(self.conversation)
+
+        await self.conversation.arefresh_from_db()
+        self.assertEqual(
+            (self.conversation.summary, self.conversation.summary_message_count),
+            ("다른 요청의 요약", 2),
+        )
+
+    async def test_history_is_summary_plus_recent_window(self):
+        await aupdate_summary(self.conversation)
+        pending = [{"role": "user", "content": "새 질문"}]
+
+        history = await aload_history(self.conversation, pending)
+
+        self.assertEqual(history[0], {"role": "system", "content": "이전 대화 요약:\n요약"})
+        self.assertEqual(
+            [m["content"][:4] for m in history[1:-1]], ["질문 2", "답변 2", "질문 3", "답변 3"]
+        )
+        self.assertEqual(history[-1], pending[0])
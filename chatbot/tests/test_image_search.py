@@ -0,0 +1,133 @@
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+import numpy as np
+from PIL import Image, ImageDraw
+from chatbot import runtime
+from chatbot.image_search import CatalogFile, ImageCatalog, consensus, image_signature
+
+
+def nameplate(text_offset, fmt="PNG", size=(400, 300)):
+    """명판 비슷한 테스트 이미지 (막대 위치로 모델을 구분)"""
+    image = Image.new("RGB", (400, 300), (230, 230, 230))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([20, 20, 380, 80], fill=(30, 60, 160))
+    for i in range(6):
+        x = 40 + ((i * 53 + text_offset) % 320)
+        draw.rectangle([x, 120, x + 20, 260], fill=(20, 20, 20))
+    buffer = io.BytesIO()
+    image.resize(size).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def signed_catalog(images):
+    """{모델명: 이미지 bytes}로 만든 카탈로그"""
+    hashes, vectors = zip(*(image_signature(image) for image in images.values()))
+    return ImageCatalog(list(images), np.array(hashes, dtype=np.uint64), np.stack(vectors))
+
+
+class ImageCatalogTests(SimpleTestCase):
+    def catalog(self, labels):
+        vectors = np.eye(len(labels), 4, dtype=np.float32)
+        return ImageCatalog(labels, np.zeros(len(labels), dtype=np.uint64), vectors)
+
+    def test_resized_and_recompressed_copy_matches(self):
+        catalog = signed_catalog({"M-100": nameplate(0), "M-200": nameplate(170)})
+        copy = nameplate(0, fmt="JPEG", size=(200, 150))
+        self.assertEqual(catalog.identify(copy), "M-100")
+        self.assertEqual(catalog.search(copy, k=2)[0][0], "M-100")
+
+    def test_unrelated_image_returns_minus_one(self):
+        catalog = signed_catalog({"M-100": nameplate(0)})
+        noise = np.random.default_rng(0).integers(0, 256, (300, 400, 3), dtype=np.uint8)
+        self.assertEqual(catalog.identify(Image.fromarray(noise)), -1)
+
+    def test_build_skips_unreadable_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            good, bad = Path(tmp) / "good.png", Path(tmp) / "bad.png"
+            good.write_bytes(nameplate(0))
+            bad.write_bytes(b"not an image")
+            with self.assertLogs("chatbot.image_search", "ERROR"):
+                catalog = ImageCatalog.build([good, bad], label=lambda path: Path(path).stem)
+        self.assertEqual(catalog.labels, ["good"])
+        self.assertEqual(catalog.vectors.shape[0], 1)
+
+    def test_hash_match_requires_similarity(self):
+        catalog = self.catalog(["M-100"])
+        same = catalog.match_batch([(0, np.array([1, 0, 0, 0], dtype=np.float32))])
+        other = catalog.match_batch([(0, np.array([0, 1, 0, 0], dtype=np.float32))])
+        self.assertEqual(same[0][0], "M-100")
+        # 해시가 같아도 특징 유사도가 낮으면 다른 모델
+        self.assertEqual(other[0][0], -1)
+
+    def test_empty_catalog_returns_minus_one(self):
+        catalog = ImageCatalog.build([])
+        self.assertEqual(len(catalog), 0)
+        self.assertEqual(catalog.identify(nameplate(0)), -1)
+        self.assertEqual(catalog.search(nameplate(0)), [])
+
+    def test_catalog_file_reloads_when_replaced(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "catalog.npz"
+            catalog_file = CatalogFile(path)
+            self.assertIsNone(catalog_file.get())
+
+            self.catalog(["M-100"]).save(path)
+            self.assertEqual(catalog_file.get().labels, ["M-100"])
+
+            self.catalog(["M-100", "M-200"]).save(path)
+            self.assertEqual(catalog_file.get().labels, ["M-100", "M-200"])
+
+
+class ConsensusTests(SimpleTestCase):
+    def test_highest_total_similarity_wins(self):
+        matches = [("M-100", 0.9, 2), ("M-200", 0.95, 1), ("M-100", 0.88, 4)]
+        self.assertEqual(consensus(matches), "M-100")
+
+    def test_unmatched_images_do_not_vote(self):
+        self.assertEqual(consensus([(-1, 0.8, 30), ("M-200", 0.86, 3), (-1, 0.84, 20)]), "M-200")
+        self.assertEqual(consensus([(-1, 0.5, 30), (-1, 0.4, 20)]), -1)
+        self.assertEqual(consensus([]), -1)
+
+
+class BatchModelSearchTests(SimpleTestCase):
+    def setUp(self):
+        catalog = signed_catalog({"M-100": nameplate(0), "M-200": nameplate(170)})
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        runtime.set_runtime(SimpleNamespace(image_catalog=catalog, executor=executor))
+        self.addCleanup(runtime.reset_runtime)
+
+    def upload(self, name, data):
+        return SimpleUploadedFile(name, data, content_type="image/png")
+
+    def test_each_image_is_identified_and_combined(self):
+        noise = np.random.default_rng(0).integers(0, 256, (300, 400, 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(noise).save(buffer, "PNG")
+        images = [
+            self.upload("nameplate.png", nameplate(0, size=(200, 150))),
+            self.upload("label.jpg", nameplate(0, fmt="JPEG")),
+            self.upload("noise.png", buffer.getvalue()),
+        ]
+
+        response = self.client.post(reverse("model-search-batch"), {"images": images})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["model_code"], "M-100")
+        self.assertEqual(
+            [(result["name"], result["model_code"]) for result in body["results"]],
+            [("nameplate.png", "M-100"), ("label.jpg", "M-100"), ("noise.png", -1)],
+        )
+
+    @override_settings(MODEL_SEARCH_MAX_IMAGES=1)
+    def test_too_many_images_is_rejected(self):
+        images = [self.upload("a.png", nameplate(0)), self.upload("b.png", nameplate(170))]
+        response = self.client.post(reverse("model-search-batch"), {"images": images})
+        self.assertEqual(response.status_code, 400)
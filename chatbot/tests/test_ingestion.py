@@ -0,0 +1,295 @@
+import time
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase
+from langchain_core.embeddings import Embeddings
+from chatbot.ingestion import (
+    ExtractionFailed,
+    IndexManifest,
+    IngestionPipeline,
+    buffered,
+    embed_batches,
+)
+from chatbot.pinecone_uploader import PineconeUploader
+
+
+class FakeEmbeddings(Embeddings):
+    """텍스트 길이를 벡터로 돌려주는 임베딩 ("fail"이 들어간 배치는 실패)"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        # 배치마다 다른 시간 후에 끝나서 완료 순서가 입력 순서와 달라짐
+        time.sleep(self.delays.get(texts[0], 0))
+        if any("fail" in text for text in texts):
+            raise ValueError("embedding failed")
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+class EmbedBatchesTests(SimpleTestCase):
+    def test_results_follow_input_order(self):
+        batches = [["a" * n] for n in range(1, 9)]
+        # 앞쪽 배치일수록 늦게 끝남
+        delays = {batch[0]: 0.01 * (8 - i) for i, batch in enumerate(batches)}
+        results = list(embed_batches(FakeEmbeddings(delays), batches, max_concurrency=4))
+        self.assertEqual([batch for batch, _ in results], batches)
+        self.assertEqual([vectors for _, vectors in results], [[[float(n)]] for n in range(1, 9)])
+
+    def test_failed_batches_are_skipped(self):
+        batches = [["one"], ["fail"], ["three"]]
+        results = list(embed_batches(FakeEmbeddings(), batches, max_concurrency=2))
+        self.assertEqual([batch for batch, _ in results], [["one"], ["three"]])
+
+    def test_failed_batches_are_reported(self):
+        batches = [["one"], ["fail"], ["three"]]
+        results = list(
+            embed_batches(FakeEmbeddings(), batches, max_concurrency=2, skip_failed=False)
+        )
+        self.assertEqual(results[1], (["fail"], None))
+        self.assertEqual(results[2], (["three"], [[5.0]]))
+
+    def test_rate_limit_is_retried(self):
+        class RateLimitError(Exception):
+            pass
+
+        embeddings = mock.Mock()
+        embeddings.embed_documents.side_effect = [RateLimitError(), [[1.0]]]
+        with mock.patch("chatbot.ingestion.time.sleep") as sleep:
+            results = list(embed_batches(embeddings, [["text"]], max_retries=2))
+        self.assertEqual(results, [(["text"], [[1.0]])])
+        sleep.assert_called_once()
+
+
+class IngestionPipelineTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.store = {}
+        self.upserts = []
+        self.manifest_path = self.dir / "manifest.json"
+
+    def write(self, name, lines):
+        path = self.dir / name
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return str(path)
+
+    def extract(self, sources):
+        for source in sources:
+            if source.endswith(".broken"):
+                yield source, ExtractionFailed(ValueError("cannot parse"))
+            else:
+                yield source, Path(source).read_text(encoding="utf-8")
+
+    def chunk(self, source, text):
+        name = Path(source).name
+        for i, line in enumerate(text.splitlines()):
+            yield {"id": f"{name}-{i}", "text": line, "metadata": {}}
+
+    def upsert(self, vectors):
+        self.upserts.append(len(vectors))
+        for vector in vectors:
+            self.store[vector["id"]] = vector["text"]
+
+    def delete(self, ids):
+        for vector_id in ids:
+            self.store.pop(vector_id, None)
+
+    def run_pipeline(self, sources, batch_size=2, manifest=None, **kwargs):
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(),
+            self.extract,
+            self.chunk,
+            self.upsert,
+            delete=self.delete,
+            manifest=manifest,
+            batch_size=batch_size,
+        )
+        return pipeline.run(sources, **kwargs)
+
+    def test_records_are_upserted_in_batches(self):
+        sources = [self.write("a.txt", ["a0", "a1", "a2"]), self.write("b.txt", ["b0"])]
+        stats = self.run_pipeline(sources)
+
+        self.assertEqual((stats["files"], stats["vectors"], stats["failed"]), (2, 4, []))
+        # 파일 경계와 관계없이 batch_size개씩 묶어서 임베딩/업서트
+        self.assertEqual(self.upserts, [2, 2])
+        self.assertEqual(sorted(self.store), ["a.txt-0", "a.txt-1", "a.txt-2", "b.txt-0"])
+
+    def test_failed_files_are_reported(self):
+        good = self.write("a.txt", ["a0"])
+        broken = self.write("c.broken", ["x"])
+        failing = self.write("d.txt", ["fail"])
+        # 임베딩 실패는 배치 단위이므로 파일마다 배치를 나눔
+        stats = self.run_pipeline([good, broken, failing], batch_size=1)
+
+        self.assertEqual(stats["failed"], sorted([broken, failing]))
+        self.assertEqual(stats["files"], 1)
+        self.assertEqual(self.store, {"a.txt-0": "a0"})
+
+    def test_buffered_stage_reads_ahead_at_most_maxsize(self):
+        produced = []
+        blocked = threading.Event()
+
+        def items():
+            for i in range(100):
+                produced.append(i)
+                yield i
+            blocked.set()
+
+        stage = buffered(items(), maxsize=3)
+        self.assertEqual(next(stage), 0)
+        time.sleep(0.3)
+        # 큐(3개) + 꺼낸 1개 + 넣으려고 기다리는 1개
+        self.assertLessEqual(len(produced), 5)
+        self.assertFalse(blocked.is_set())
+        self.assertEqual(list(stage), list(range(1, 100)))
+
+    def run_incremental(self, sources, **kwargs):
+        return self.run_pipeline(sources, manifest=IndexManifest(self.manifest_path), **kwargs)
+
+    def test_unchanged_files_are_skipped(self):
+        sources = [self.write("a.txt", ["a0", "a1", "a2"]), self.write("b.txt", ["b0"])]
+        stats = self.run_incremental(sources)
+        self.assertEqual((stats["files"], stats["vectors"], stats["skipped"]), (2, 4, 0))
+
+        stats = self.run_incremental(sources)
+        self.assertEqual((stats["files"], stats["vectors"], stats["skipped"]), (0, 0, 2))
+        self.assertEqual(sorted(self.store), ["a.txt-0", "a.txt-1", "a.txt-2", "b.txt-0"])
+
+    def test_changed_file_deletes_stale_vectors(self):
+        sources = [self.write("a.txt", ["a0", "a1", "a2"]), self.write("b.txt", ["b0"])]
+        self.run_incremental(sources)
+
+        self.write("a.txt", ["new"])
+        stats = self.run_incremental(sources)
+        self.assertEqual((stats["files"], stats["skipped"], stats["deleted"]), (1, 1, 2))
+        self.assertEqual(self.store, {"a.txt-0": "new", "b.txt-0": "b0"})
+
+    def test_removed_files_are_pruned_only_on_request(self):
+        a = self.write("a.txt", ["a0"])
+        b = self.write("b.txt", ["b0", "b1"])
+        self.run_incremental([a, b])
+
+        stats = self.run_incremental([a])
+        self.assertEqual(stats["deleted"], 0)
+        self.assertIn("b.txt-1", self.store)
+
+        stats = self.run_incremental([a], prune=True)
+        self.assertEqual(stats["deleted"], 2)
+        self.assertEqual(sorted(self.store), ["a.txt-0"])
+        self.assertNotIn(b, IndexManifest(self.manifest_path).entries)
+
+    def test_failed_files_are_not_recorded(self):
+        good = self.write("a.txt", ["a0"])
+        broken = self.write("c.broken", ["x"])
+        failing = self.write("d.txt", ["fail"])
+        self.run_incremental([good, broken, failing], batch_size=1)
+
+        self.assertEqual(list(IndexManifest(self.manifest_path).entries), [good])
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        sources = [self.write(f"{name}.txt", [name]) for name in "abcd"]
+
+        def interrupt_at_third_batch(vectors):
+            if len(self.upserts) == 2:
+                raise KeyboardInterrupt
+            self.upsert(vectors)
+
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(),
+            self.extract,
+            self.chunk,
+            interrupt_at_third_batch,
+            manifest=IndexManifest(self.manifest_path),
+            batch_size=1,
+            max_concurrency=1,
+        )
+        with self.assertRaises(KeyboardInterrupt):
+            pipeline.run(sources)
+
+        stats = self.run_incremental(sources, batch_size=1)
+        # 파일 끝 표시는 다음 배치와 함께 처리되므로 a만 기록된 상태에서 중단됨
+        self.assertEqual((stats["skipped"], stats["files"]), (1, 3))
+        self.assertEqual(sorted(self.store), ["a.txt-0", "b.txt-0", "c.txt-0", "d.txt-0"])
+
+    def test_image_extraction_failures_are_reported(self):
+        image = self.dir / "M-100_front.png"
+        image.write_bytes(b"\x89PNG")
+        empty = self.dir / "empty.png"
+        empty.write_bytes(b"")
+        missing = self.dir / "missing.png"
+
+        uploader = PineconeUploader.__new__(PineconeUploader)
+        results = dict(uploader._extract_images([image, empty, missing]))
+
+        self.assertEqual(results[str(image)], "iVBORw==")
+        self.assertIsInstance(results[str(empty)], ExtractionFailed)
+        self.assertIsInstance(results[str(missing)], ExtractionFailed)
+
+
+class IndexManifestTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.path = self.dir / "manifest.json"
+        self.sources = []
+        for name in "abc":
+            source = self.dir / f"{name}.txt"
+            source.write_text(name, encoding="utf-8")
+            self.sources.append(str(source))
+
+    def log_lines(self, manifest):
+        return manifest.log_path.read_text(encoding="utf-8").splitlines()
+
+    def test_checkpoint_appends_only_changed_entries(self):
+        manifest = IndexManifest(self.path)
+        a, b, c = self.sources
+        manifest.record(a, "hash-a", "1", ["a-0"])
+        manifest.record(b, "hash-b", "1", ["b-0"])
+        manifest.checkpoint()
+        self.assertEqual(len(self.log_lines(manifest)), 2)
+
+        manifest.checkpoint()
+        manifest.record(c, "hash-c", "1", ["c-0"])
+        manifest.remove(a)
+        manifest.checkpoint()
+        self.assertEqual(len(self.log_lines(manifest)), 4)
+        # 전체 JSON은 save 전까지 쓰지 않음
+        self.assertFalse(self.path.exists())
+
+        self.assertEqual(sorted(IndexManifest(self.path).entries), [b, c])
+
+    def test_save_compacts_log(self):
+        manifest = IndexManifest(self.path)
+        manifest.record(self.sources[0], "hash-a", "1", ["a-0"])
+        manifest.checkpoint()
+        manifest.save()
+
+        self.assertFalse(manifest.log_path.exists())
+        self.assertEqual(IndexManifest(self.path).entries, manifest.entries)
+
+    def test_truncated_log_line_is_ignored(self):
+        manifest = IndexManifest(self.path)
+        manifest.record(self.sources[0], "hash-a", "1", ["a-0"])
+        manifest.checkpoint()
+        with open(manifest.log_path, "a", encoding="utf-8") as f:
+            f.write('{"source": "b.txt", "ent')
+
+        reloaded = IndexManifest(self.path)
+        self.assertEqual(list(reloaded.entries), [self.sources[0]])
+
+        # 끊긴 줄 뒤에 덧붙이지 않고 전체를 저장
+        reloaded.record(self.sources[1], "hash-b", "1", ["b-0"])
+        reloaded.checkpoint()
+        self.assertFalse(reloaded.log_path.exists())
+        self.assertEqual(sorted(IndexManifest(self.path).entries), self.sources[:2])
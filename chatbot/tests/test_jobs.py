@@ -0,0 +1,360 @@
+import json
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TransactionTestCase, override_settings
+from django.test.client import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
+from chatbot import jobs
+from chatbot.models import Conversation, GenerationJob
+
+
+def fake_stream(*tokens, delay=0):
+    async def stream(query, history=None, trace=None):
+        yield {"type": "status", "stage": "retrieval"}
+        await asyncio.sleep(delay)
+        yield {"type": "status", "stage": "generation"}
+        for token in tokens:
+            yield {"type": "token", "content": token}
+            await asyncio.sleep(delay)
+
+    return stream
+
+
+async def failing_stream(query, history=None, trace=None):
+    raise RuntimeError("LLM unavailable")
+    yield
+
+
+def sse_events(body):
+    return [json.loads(line[len("data: "):]) for line in body.decode().split("\n\n") if line]
+
+
+@mock.patch("chatbot.jobs.aupdate_summary", mock.AsyncMock())
+class GenerationJobTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("asker", password="pw")
+        self.conversation = Conversation.objects.create(user=self.user)
+
+    def test_claim_moves_job_to_running_once(self):
+        job = jobs.enqueue_generation(self.conversation, "질문")
+        self.assertEqual(job.status, GenerationJob.QUEUED)
+
+        claimed = jobs.claim_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, GenerationJob.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertIsNone(jobs.claim_job())
+
+    def test_claim_skips_conversation_with_running_job(self):
+        first = jobs.enqueue_generation(self.conversation, "첫 질문")
+        jobs.enqueue_generation(self.conversation, "두 번째 질문")
+        other = jobs.enqueue_generation(
+            Conversation.objects.create(user=self.user), "다른 대화 질문"
+        )
+
+        self.assertEqual(jobs.claim_job().pk, first.pk)
+        self.assertEqual(jobs.claim_job().pk, other.pk)
+        self.assertIsNone(jobs.claim_job())
+
+    def test_racing_claimers_run_one_job_per_conversation(self):
+        first = jobs.enqueue_generation(self.conversation, "첫 질문")
+        second = jobs.enqueue_generation(self.conversation, "두 번째 질문")
+        picked = threading.Barrier(2, timeout=5)
+        # 테스트용 공유 메모리 SQLite는 동시 쓰기를 기다리지 않고 실패하므로, 두 워커가
+        # 모두 후보 목록을 읽은 뒤에는 가져가기를 하나씩 실행
+        serial = threading.Lock()
+        state = threading.local()
+        claim = jobs._claim
+
+        def claim_after_both_picked(pk, conversation_id):
+            if not getattr(state, "serial", False):
+                picked.wait()
+                serial.acquire()
+                state.serial = True
+            return claim(pk, conversation_id)
+
+        claimed = []
+
+        def worker():
+            try:
+                claimed.append(jobs.claim_job())
+            finally:
+                connection.close()
+                if getattr(state, "serial", False):
+                    serial.release()
+
+        with mock.patch("chatbot.jobs._claim", claim_after_both_picked):
+            threads = [threading.Thread(target=worker) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(job is None for job in claimed), [False, True])
+        self.assertEqual(next(job for job in claimed if job).pk, first.pk)
+        self.assertEqual(GenerationJob.objects.get(pk=second.pk).status, GenerationJob.QUEUED)
+
+    def run_claimed_job(self, stream):
+        jobs.enqueue_generation(self.conversation, "질문")
+        job = jobs.claim_job()
+        with mock.patch("chatbot.jobs.astream_chatbot", stream):
+            asyncio.run(jobs.run_job(job))
+        return GenerationJob.objects.get(pk=job.pk)
+
+    def test_run_job_saves_exchange(self):
+        job = self.run_claimed_job(fake_stream("안녕", "하세요"))
+
+        self.assertEqual(job.status, GenerationJob.DONE)
+        self.assertEqual((job.stage, job.partial), ("done", ""))
+        self.assertEqual(job.user_message.content, "질문")
+        self.assertEqual(job.assistant_message.content, "안녕하세요")
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.conversation.messages.count(), 2)
+        self.assertEqual(jobs._live, {})
+
+    def test_run_job_records_failure(self):
+        with self.assertLogs("chatbot.jobs", "WARNING"):
+            job = self.run_claimed_job(failing_stream)
+
+        self.assertEqual(job.status, GenerationJob.FAILED)
+        self.assertEqual(job.error, "LLM unavailable")
+        self.assertEqual(self.conversation.messages.count(), 0)
+        self.assertEqual(jobs._live, {})
+
+    def test_run_job_times_out_generation(self):
+        with mock.patch("chatbot.jobs.JOB_TIMEOUT", 0.05):
+            with self.assertLogs("chatbot.jobs", "WARNING"):
+                job = self.run_claimed_job(fake_stream("늦은 답변", delay=1))
+
+        self.assertEqual(job.status, GenerationJob.FAILED)
+        self.assertEqual(job.error, "Generation timed out")
+        self.assertEqual(self.conversation.messages.count(), 0)
+
+    def test_timeout_covers_the_whole_job(self):
+        async def stuck(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        with mock.patch("chatbot.jobs.JOB_TIMEOUT", 0.05), mock.patch(
+            "chatbot.jobs.aload_history", stuck
+        ):
+            with self.assertLogs("chatbot.jobs", "WARNING"):
+                job = self.run_claimed_job(fake_stream("답변"))
+
+        self.assertEqual((job.status, job.error), (GenerationJob.FAILED, "Generation timed out"))
+
+    def test_answer_for_a_job_no_longer_running_is_discarded(self):
+        jobs.enqueue_generation(self.conversation, "질문")
+        job = jobs.claim_job()
+        # 저장 직전에 시간 초과로 실패 처리된 경우
+        GenerationJob.objects.filter(pk=job.pk).update(status=GenerationJob.FAILED)
+
+        self.assertFalse(jobs._save(job, self.conversation, "늦은 답변"))
+        self.assertEqual(self.conversation.messages.count(), 0)
+        self.assertEqual(GenerationJob.objects.get(pk=job.pk).status, GenerationJob.FAILED)
+
+    def test_failed_job_returns_the_question(self):
+        with self.assertLogs("chatbot.jobs", "WARNING"):
+            job = self.run_claimed_job(failing_stream)
+        self.client.force_login(self.user)
+
+        data = self.client.get(reverse("job", args=[job.pk])).json()
+
+        self.assertEqual(
+            (data["status"], data["error"], data["question"]),
+            (GenerationJob.FAILED, "LLM unavailable", "질문"),
+        )
+
+    def test_stale_jobs_are_requeued_then_failed(self):
+        stale_at = timezone.now() - timedelta(seconds=jobs.JOB_TIMEOUT * 3)
+        retry = jobs.enqueue_generation(self.conversation, "재시도")
+        give_up = jobs.enqueue_generation(Conversation.objects.create(user=self.user), "포기")
+        GenerationJob.objects.filter(pk=retry.pk).update(
+            status=GenerationJob.RUNNING, started_at=stale_at, attempts=1
+        )
+        GenerationJob.objects.filter(pk=give_up.pk).update(
+            status=GenerationJob.RUNNING, started_at=stale_at, attempts=jobs.JOB_MAX_ATTEMPTS
+        )
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        self.assertEqual(GenerationJob.objects.get(pk=retry.pk).status, GenerationJob.QUEUED)
+        self.assertEqual(GenerationJob.objects.get(pk=give_up.pk).status, GenerationJob.FAILED)
+
+    def test_post_enqueues_job(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            f"/api/conversations/{self.conversation.id}/messages/",
+            {"message": "질문"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 202)
+        job = GenerationJob.objects.get(pk=response.json()["job_id"])
+        self.assertEqual((job.status, job.question), (GenerationJob.QUEUED, "질문"))
+
+
+@mock.patch("chatbot.jobs.aupdate_summary", mock.AsyncMock())
+class WatchJobTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("watcher", password="pw")
+        self.conversation = Conversation.objects.create(user=self.user)
+        self.queryset = GenerationJob.objects.all()
+
+    def watch(self, job, wait=None):
+        async def collect():
+            return [
+                (update.status, update.error)
+                async for update in jobs.watch_job(self.queryset, job, wait)
+            ]
+
+        return asyncio.run(collect())
+
+    @mock.patch("chatbot.jobs.JOB_QUEUE_TIMEOUT", 0)
+    def test_unclaimed_job_fails_after_queue_timeout(self):
+        job = jobs.enqueue_generation(self.conversation, "질문")
+
+        updates = self.watch(job)
+
+        self.assertEqual(updates, [(GenerationJob.FAILED, "Generation job was queued too long")])
+        # 나중에 워커가 가져가서 답변을 저장하지 않도록 작업도 실패로 바뀜
+        self.assertIsNone(jobs.claim_job())
+
+    def test_requeued_job_gets_a_fresh_queue_timeout(self):
+        job = jobs.enqueue_generation(self.conversation, "재시도")
+        job.created_at = timezone.now() - timedelta(seconds=jobs.JOB_QUEUE_TIMEOUT * 10)
+        self.assertLessEqual(jobs._expires_in(job), 0)
+        job.started_at = timezone.now() - timedelta(seconds=jobs.JOB_TIMEOUT * 2)
+        self.assertAlmostEqual(jobs._expires_in(job), jobs.JOB_QUEUE_TIMEOUT, delta=1)
+
+    def test_stalled_running_job_stops_watching(self):
+        job = jobs.enqueue_generation(self.conversation, "질문")
+        GenerationJob.objects.filter(pk=job.pk).update(
+            status=GenerationJob.RUNNING,
+            started_at=timezone.now() - timedelta(seconds=jobs.JOB_TIMEOUT * 3),
+        )
+        self.assertEqual(self.watch(self.queryset.get(pk=job.pk)), [])
+
+    def test_wait_returns_without_changes(self):
+        job = jobs.enqueue_generation(self.conversation, "질문")
+        self.assertEqual(self.watch(job, wait=0.05), [])
+
+    @mock.patch("chatbot.jobs.JOB_PROGRESS_INTERVAL", 60)
+    def test_in_process_progress_skips_the_database(self):
+        jobs.enqueue_generation(self.conversation, "질문")
+        job = jobs.claim_job()
+
+        async def watch_while_running():
+            watched = []
+
+            async def watch():
+                async for update in jobs.watch_job(self.queryset, job):
+                    watched.append((update.status, update.partial))
+
+            watcher = asyncio.create_task(watch())
+            await asyncio.sleep(0)
+            with mock.patch("chatbot.jobs.astream_chatbot", fake_stream("안녕", "하세요", delay=0.05)):
+                await jobs.run_job(job)
+            await asyncio.wait_for(watcher, 1)
+            return watched
+
+        watched = asyncio.run(watch_while_running())
+
+        # 워커가 알려준 생성 중인 답변을 JOB_POLL_INTERVAL을 기다리지 않고 받음
+        self.assertIn((GenerationJob.RUNNING, "안녕"), watched)
+        self.assertEqual(watched[-1][0], GenerationJob.DONE)
+        self.assertEqual(jobs._waiters, {})
+
+    def watch_other_process(self):
+        """다른 프로세스의 워커가 실행하는 작업을 지켜본 (상태, 생성 중인 답변) 목록"""
+        jobs.enqueue_generation(self.conversation, "질문")
+        job = jobs.claim_job()
+
+        async def watch_while_running():
+            watched = []
+
+            async def watch():
+                async for update in jobs.watch_job(self.queryset, job):
+                    watched.append((update.status, update.partial))
+
+            watcher = asyncio.create_task(watch())
+            await asyncio.sleep(0)
+            with mock.patch(
+                "chatbot.jobs.astream_chatbot", fake_stream("안녕", "하세요", "!", delay=0.1)
+            ):
+                await jobs.run_job(job)
+            await asyncio.wait_for(watcher, 1)
+            return watched
+
+        # 같은 프로세스 알림(_publish)이 없으면 워커가 공유한 진행 상태만 볼 수 있음
+        with mock.patch("chatbot.jobs._publish"), mock.patch(
+            "chatbot.jobs.JOB_POLL_INTERVAL", 0.02
+        ), mock.patch("chatbot.jobs.JOB_PROGRESS_INTERVAL", 0), mock.patch.object(
+            QuerySet, "aupdate", autospec=True, side_effect=QuerySet.aupdate
+        ) as aupdate:
+            watched = asyncio.run(watch_while_running())
+        partial_writes = [
+            call.kwargs["partial"] for call in aupdate.call_args_list if "partial" in call.kwargs
+        ]
+        return watched, partial_writes
+
+    @override_settings(SHARED_CACHE=False)
+    def test_other_process_sees_partial_answer_through_the_database(self):
+        watched, partial_writes = self.watch_other_process()
+        self.assertIn((GenerationJob.RUNNING, "안녕하세요"), watched)
+        self.assertEqual(watched[-1][0], GenerationJob.DONE)
+        self.assertEqual(partial_writes, ["안녕", "안녕하세요", "안녕하세요!"])
+
+    @override_settings(SHARED_CACHE=True)
+    def test_other_process_sees_partial_answer_through_the_shared_cache(self):
+        with mock.patch("chatbot.jobs.cache", LocMemCache("jobs", {})) as shared:
+            watched, partial_writes = self.watch_other_process()
+
+        self.assertIn((GenerationJob.RUNNING, "안녕하세요"), watched)
+        self.assertEqual(watched[-1][0], GenerationJob.DONE)
+        # 생성 중인 답변은 DB에 쓰지 않고, 끝나면 캐시 항목도 지움
+        self.assertEqual(partial_writes, [])
+        self.assertEqual(shared._cache, {})
+
+    @mock.patch("chatbot.jobs.JOB_QUEUE_TIMEOUT", 0)
+    async def test_stream_reports_queued_too_long(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.post(
+            reverse("messages-stream", args=[self.conversation.id]),
+            {"message": "질문"},
+            content_type="application/json",
+        )
+        body = b"".join([chunk async for chunk in response.streaming_content])
+
+        events = sse_events(body)
+        self.assertEqual([event["type"] for event in events], ["job", "user_message", "error"])
+        self.assertEqual(events[-1]["error"], "Generation job was queued too long")
+        self.assertEqual(events[-1]["question"], "질문")
+
+    async def test_stream_reports_stalled_worker(self):
+        job = await GenerationJob.objects.acreate(
+            conversation=self.conversation,
+            question="질문",
+            status=GenerationJob.RUNNING,
+            started_at=timezone.now() - timedelta(seconds=jobs.JOB_TIMEOUT * 3),
+        )
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        with mock.patch("chatbot.jobs.enqueue_generation", return_value=job):
+            response = await client.post(
+                reverse("messages-stream", args=[self.conversation.id]),
+                {"message": "질문"},
+                content_type="application/json",
+            )
+            body = b"".join([chunk async for chunk in response.streaming_content])
+
+        event = sse_events(body)[-1]
+        self.assertEqual(
+            (event["error"], event["question"]), ("Generation worker stopped responding", "질문")
+        )
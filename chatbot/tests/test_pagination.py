@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from chatbot.models import Conversation, Message
+from chatbot.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("reader", password="pw")
+        cls.conversations = [
+            Conversation.objects.create(user=cls.user, title=f"대화 {i}") for i in range(5)
+        ]
+        # 같은 시각의 메시지가 섞여 있어도 (created_at, id)로 순서가 정해짐
+        now = timezone.now()
+        cls.messages = [
+            Message.objects.create(
+                conversation=cls.conversations[0],
+                role="user",
+                content=f"메시지 {i}",
+                created_at=now + timedelta(seconds=i // 2),
+            )
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def collect(self, url, key):
+        pages = []
+        cursor = None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append([item["id"] for item in data[key]])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_conversation_pages(self):
+        pages = self.collect("/api/conversations/", "conversations")
+        expected = [
+            conv.id
+            for conv in sorted(self.conversations, key=lambda c: (c.updated_at, c.id), reverse=True)
+        ]
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_message_pages(self):
+        url = f"/api/conversations/{self.conversations[0].id}/messages/"
+        pages = self.collect(url, "messages")
+        # 최신 페이지부터, 페이지 안에서는 시간순
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(reversed(pages), []), [msg.id for msg in self.messages])
+
+    def test_invalid_cursor(self):
+        for url in (
+            "/api/conversations/",
+            f"/api/conversations/{self.conversations[0].id}/messages/",
+        ):
+            response = self.client.get(url, {"cursor": "not-a-cursor"})
+            self.assertEqual(response.status_code, 400)
+
+    def test_cursor_round_trip(self):
+        timestamp = timezone.now()
+        cursor = encode_cursor(timestamp, 42)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), (timestamp, 42))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("bm8tc2VwYXJhdG9y")
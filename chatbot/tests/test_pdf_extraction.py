@@ -0,0 +1,121 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase
+from chatbot.ingestion import ExtractionFailed
+from chatbot.pdf_extraction import ExtractionCache, PageText, extract_pdf, extract_pdfs
+
+
+def write_pdf(path, page_texts):
+    """페이지마다 한 줄씩 텍스트가 있는 최소 PDF 작성"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # 페이지 목록 (페이지를 만든 뒤 채움)
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n".encode("latin-1")
+    data += f"startxref\n{xref}\n%%EOF\n".encode("latin-1")
+    Path(path).write_bytes(data)
+    return str(path)
+
+
+class ExtractionCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.cache = ExtractionCache(self.dir / "cache")
+
+    def test_key_follows_content_and_mtime(self):
+        pdf = write_pdf(self.dir / "manual.pdf", ["Filter"])
+        key = ExtractionCache.file_key(pdf)
+        self.assertEqual(ExtractionCache.file_key(pdf), key)
+
+        stat = os.stat(pdf)
+        os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        touched = ExtractionCache.file_key(pdf)
+        self.assertNotEqual(touched, key)
+        # 해시 부분은 내용이 같으면 그대로
+        self.assertEqual(touched.split("_")[0], key.split("_")[0])
+
+        write_pdf(pdf, ["Power"])
+        self.assertNotEqual(ExtractionCache.file_key(pdf).split("_")[0], key.split("_")[0])
+
+    def test_cached_pages_are_reused(self):
+        pdf = write_pdf(self.dir / "manual.pdf", ["Filter", "Power"])
+        pages = extract_pdf(pdf, cache=self.cache)
+        self.assertEqual([page.page for page in pages], [1, 2])
+        self.assertIn("Filter", pages[0].text)
+
+        with mock.patch("chatbot.pdf_extraction.extract_page_range") as extract:
+            self.assertEqual(extract_pdf(pdf, cache=self.cache), pages)
+        extract.assert_not_called()
+
+    def test_broken_cache_file_is_a_miss(self):
+        self.cache.put("key", [PageText(page=1, text="Filter")])
+        self.assertEqual(self.cache.get("key"), [PageText(page=1, text="Filter")])
+        (self.dir / "cache" / "key.json").write_text("{not json", encoding="utf-8")
+        self.assertIsNone(self.cache.get("key"))
+
+
+class ExtractPdfsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.cache = ExtractionCache(self.dir / "cache")
+
+    def test_split_pages_are_returned_in_order(self):
+        texts = [f"Page{i}" for i in range(1, 8)]
+        pdf = write_pdf(self.dir / "manual.pdf", texts)
+
+        results = list(extract_pdfs([pdf], max_workers=2, pages_per_task=2, cache=self.cache))
+
+        self.assertEqual(len(results), 1)
+        path, pages = results[0]
+        self.assertEqual(path, pdf)
+        self.assertEqual([page.page for page in pages], list(range(1, 8)))
+        self.assertEqual([page.text.strip() for page in pages], texts)
+        # 합친 결과를 캐시에 저장
+        self.assertEqual(self.cache.get(ExtractionCache.file_key(pdf)), pages)
+
+    def test_every_file_is_reported(self):
+        first = write_pdf(self.dir / "a.pdf", ["Filter", "Power"])
+        second = write_pdf(self.dir / "b.pdf", ["Noise"])
+        broken = self.dir / "c.pdf"
+        broken.write_bytes(b"not a pdf")
+        missing = str(self.dir / "missing.pdf")
+
+        results = dict(
+            extract_pdfs(
+                [first, second, str(broken), missing],
+                max_workers=2,
+                pages_per_task=1,
+                cache=self.cache,
+            )
+        )
+
+        self.assertEqual([page.page for page in results[first]], [1, 2])
+        self.assertEqual([page.page for page in results[second]], [1])
+        self.assertIsInstance(results[str(broken)], ExtractionFailed)
+        self.assertIsInstance(results[missing], ExtractionFailed)
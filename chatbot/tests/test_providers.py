@@ -0,0 +1,172 @@
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase
+import numpy as np
+from langchain_core.messages import HumanMessage, SystemMessage
+from chatbot.providers import (
+    EchoChatModel,
+    FixtureWebSearch,
+    HashEmbeddings,
+    InMemoryIndex,
+    InMemoryPinecone,
+    get_embeddings,
+    get_llm,
+    get_vector_client,
+    get_web_search,
+)
+
+FIXTURES = [
+    {"title": "건조기 필터 청소", "content": "건조기 먼지 필터를 매번 청소하세요", "url": "https://a"},
+    {"title": "세탁기 설치", "content": "세탁기는 수평인 바닥에 설치하세요", "url": "https://b"},
+    {"title": "보증 기간", "content": "무상 보증은 1년입니다", "url": "https://c"},
+]
+
+
+class HashEmbeddingsTests(SimpleTestCase):
+    def test_deterministic_unit_vectors(self):
+        embeddings = HashEmbeddings(size=64)
+        first, second = embeddings.embed_documents(["건조기 필터 청소", "건조기 필터 청소"])
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 64)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+
+    def test_overlapping_text_is_closer(self):
+        embeddings = HashEmbeddings()
+        query = np.array(embeddings.embed_query("건조기 필터 청소 방법"))
+        near, far = np.array(embeddings.embed_documents(["건조기 필터 청소", "무상 보증 기간"]))
+        self.assertGreater(query @ near, query @ far)
+
+
+class EchoChatModelTests(SimpleTestCase):
+    def test_analysis_prompt_returns_keyword_json(self):
+        messages = [
+            SystemMessage('질문을 분석해서 {"keywords": [...]} 형식으로 답하세요'),
+            HumanMessage("질문: 건조기 필터 청소 건조기"),
+        ]
+        data = json.loads(EchoChatModel().invoke(messages).content)
+        self.assertEqual(data["keywords"][0], "건조기")
+        self.assertEqual(data["main_topic"], "건조기 필터 청소 건조기")
+
+    def test_echoes_context_within_max_chars(self):
+        model = EchoChatModel(max_chars=12)
+        reply = model.invoke([HumanMessage("질문: 필터\n컨텍스트: 먼지 필터를 매번 청소하세요")])
+        self.assertEqual(reply.content, "먼지 필터를 매번 청소")
+
+    def test_async_latency(self):
+        model = EchoChatModel(latency=0.2)
+
+        async def call_twice():
+            return await asyncio.gather(model.ainvoke("a"), model.ainvoke("b"))
+
+        started = time.perf_counter()
+        replies = asyncio.run(call_twice())
+        # 비동기 지연은 이벤트 루프를 막지 않아서 동시에 기다림
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual([reply.content for reply in replies], ["a", "b"])
+
+
+class FixtureWebSearchTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "fixtures.json"
+        self.path.write_text(json.dumps(FIXTURES, ensure_ascii=False), encoding="utf-8")
+
+    def test_ranks_by_word_overlap(self):
+        search = FixtureWebSearch(str(self.path), max_results=2)
+        result = search.invoke({"query": "건조기 먼지 필터"})
+        self.assertEqual(result["query"], "건조기 먼지 필터")
+        self.assertEqual([item["url"] for item in result["results"]], ["https://a"])
+
+    def test_missing_fixture_file_returns_nothing(self):
+        search = FixtureWebSearch(str(self.path.with_name("missing.json")))
+        self.assertEqual(asyncio.run(search.ainvoke({"query": "건조기"}))["results"], [])
+
+
+class InMemoryIndexTests(SimpleTestCase):
+    def test_cosine_query_orders_by_similarity(self):
+        index = InMemoryIndex("test", dimension=2)
+        index.upsert(
+            [
+                {"id": "x", "values": [1, 0], "metadata": {"model": "M-100"}},
+                ("diag", [1, 1], {"model": "M-200"}),
+                ("y", [0, 3]),
+            ]
+        )
+        result = index.query([2, 0.1], top_k=2, include_metadata=True)
+        self.assertEqual([match.id for match in result.matches], ["x", "diag"])
+        self.assertEqual(result.matches[0].metadata, {"model": "M-100"})
+        self.assertAlmostEqual(result["matches"][1]["score"], 0.7416, places=3)
+
+    def test_euclidean_scores_are_squared_distances(self):
+        index = InMemoryIndex("test", dimension=2, metric="euclidean")
+        index.upsert([("a", [0, 0]), ("b", [3, 4])])
+        matches = index.query([3, 3], top_k=2).matches
+        self.assertEqual([(m.id, m.score) for m in matches], [("b", 1.0), ("a", 18.0)])
+
+    def test_delete_list_and_stats(self):
+        index = InMemoryIndex("test", dimension=1)
+        index.upsert([(f"doc#{i}", [i + 1]) for i in range(5)] + [("other", [1])])
+        self.assertEqual(
+            list(index.list(prefix="doc#", limit=2)),
+            [["doc#0", "doc#1"], ["doc#2", "doc#3"], ["doc#4"]],
+        )
+        index.delete(ids=["doc#0", "doc#1"])
+        self.assertEqual(index.describe_index_stats().total_vector_count, 4)
+        index.delete(delete_all=True)
+        self.assertEqual(index.query([1]).matches, [])
+
+    def test_dimension_mismatch_is_rejected(self):
+        index = InMemoryIndex("test", dimension=3)
+        with self.assertRaises(ValueError):
+            index.upsert([("a", [1, 2])])
+
+
+class InMemoryPineconeTests(SimpleTestCase):
+    def setUp(self):
+        self.client = InMemoryPinecone()
+        self.addCleanup(self.client.delete_index, "shared")
+
+    def test_indexes_are_shared_across_clients(self):
+        self.client.create_index("shared", dimension=2)
+        self.client.Index("shared").upsert([("a", [1, 0])])
+
+        other = InMemoryPinecone()
+        self.assertTrue(other.has_index("shared"))
+        self.assertEqual(other.Index("shared").describe_index_stats().total_vector_count, 1)
+        with self.assertRaises(ValueError):
+            other.create_index("shared", dimension=2)
+
+    def test_missing_index(self):
+        with self.assertRaises(ValueError):
+            self.client.Index("missing")
+
+
+class BackendSelectionTests(SimpleTestCase):
+    @mock.patch("chatbot.providers.cached_embeddings", side_effect=lambda model, e: (model, e))
+    def test_hash_embeddings_are_cached_under_their_own_key(self, cached):
+        model, embeddings = get_embeddings("text-embedding-3-small", backend="hash", latency=0.5)
+        self.assertEqual(model, "hash:text-embedding-3-small")
+        self.assertIsInstance(embeddings, HashEmbeddings)
+        self.assertEqual(embeddings.latency, 0.5)
+
+    def test_offline_backends(self):
+        self.assertIsInstance(get_llm("gpt-4o-mini", backend="echo"), EchoChatModel)
+        search = get_web_search(max_results=3, backend="fixture", fixtures="", latency=0)
+        self.assertIsInstance(search, FixtureWebSearch)
+        self.assertEqual(search.max_results, 3)
+        self.assertIsInstance(get_vector_client(backend="memory"), InMemoryPinecone)
+
+    def test_unknown_backend_is_rejected(self):
+        for factory in (
+            lambda: get_embeddings("model", backend="nope"),
+            lambda: get_llm("model", backend="nope"),
+            lambda: get_web_search(backend="nope"),
+            lambda: get_vector_client(backend="nope"),
+        ):
+            with self.assertRaises(ValueError):
+                factory()
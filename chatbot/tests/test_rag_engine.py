@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+from chatbot import rag_engine, runtime
+from chatbot.prompts import create_analysis_prompt, create_cot_prompt
+from chatbot.providers import EchoChatModel, FixtureWebSearch
+from chatbot.views import sse_event
+
+MANUAL = Document(
+    page_content="필터는 한 달에 한 번 물로 씻어 주세요.",
+    metadata={"source": "manual.pdf", "page": 3},
+)
+
+
+def sync_call(_):
+    raise AssertionError("동기 invoke가 호출됨")
+
+
+async def search_manuals(keyword):
+    return [MANUAL]
+
+
+def offline_runtime(**overrides):
+    """네트워크 없이 도는 RAGRuntime 대역 (검색기는 ainvoke만 허용)"""
+    llm = EchoChatModel()
+    attrs = dict(
+        retriever=RunnableLambda(sync_call, afunc=search_manuals),
+        llm=llm,
+        analysis_chain=create_analysis_prompt() | llm | StrOutputParser(),
+        cot_prompt=create_cot_prompt(),
+        tavily_tool=FixtureWebSearch(),
+        speculative=False,
+        time_budget=None,
+        answer_cache=None,
+        image_catalog=None,
+    )
+    attrs.update(overrides)
+    return SimpleNamespace(**attrs)
+
+
+def run_with_runtime(rag_runtime, coroutine_function, *args, **kwargs):
+    async def main():
+        runtime.use_runtime(rag_runtime)
+        return await coroutine_function(*args, **kwargs)
+
+    return asyncio.run(main())
+
+
+class AsyncPipelineTests(SimpleTestCase):
+    def test_answer_uses_async_clients(self):
+        answer = run_with_runtime(offline_runtime(), rag_engine.arun_chatbot, "필터 청소 주기")
+        # 에코 LLM은 프롬프트의 컨텍스트를 그대로 돌려줌
+        self.assertIn(MANUAL.page_content, answer)
+
+    def test_retrieval_errors_do_not_fail_the_answer(self):
+        async def broken(keyword):
+            raise ConnectionError("vector store down")
+
+        rag_runtime = offline_runtime(retriever=RunnableLambda(sync_call, afunc=broken))
+        answer = run_with_runtime(rag_runtime, rag_engine.arun_chatbot, "필터 청소 주기")
+        self.assertIsInstance(answer, str)
+        self.assertNotIn(MANUAL.page_content, answer)
+
+
+def collect_events(rag_runtime, query):
+    async def main():
+        runtime.use_runtime(rag_runtime)
+        return [event async for event in rag_engine.astream_chatbot(query)]
+
+    return asyncio.run(main())
+
+
+class StreamingTests(SimpleTestCase):
+    def test_status_events_precede_tokens(self):
+        events = collect_events(offline_runtime(), "필터 청소 주기")
+
+        self.assertEqual(events[0], {"type": "status", "stage": "retrieval"})
+        self.assertEqual((events[1]["type"], events[1]["stage"]), ("status", "generation"))
+        self.assertEqual(events[1]["context_count"], 1)
+        tokens = events[2:]
+        self.assertTrue(tokens)
+        self.assertTrue(all(event["type"] == "token" for event in tokens))
+        self.assertIn(MANUAL.page_content, "".join(event["content"] for event in tokens))
+
+    def test_sse_event_format(self):
+        self.assertEqual(
+            sse_event({"type": "token", "content": "안녕"}),
+            'data: {"type": "token", "content": "안녕"}\n\n',
+        )
+
+
+class SpeculativeRetrievalTests(SimpleTestCase):
+    def retrieve(self, retriever, llm, web_search, time_budget=None):
+        async def main():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            result = await rag_engine.speculative_retrieve_async(
+                "필터 청소 주기", retriever, llm, web_search, time_budget=time_budget
+            )
+            return result, loop.time() - started
+
+        return asyncio.run(main())
+
+    def test_analysis_keywords_are_searched_once(self):
+        searched = []
+
+        async def search(keyword):
+            searched.append(keyword)
+            return [MANUAL]
+
+        (docs, analysis), _ = self.retrieve(
+            RunnableLambda(sync_call, afunc=search), EchoChatModel(), FixtureWebSearch()
+        )
+
+        # 원 질문 검색은 분석과 동시에 시작하고, 분석 키워드는 한 번씩만 추가 검색
+        self.assertEqual(searched[0], "필터 청소 주기")
+        self.assertEqual(len(searched), len(set(searched)))
+        self.assertGreater(len(searched), 1)
+        self.assertIn('"keywords"', analysis)
+        # 같은 문서는 한 번만
+        self.assertEqual(docs, [MANUAL])
+
+    def test_slow_analysis_is_cut_at_time_budget(self):
+        (docs, analysis), elapsed = self.retrieve(
+            RunnableLambda(sync_call, afunc=search_manuals),
+            EchoChatModel(latency=5),
+            FixtureWebSearch(latency=5),
+            time_budget=0.2,
+        )
+
+        self.assertLess(elapsed, 1)
+        # 분석/웹 검색은 잘렸지만 원 질문 검색 결과로 진행
+        self.assertEqual((docs, analysis), ([MANUAL], ""))
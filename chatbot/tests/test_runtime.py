@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from unittest import mock
+from django.test import SimpleTestCase
+from chatbot import runtime
+
+
+@mock.patch("chatbot.runtime.RAGRuntime", side_effect=lambda: object())
+class RuntimeRegistryTests(SimpleTestCase):
+    def setUp(self):
+        runtime.reset_runtime()
+        self.addCleanup(runtime.reset_runtime)
+
+    def test_runtime_is_built_once_per_process(self, factory):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(runtime.get_runtime()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_reset_rebuilds_runtime(self, factory):
+        first = runtime.get_runtime()
+        runtime.reset_runtime()
+        self.assertIsNot(runtime.get_runtime(), first)
+        self.assertEqual(factory.call_count, 2)
+
+    def test_set_runtime_replaces_process_runtime(self, factory):
+        custom = object()
+        runtime.set_runtime(custom)
+        self.assertIs(runtime.get_runtime(), custom)
+        factory.assert_not_called()
+
+    def test_use_runtime_is_scoped_to_context(self, factory):
+        process_runtime = runtime.get_runtime()
+        worker_runtime = object()
+
+        async def worker():
+            runtime.use_runtime(worker_runtime)
+            return runtime.get_runtime(), await runtime.aget_runtime()
+
+        # asyncio.run은 복사한 컨텍스트에서 돌기 때문에 밖에서는 원래 런타임
+        self.assertEqual(asyncio.run(worker()), (worker_runtime, worker_runtime))
+        self.assertIs(runtime.get_runtime(), process_runtime)
@@ -0,0 +1,113 @@
+import json
+import socket
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from chatbot import telemetry
+from chatbot.telemetry import Counter, Histogram
+
+
+class RenderTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative_across_processes(self):
+        histogram = Histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1))
+        histogram.observe(0.05, stage="search")
+        histogram.observe(0.5, stage="search")
+        other = Histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1))
+        other.observe(3, stage="search")
+
+        lines = histogram.render([histogram.snapshot(), other.snapshot()])
+
+        self.assertEqual(
+            lines,
+            [
+                "# HELP stage_seconds Stage latency",
+                "# TYPE stage_seconds histogram",
+                'stage_seconds_bucket{stage="search",le="0.1"} 1',
+                'stage_seconds_bucket{stage="search",le="1"} 2',
+                'stage_seconds_bucket{stage="search",le="+Inf"} 3',
+                'stage_seconds_sum{stage="search"} 3.55',
+                'stage_seconds_count{stage="search"} 3',
+            ],
+        )
+
+    def test_counter_sums_processes_per_label(self):
+        first = Counter("tokens_total", "Tokens", ["kind"])
+        second = Counter("tokens_total", "Tokens", ["kind"])
+        first.inc(10, kind="prompt")
+        second.inc(5, kind="prompt")
+        second.inc(2, kind="completion")
+
+        lines = first.render([first.snapshot(), second.snapshot()])
+
+        self.assertEqual(
+            lines[2:], ['tokens_total{kind="completion"} 2', 'tokens_total{kind="prompt"} 15']
+        )
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("hits_total", "Hits", ["endpoint"])
+        counter.inc(endpoint='say "hi"\\\n')
+        self.assertEqual(
+            counter.render([counter.snapshot()])[2], 'hits_total{endpoint="say \\"hi\\"\\\\\\n"} 1'
+        )
+
+
+class MultiprocessTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        patcher = mock.patch("chatbot.telemetry.METRICS_DIR", tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_snapshot(self, name, prompt_tokens):
+        (self.dir / name).write_text(
+            json.dumps({"rag_tokens_total": {json.dumps(["prompt"]): prompt_tokens}})
+        )
+
+    def prompt_tokens(self):
+        for line in telemetry.render_metrics().splitlines():
+            if line.startswith('rag_tokens_total{kind="prompt"}'):
+                return float(line.split()[-1])
+        return 0
+
+    def test_render_sums_snapshot_files(self):
+        self.write_snapshot("metrics_web_1.json", 10)
+        self.write_snapshot("metrics_worker_2.json", 5)
+        own = telemetry.TOKENS.snapshot().get(json.dumps(["prompt"]), 0)
+        self.assertEqual(self.prompt_tokens(), 15 + own)
+
+    def test_clear_removes_previous_runs(self):
+        self.write_snapshot("metrics_web_1.json", 10)
+        telemetry.clear_metrics()
+        self.assertEqual(list(self.dir.glob("metrics_*")), [])
+
+    def test_clear_host_keeps_other_hosts(self):
+        host = socket.gethostname()
+        self.write_snapshot(f"metrics_{host}_1.json", 10)
+        self.write_snapshot("metrics_otherhost_2.json", 5)
+        telemetry.clear_metrics(host=host)
+        self.assertEqual([path.name for path in self.dir.iterdir()], ["metrics_otherhost_2.json"])
+
+
+class MetricsViewTests(SimpleTestCase):
+    @override_settings(METRICS_TOKEN="secret")
+    def test_requires_bearer_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 401
+        )
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE rag_request_duration_seconds histogram", response.content.decode())
+
+    @override_settings(METRICS_TOKEN="", DEBUG=False)
+    def test_hidden_without_token_in_production(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=True)
+    def test_open_without_token_in_debug(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
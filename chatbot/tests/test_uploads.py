@@ -0,0 +1,122 @@
+import asyncio
+import json
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from chatbot import views
+from chatbot.uploads import UploadLimitASGIHandler
+
+
+@override_settings(MODEL_SEARCH_MAX_UPLOAD_BYTES=1000)
+@mock.patch("chatbot.views.search_vector_db_image", mock.Mock(return_value="M-100"))
+class UploadSizeTests(SimpleTestCase):
+    def post_image(self, size):
+        image = SimpleUploadedFile("plate.png", b"x" * size, content_type="image/png")
+        return self.client.post(reverse("model-search"), {"image": image})
+
+    def test_small_upload(self):
+        response = self.post_image(500)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"model_code": "M-100"})
+
+    def test_view_receives_upload_bytes(self):
+        self.post_image(500)
+        self.assertEqual(views.search_vector_db_image.call_args.args[0], b"x" * 500)
+
+    def test_content_length_over_limit(self):
+        self.assertEqual(self.post_image(5000).status_code, 413)
+
+    def test_body_over_limit_without_content_length(self):
+        # Content-Length로 거르지 못해도 핸들러가 받은 크기로 제한
+        with mock.patch("chatbot.views.upload_too_large", return_value=False):
+            self.assertEqual(self.post_image(5000).status_code, 413)
+
+    def test_limit_covers_all_files(self):
+        images = [
+            SimpleUploadedFile(name, b"x" * 600, content_type="image/png")
+            for name in ("front.png", "label.png")
+        ]
+        with mock.patch("chatbot.views.upload_too_large", return_value=False):
+            response = self.client.post(reverse("model-search-batch"), {"images": images})
+        self.assertEqual(response.status_code, 413)
+
+
+def call_asgi(path, body, chunk_size=None, content_length=True):
+    """UploadLimitASGIHandler로 요청 하나를 보내고 (상태 코드, 응답 본문, 읽은 청크 수)"""
+    chunk_size = chunk_size or len(body) or 1
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    headers = [(b"content-type", MULTIPART_CONTENT.encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+    read = []
+    sent = []
+
+    async def receive():
+        if len(read) < len(chunks):
+            read.append(chunks[len(read)])
+            return {
+                "type": "http.request",
+                "body": read[-1],
+                "more_body": len(read) < len(chunks),
+            }
+        # 본문을 다 보낸 뒤에는 연결을 유지 (disconnect 대기)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(UploadLimitASGIHandler()(scope, receive, send))
+    status = sent[0]["status"]
+    content = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, content, len(read)
+
+
+@override_settings(MODEL_SEARCH_MAX_UPLOAD_BYTES=4096, FILE_UPLOAD_MAX_MEMORY_SIZE=100)
+@mock.patch("chatbot.views.search_vector_db_image", mock.Mock(return_value="M-100"))
+class UploadLimitASGIHandlerTests(SimpleTestCase):
+    def body(self, size):
+        image = SimpleUploadedFile("plate.png", b"x" * size, content_type="image/png")
+        return encode_multipart(BOUNDARY, {"image": image})
+
+    def test_oversized_content_length_is_rejected_before_reading(self):
+        status, content, chunks_read = call_asgi(reverse("model-search"), self.body(8000))
+        self.assertEqual(status, 413)
+        self.assertEqual(json.loads(content), {"error": "Upload too large."})
+        self.assertEqual(chunks_read, 0)
+
+    def test_body_without_content_length_stops_at_limit(self):
+        body = self.body(8000)
+        status, _, chunks_read = call_asgi(
+            reverse("model-search"), body, chunk_size=1024, content_length=False
+        )
+        self.assertEqual(status, 413)
+        self.assertLess(chunks_read, len(body) // 1024)
+
+    def test_body_over_file_upload_memory_size_stays_in_memory(self):
+        # SpooledTemporaryFile은 max_size를 넘으면 TemporaryFile로 옮겨 씀
+        with mock.patch("tempfile.TemporaryFile", side_effect=AssertionError("spooled to disk")):
+            status, content, _ = call_asgi(reverse("model-search"), self.body(2000), 256)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(content), {"model_code": "M-100"})
+
+    def test_other_routes_are_not_limited(self):
+        # 크기와 상관없이 본문을 다 받아서 Django로 넘김 (여기서는 CSRF 검사에서 403)
+        body = self.body(8000)
+        status, _, chunks_read = call_asgi("/no-such-page/", body, 1024)
+        self.assertEqual(status, 403)
+        self.assertEqual(chunks_read, -(-len(body) // 1024))
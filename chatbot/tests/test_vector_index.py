@@ -0,0 +1,94 @@
+import tempfile
+from types import SimpleNamespace
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from django.urls import reverse
+import numpy as np
+from chatbot import runtime
+from chatbot.providers import HashEmbeddings
+from chatbot.rag_indexer_class import IndexConfig, RAGIndexer
+from chatbot.runtime import RAGRuntime
+from chatbot.vector_index import VectorIndex
+
+
+class FakeCollection:
+    def __init__(self, ids, embeddings, metadatas):
+        self.data = {"ids": ids, "embeddings": embeddings, "metadatas": metadatas}
+
+    def get(self, include=None):
+        return self.data
+
+
+class VectorIndexTests(SimpleTestCase):
+    def test_matches_brute_force_squared_l2(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(50, 8)).astype(np.float32)
+        queries = rng.normal(size=(5, 8)).astype(np.float32)
+        index = VectorIndex(
+            [f"id-{i}" for i in range(50)], vectors, [{"n": i} for i in range(50)]
+        )
+
+        for query, matches in zip(queries, index.search_batch(queries, k=3)):
+            expected = ((vectors - query) ** 2).sum(axis=1)
+            nearest = np.argsort(expected)[:3]
+            self.assertEqual([match.metadata["n"] for match in matches], nearest.tolist())
+            self.assertAlmostEqual(matches[0].distance, float(expected[nearest[0]]), places=4)
+
+    def test_empty_collection_returns_no_hits(self):
+        # Chroma는 빈 컬렉션의 임베딩을 None이나 빈 목록으로 돌려줌
+        for embeddings in (None, [], np.zeros((0, 8))):
+            index = VectorIndex.from_collection(FakeCollection([], embeddings, []))
+            self.assertEqual(len(index), 0)
+            self.assertEqual(index.search([0.1] * 8), [])
+            self.assertEqual(index.search_batch([[0.1] * 8, [0.2] * 8], k=3), [[], []])
+
+
+class EmptyImageCollectionTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.indexer = RAGIndexer(
+            IndexConfig(persistent_directory=tmp.name, collection_name="imgs"),
+            embeddings=HashEmbeddings(),
+        )
+
+    def test_search_returns_minus_one(self):
+        self.assertEqual(self.indexer.search_and_show_batch(["aGVsbG8=", "d29ybGQ="]), [-1, -1])
+
+    def test_model_search_view_returns_minus_one(self):
+        runtime.set_runtime(SimpleNamespace(image_catalog=None, image_indexer=self.indexer))
+        self.addCleanup(runtime.reset_runtime)
+
+        image = SimpleUploadedFile("plate.png", b"\x89PNG\r\n\x1a\n" + b"\0" * 64)
+        response = self.client.post(reverse("model-search"), {"image": image})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"model_code": -1})
+
+
+class ImageIndexWarmupTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.indexer = RAGIndexer(
+            IndexConfig(persistent_directory=tmp.name, collection_name="imgs"),
+            embeddings=HashEmbeddings(),
+        )
+        self.indexer.vectordb.add_texts(["aGVsbG8="], metadatas=[{"model_name": "M-100"}])
+        # 클라이언트를 만들지 않고 이미지 검색 부분만 있는 런타임
+        self.runtime = RAGRuntime.__new__(RAGRuntime)
+        self.runtime.image_indexer = self.indexer
+        self.runtime.catalog_file = None
+        runtime.set_runtime(self.runtime)
+        self.addCleanup(runtime.reset_runtime)
+
+    def test_warmup_loads_the_image_index(self):
+        self.assertIsNone(self.indexer._vector_index)
+        runtime.warmup()
+        self.assertEqual(len(self.indexer._vector_index), 1)
+        self.assertEqual(self.indexer.search_and_show("aGVsbG8="), "M-100")
+
+    def test_local_catalog_skips_the_image_index(self):
+        self.runtime.catalog_file = SimpleNamespace(get=lambda: object())
+        runtime.warmup()
+        self.assertIsNone(self.indexer._vector_index)
@@ -0,0 +1,16 @@
+import re
+
+# 한글/한자/가나 글자 (cl100k 기준 대략 글자당 1토큰)
+_WIDE_CHARS = re.compile(r"[ᄀ-ᇿ぀-ヿ㄰-㆏一-鿿가-힯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 계산하는 대략적인 토큰 수
+
+    한글 등은 글자당 1토큰, 나머지(영문/숫자/기호/공백)는 4글자당 1토큰으로 센다.
+    예산 배분/통계용이라 정확한 값이 아니라 같은 기준으로 비교할 수 있으면 된다.
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + (len(text) - wide + 3) // 4
@@ -0,0 +1,151 @@
+import tempfile
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import RequestAborted
+from django.core.files.uploadhandler import MemoryFileUploadHandler, StopUpload
+from django.core.handlers.asgi import ASGIHandler
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+# 업로드 본문을 메모리로만 받는 경로 (URL 이름)
+MEMORY_UPLOAD_ROUTES = {"model-search", "model-search-batch"}
+
+# 현재 요청 본문을 메모리로 받을 최대 크기 (UploadLimitASGIHandler.handle에서 설정)
+_body_limit: ContextVar = ContextVar("upload_body_limit", default=None)
+
+
+class BodyTooLarge(Exception):
+    """본문이 MEMORY_UPLOAD_ROUTES의 크기 제한을 넘음"""
+
+
+class InMemoryUploadHandler(MemoryFileUploadHandler):
+    """업로드 크기와 상관없이 항상 메모리에 받는 업로드 핸들러
+
+    기본 설정에서는 FILE_UPLOAD_MAX_MEMORY_SIZE(2.5MB)를 넘는 파일이 핸들러 단계에서
+    임시 파일로 디스크에 쓰인다. 대신 받은 파일 크기의 합을 max_bytes로 제한하고,
+    넘으면 나머지 본문을 읽지 않고 업로드를 멈춘다 (exceeded로 확인).
+
+    ASGI에서는 Django가 뷰를 호출하기 전에 본문 전체를 받아 두므로, 그 단계의
+    디스크 쓰기는 UploadLimitASGIHandler가 막는다.
+    """
+
+    def __init__(self, request=None, max_bytes: int = 0):
+        super().__init__(request)
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.exceeded = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.activated = True
+
+    def receive_data_chunk(self, raw_data, start):
+        # Content-Length가 없거나 틀린 요청도 실제로 받은 크기로 제한
+        self.received += len(raw_data)
+        if self.max_bytes and self.received > self.max_bytes:
+            self.exceeded = True
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+class UploadLimitASGIHandler(ASGIHandler):
+    """모델 검색 경로의 본문을 디스크 없이 크기 제한을 걸어 받는 ASGI 핸들러
+
+    기본 ASGIHandler는 뷰를 호출하기 전에 본문 전체를 받아 두고, 본문이
+    FILE_UPLOAD_MAX_MEMORY_SIZE(2.5MB)를 넘으면 임시 파일에 쓴다. MEMORY_UPLOAD_ROUTES
+    요청은 Content-Length가 MODEL_SEARCH_MAX_UPLOAD_BYTES를 넘으면 본문을 읽지 않고
+    413으로 응답하고, 그 이하는 메모리에만 받는다. Content-Length가 없으면 받으면서
+    세다가 제한을 넘는 순간 멈춘다.
+    """
+
+    async def handle(self, scope, receive, send):
+        if not is_memory_upload_route(scope):
+            return await super().handle(scope, receive, send)
+
+        limit = settings.MODEL_SEARCH_MAX_UPLOAD_BYTES
+        if content_length(scope) > limit:
+            return await self.send_response(upload_too_large_response(), send)
+
+        token = _body_limit.set(limit)
+        try:
+            await super().handle(scope, receive, send)
+        except BodyTooLarge:
+            await self.send_response(upload_too_large_response(), send)
+        finally:
+            _body_limit.reset(token)
+
+    async def read_body(self, receive):
+        limit = _body_limit.get()
+        if limit is None:
+            return await super().read_body(receive)
+
+        # max_size를 제한 크기로 올려서 디스크로 넘어가지 않게 함
+        body_file = tempfile.SpooledTemporaryFile(max_size=limit, mode="w+b")
+        received = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body_file.close()
+                raise RequestAborted()
+            if "body" in message:
+                received += len(message["body"])
+                if received > limit:
+                    body_file.close()
+                    raise BodyTooLarge()
+                body_file.write(message["body"])
+            if not message.get("more_body", False):
+                break
+        body_file.seek(0)
+        return body_file
+
+
+def is_memory_upload_route(scope) -> bool:
+    if scope["type"] != "http":
+        return False
+    path = scope["path"].removeprefix(scope.get("root_path", ""))
+    try:
+        return resolve(path).url_name in MEMORY_UPLOAD_ROUTES
+    except Resolver404:
+        return False
+
+
+def content_length(scope) -> int:
+    """ASGI 헤더의 Content-Length (없으면 0, 숫자가 아니면 제한보다 큰 값으로 취급)"""
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return settings.MODEL_SEARCH_MAX_UPLOAD_BYTES + 1
+    return 0
+
+
+def upload_too_large_response() -> JsonResponse:
+    return JsonResponse({"error": "Upload too large."}, status=413)
+
+
+def upload_too_large(request) -> bool:
+    """Content-Length 헤더 기준으로 본문을 읽기 전에 크기 초과 판단
+
+    헤더가 없으면 여기서는 통과시키고, 실제 크기는 use_memory_uploads의 핸들러가
+    받으면서 제한한다 (request.FILES 접근 후 upload_exceeded로 확인).
+    """
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return True
+    return content_length > settings.MODEL_SEARCH_MAX_UPLOAD_BYTES
+
+
+def use_memory_uploads(request) -> None:
+    """이 요청의 업로드를 메모리로만, MODEL_SEARCH_MAX_UPLOAD_BYTES까지 받도록 설정
+
+    request.FILES 접근 전에 호출한다.
+    """
+    request.upload_handlers = [
+        InMemoryUploadHandler(request, max_bytes=settings.MODEL_SEARCH_MAX_UPLOAD_BYTES)
+    ]
+
+
+def upload_exceeded(request) -> bool:
+    """use_memory_uploads로 받은 업로드가 크기 제한을 넘어서 중간에 멈췄는지 여부"""
+    return any(getattr(handler, "exceeded", False) for handler in request.upload_handlers)
@@ -1,10 +1,13 @@
 from django.urls import path
-from .views import ChatBotView, ModelSearchView, ConversationView, MessageView, ConversationDetailView
+from .views import ChatBotView, ModelSearchView, ModelBatchSearchView, ConversationView, MessageView, MessageStreamView, JobView, ConversationDetailView
 
 urlpatterns = [
     path("chat/", ChatBotView.as_view(), name="chat"),
     path("model-search/", ModelSearchView.as_view(), name="model-search"),
+    path("model-search/batch/", ModelBatchSearchView.as_view(), name="model-search-batch"),
     path("conversations/", ConversationView.as_view(), name="conversations"),
     path("conversations/<int:conversation_id>/", ConversationDetailView.as_view(), name="conversation-detail"),
     path("conversations/<int:conversation_id>/messages/", MessageView.as_view(), name="messages"),
+    path("conversations/<int:conversation_id>/messages/stream/", MessageStreamView.as_view(), name="messages-stream"),
+    path("jobs/<uuid:job_id>/", JobView.as_view(), name="job"),
 ]
@@ -8,6 +8,23 @@ def image_to_base64(image_path):
         return base64.b64encode(f.read()).decode("utf-8")
 
 
+def image_head_to_base64(image, length: int = 800) -> str:
+    """이미지 앞부분만 읽어서 base64 앞 length 글자 생성
+
+    image_to_base64(...)[:length]와 같은 결과지만 파일 전체를 읽고 인코딩하지 않는다.
+    image는 경로, 파일 객체, bytes/memoryview 중 하나.
+    """
+    size = (length + 3) // 4 * 3
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        head = bytes(image[:size])
+    elif isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            head = f.read(size)
+    else:
+        head = image.read(size)
+    return base64.b64encode(head).decode("utf-8")[:length]
+
+
 def summarize_image(image_path: str, base_dir: str = "") -> str:
     """이미지 파일명에서 확장자 제거하여 요약 생성"""
     if base_dir:
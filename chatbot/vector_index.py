@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+
+@dataclass
+class VectorMatch:
+    """검색 결과 한 건 (distance는 Chroma 기본값과 같은 제곱 L2 거리)"""
+
+    id: str
+    distance: float
+    metadata: Dict[str, Any]
+
+
+class VectorIndex:
+    """읽기 전용 메모리 최근접 이웃 인덱스
+
+    전체 임베딩을 연속된 float32 행렬 하나에 올려두고 행렬-벡터 곱 한 번으로
+    모든 거리를 계산한다. 만든 뒤에는 바꾸지 않으므로 재인덱싱할 때는 새 인덱스를
+    만들어 참조만 교체하면 되고, 조회 중인 요청은 잠금 없이 기존 인덱스를 계속 쓴다.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        vectors,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ):
+        self.ids = list(ids)
+        self.metadatas = list(metadatas) if metadatas is not None else [{} for _ in self.ids]
+        if not self.ids:
+            # 빈 컬렉션은 임베딩이 None이나 []로 와서 차원을 알 수 없음 (검색 결과 없음)
+            dimension = np.shape(vectors)[-1] if np.ndim(vectors) == 2 else 0
+            self.vectors = np.zeros((0, dimension), np.float32)
+        else:
+            self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            if self.vectors.ndim != 2:
+                self.vectors = self.vectors.reshape(len(self.ids), -1)
+        # |v|² 는 미리 계산 (|q - v|² = |q|² + |v|² - 2 q·v)
+        self._sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_collection(cls, collection) -> "VectorIndex":
+        """Chroma 컬렉션 전체를 읽어서 인덱스 생성"""
+        data = collection.get(include=["embeddings", "metadatas"])
+        return cls(data["ids"], np.asarray(data["embeddings"]), data["metadatas"])
+
+    def distances(self, queries) -> np.ndarray:
+        """(질의 수, 문서 수) 제곱 L2 거리 행렬"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        distances = q_norms[:, None] + self._sq_norms[None, :] - 2.0 * (queries @ self.vectors.T)
+        return np.maximum(distances, 0.0)
+
+    def search_batch(self, queries, k: int = 1) -> List[List[VectorMatch]]:
+        """질의 여러 개를 행렬 곱 한 번으로 검색 (질의마다 가까운 순 k개)"""
+        if not self.ids:
+            return [[] for _ in np.atleast_2d(queries)]
+        distances = self.distances(queries)
+
+        k = min(k, len(self.ids))
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(distances, top):
+            candidates = candidates[np.argsort(row[candidates])]
+            results.append(
+                [
+                    VectorMatch(self.ids[i], float(row[i]), self.metadatas[i] or {})
+                    for i in candidates
+                ]
+            )
+        return results
+
+    def search(self, query, k: int = 1) -> List[VectorMatch]:
+        """질의 하나 검색"""
+        return self.search_batch([query], k=k)[0]
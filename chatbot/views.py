@@ -1,25 +1,105 @@
-import os
+import hmac
 import json
-from django.http import JsonResponse, HttpResponseBadRequest
+from contextlib import aclosing
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.shortcuts import get_object_or_404
-from .models import Conversation, Message, UploadedImage
-from .rag_engine import run_chatbot, search_vector_db_image
+from django.shortcuts import get_object_or_404, aget_object_or_404
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Substr
+from .models import Conversation, GenerationJob, Message, UploadedImage
+from django.conf import settings
+from django.core.cache import cache
+from .cache import alist_cache_key, list_cache_key
+from .conversations import message_count
+from .pagination import InvalidCursor, akeyset_page, keyset_page, page_size
+from .image_search import ImageTooLarge
+from .uploads import (
+    upload_exceeded,
+    upload_too_large,
+    upload_too_large_response,
+    use_memory_uploads,
+)
+from . import jobs
+from .telemetry import Trace, render_metrics
+from .rag_engine import arun_chatbot, search_vector_db_image, search_vector_db_images
+
+
+def message_to_dict(msg):
+    return {
+        'id': msg.id,  # 아직 저장 전이면 None
+        'role': msg.role,
+        'content': msg.content,
+        'created_at': msg.created_at.isoformat()
+    }
+
+
+def job_to_dict(job):
+    data = {
+        "job_id": str(job.id),
+        "conversation_id": job.conversation_id,
+        "status": job.status,
+        "stage": job.stage,
+        "partial": job.partial,
+        "trace_id": job.trace_id,
+    }
+    if job.status == GenerationJob.DONE:
+        data["title"] = job.conversation.title
+        if job.user_message:
+            data["user_message"] = message_to_dict(job.user_message)
+        if job.assistant_message:
+            data["assistant_message"] = message_to_dict(job.assistant_message)
+    elif job.status == GenerationJob.FAILED:
+        # 실패한 질문은 저장되지 않으므로 클라이언트가 다시 보낼 수 있게 돌려줌
+        data["error"] = job.error
+        data["question"] = job.question
+    return data
+
+
+async def enqueue_message(request, user, conversation_id):
+    """요청 본문의 메시지로 답변 생성 작업 등록
+
+    (작업, 아직 저장 전인 사용자 메시지)를 반환하고, 메시지가 비어 있으면 (None, None).
+    질문/답변은 생성이 끝난 뒤 작업 워커가 함께 저장한다.
+    """
+    conversation = await aget_object_or_404(Conversation, id=conversation_id, user=user)
+    body = json.loads(request.body)
+    user_message = body.get("message", "")
+    if not user_message:
+        return None, None
+    
+    job = await sync_to_async(jobs.enqueue_generation)(conversation, user_message)
+    return job, Message(conversation=conversation, role='user', content=user_message)
+
+
+def traced_response(data, trace, **kwargs):
+    """trace_id를 본문과 X-Trace-ID 헤더에 담은 JSON 응답 (요청 trace 종료)"""
+    trace.finish()
+    response = JsonResponse({**data, "trace_id": trace.trace_id}, **kwargs)
+    response["X-Trace-ID"] = trace.trace_id
+    return response
+
+
+def sse_event(data):
+    """Server-Sent Events 형식의 한 이벤트"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @method_decorator(csrf_exempt, name="dispatch")
 class ChatBotView(View):
-    def post(self, request):
+    async def post(self, request):
         try:
             body = json.loads(request.body)
             query = body.get("query", "")
             history = body.get("history", [])
 
-            result = run_chatbot(query, history=history)
-            return JsonResponse({"response": result})
+            trace = Trace("chat")
+            result = await arun_chatbot(query, history=history, trace=trace)
+            return traced_response({"response": result}, trace)
 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
@@ -28,24 +108,62 @@ class ChatBotView(View):
 @method_decorator(csrf_exempt, name="dispatch")
 class ModelSearchView(View):
     def post(self, request):
+        # 본문을 읽기 전에 헤더로 크기 확인하고, 업로드는 크기 제한을 걸어 메모리로만 받음
+        if upload_too_large(request):
+            return upload_too_large_response()
+        use_memory_uploads(request)
+
         image_file = request.FILES.get("image")
+        if upload_exceeded(request):
+            return upload_too_large_response()
         if not image_file:
             return HttpResponseBadRequest("No image file uploaded.")
 
-        # 임시 저장
-        temp_path = f"/tmp/{image_file.name}"
-        with open(temp_path, "wb+") as f:
-            for chunk in image_file.chunks():
-                f.write(chunk)
-
         try:
-            model_code = search_vector_db_image(temp_path)
+            # 메모리로 받은 업로드를 임시 파일 없이 그대로 식별
+            model_code = search_vector_db_image(image_file.read())
             return JsonResponse({"model_code": model_code})
+        except ImageTooLarge as e:
+            return JsonResponse({"error": str(e)}, status=413)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ModelBatchSearchView(View):
+    """이미지 여러 장(명판, 정면, 라벨 등)으로 모델 검색"""
+
+    def post(self, request):
+        if upload_too_large(request):
+            return upload_too_large_response()
+        use_memory_uploads(request)
+
+        image_files = request.FILES.getlist("images")
+        if upload_exceeded(request):
+            return upload_too_large_response()
+        if not image_files:
+            return HttpResponseBadRequest("No image files uploaded.")
+        if len(image_files) > settings.MODEL_SEARCH_MAX_IMAGES:
+            return HttpResponseBadRequest(
+                f"Too many images (max {settings.MODEL_SEARCH_MAX_IMAGES})."
+            )
+
+        try:
+            # 임시 파일 없이 업로드 버퍼를 그대로 식별
+            results, model_code = search_vector_db_images(
+                [image_file.read() for image_file in image_files]
+            )
+            return JsonResponse({
+                "model_code": model_code,
+                "results": [
+                    {"name": image_file.name, **result}
+                    for image_file, result in zip(image_files, results)
+                ],
+            })
+        except ImageTooLarge as e:
+            return JsonResponse({"error": str(e)}, status=413)
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -57,19 +175,57 @@ class ConversationView(View):
         if not request.user.is_authenticated:
             return JsonResponse({"error": "로그인이 필요합니다."}, status=401)
         
-        conversations = Conversation.objects.filter(user=request.user, is_active=True)
-        conversation_list = []
+        cursor = request.GET.get("cursor")
+        limit = page_size(request, settings.CONVERSATION_PAGE_SIZE)
         
-        for conv in conversations:
-            conversation_list.append({
-                'id': conv.id,
-                'title': conv.title,
-                'created_at': conv.created_at.isoformat(),
-                'updated_at': conv.updated_at.isoformat(),
-                'message_count': conv.messages.count()
-            })
+        # 사용자별 목록 캐시 (대화/메시지가 저장되면 무효화)
+        key = list_cache_key(request.user.id, "conversations", cursor, limit)
+        data = cache.get(key) if key else None
+        if data is None:
+            try:
+                data = self.conversation_page(request.user, cursor, limit)
+            except InvalidCursor as e:
+                return JsonResponse({"error": str(e)}, status=400)
+            if key:
+                cache.set(key, data, settings.CONVERSATION_CACHE_TTL)
+        return JsonResponse(data)
+    
+    def conversation_page(self, user, cursor, limit):
+        # 메시지 수와 마지막 메시지 미리보기를 상관 서브쿼리로 한 번에 조회
+        # (페이지에 포함된 대화만 Message(conversation, created_at) 인덱스로 계산)
+        messages = Message.objects.filter(conversation=OuterRef("pk"))
+        conversations = (
+            Conversation.objects.filter(user=user, is_active=True)
+            .annotate(
+                message_count=message_count(),
+                last_message=Subquery(
+                    messages.order_by("-created_at", "-id").values(
+                        preview=Substr("content", 1, settings.CONVERSATION_PREVIEW_CHARS)
+                    )[:1]
+                ),
+            )
+            .values("id", "title", "created_at", "updated_at", "message_count", "last_message")
+        )
         
-        return JsonResponse({"conversations": conversation_list})
+        rows, next_cursor = keyset_page(conversations, "updated_at", cursor, limit)
+        
+        conversation_list = [
+            {
+                'id': conv['id'],
+                'title': conv['title'],
+                'created_at': conv['created_at'].isoformat(),
+                'updated_at': conv['updated_at'].isoformat(),
+                'message_count': conv['message_count'],
+                'last_message': conv['last_message'] or "",
+            }
+            for conv in rows
+        ]
+        
+        data = {"conversations": conversation_list, "next_cursor": next_cursor}
+        if not cursor:
+            # 전체 대화 수는 첫 페이지에서만 (Conversation(user, is_active, -updated_at) 인덱스)
+            data["total"] = Conversation.objects.filter(user=user, is_active=True).count()
+        return data
     
     def post(self, request):
         """새 대화 생성"""
@@ -96,93 +252,166 @@ class ConversationView(View):
 
 @method_decorator(csrf_exempt, name="dispatch")
 class MessageView(View):
-    """메시지 관리 API"""
+    """메시지 관리 API (ASGI 이벤트 루프에서 비동기로 처리)"""
     
-    def get(self, request, conversation_id):
-        """특정 대화의 메시지 조회"""
-        if not request.user.is_authenticated:
+    async def get(self, request, conversation_id):
+        """특정 대화의 메시지 조회 (최신 페이지부터, cursor로 이전 메시지)"""
+        user = await request.auser()
+        if not user.is_authenticated:
             return JsonResponse({"error": "로그인이 필요합니다."}, status=401)
         
-        conversation = get_object_or_404(Conversation, id=conversation_id, user=request.user)
-        messages = conversation.messages.all()
+        cursor = request.GET.get("cursor")
+        limit = page_size(request, settings.MESSAGE_PAGE_SIZE)
         
-        message_list = []
-        for msg in messages:
-            message_list.append({
-                'id': msg.id,
-                'role': msg.role,
-                'content': msg.content,
-                'created_at': msg.created_at.isoformat()
-            })
+        # 사용자별 목록 캐시 (대화/메시지가 저장되면 무효화, 다른 사용자의 대화는 키가 다름)
+        key = await alist_cache_key(user.id, "messages", conversation_id, cursor, limit)
+        data = await cache.aget(key) if key else None
+        if data is not None:
+            return JsonResponse(data)
+        
+        conversation = await aget_object_or_404(Conversation, id=conversation_id, user=user)
         
-        return JsonResponse({
+        try:
+            rows, next_cursor = await akeyset_page(
+                conversation.messages.all(), "created_at", cursor, limit
+            )
+        except InvalidCursor as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        
+        # 페이지는 최신순으로 조회하고 화면에는 시간순으로
+        message_list = [message_to_dict(msg) for msg in reversed(rows)]
+        
+        data = {
             "conversation_id": conversation.id,
             "title": conversation.title,
-            "messages": message_list
-        })
+            "messages": message_list,
+            "next_cursor": next_cursor,
+        }
+        if key:
+            await cache.aset(key, data, settings.CONVERSATION_CACHE_TTL)
+        return JsonResponse(data)
     
-    def post(self, request, conversation_id):
-        """메시지 전송 및 챗봇 응답"""
-        if not request.user.is_authenticated:
+    async def post(self, request, conversation_id):
+        """메시지 전송 (답변 생성 작업을 큐에 넣고 바로 작업 id 반환, LLM 응답을 기다리지 않음)"""
+        user = await request.auser()
+        if not user.is_authenticated:
             return JsonResponse({"error": "로그인이 필요합니다."}, status=401)
         
         try:
-            conversation = get_object_or_404(Conversation, id=conversation_id, user=request.user)
-            body = json.loads(request.body)
-            user_message = body.get("message", "")
-            
-            if not user_message:
+            job, _ = await enqueue_message(request, user, conversation_id)
+            if job is None:
                 return JsonResponse({"error": "메시지가 비어있습니다."}, status=400)
             
-            # 사용자 메시지 저장
-            user_msg = Message.objects.create(
-                conversation=conversation,
-                role='user',
-                content=user_message
-            )
-            
-            # 대화 히스토리 가져오기
-            history = []
-            for msg in conversation.messages.all():
-                history.append({
-                    'role': msg.role,
-                    'content': msg.content
-                })
-            
-            # 챗봇 응답 생성
-            chatbot_response = run_chatbot(user_message, history=history)
-            
-            # 챗봇 응답 저장
-            assistant_msg = Message.objects.create(
-                conversation=conversation,
-                role='assistant',
-                content=chatbot_response
-            )
-            
-            # 대화 제목 업데이트 (첫 번째 메시지인 경우)
-            if conversation.messages.count() == 2:  # 사용자 메시지 + 챗봇 응답
-                conversation.title = user_message[:50] + "..." if len(user_message) > 50 else user_message
-                conversation.save()
-            
             return JsonResponse({
-                "user_message": {
-                    'id': user_msg.id,
-                    'role': user_msg.role,
-                    'content': user_msg.content,
-                    'created_at': user_msg.created_at.isoformat()
-                },
-                "assistant_message": {
-                    'id': assistant_msg.id,
-                    'role': assistant_msg.role,
-                    'content': assistant_msg.content,
-                    'created_at': assistant_msg.created_at.isoformat()
-                }
-            })
-            
+                "job_id": str(job.id),
+                "status": job.status,
+                "status_url": f"/api/jobs/{job.id}/",
+            }, status=202)
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
 
 
+@method_decorator(csrf_exempt, name="dispatch")
+class MessageStreamView(View):
+    """메시지 전송 및 챗봇 응답 스트리밍 API (Server-Sent Events)"""
+    
+    async def post(self, request, conversation_id):
+        """답변 생성 작업을 큐에 넣고, 작업의 진행 상태와 답변을 SSE로 전송
+
+        생성과 저장은 작업 워커가 하고, 여기서는 작업이 끝날 때까지 상태/생성 중인
+        답변의 변경분을 보낸다. 연결이 끊겨도 작업은 계속되고 결과는 JobView로 조회한다.
+        작업이 대기열에 너무 오래 있거나 워커가 멈추면 오류 이벤트를 보내고 끝낸다.
+        """
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "로그인이 필요합니다."}, status=401)
+        
+        try:
+            job, user_msg = await enqueue_message(request, user, conversation_id)
+            if job is None:
+                return JsonResponse({"error": "메시지가 비어있습니다."}, status=400)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+        
+        queryset = GenerationJob.objects.select_related(
+            "conversation", "user_message", "assistant_message"
+        )
+        
+        async def event_stream():
+            yield sse_event({"type": "job", "job_id": str(job.id), "status_url": f"/api/jobs/{job.id}/"})
+            yield sse_event({"type": "user_message", "message": message_to_dict(user_msg)})
+            
+            sent = ""
+            stage = ""
+            finished = False
+            try:
+                async with aclosing(jobs.watch_job(queryset, job)) as updates:
+                    async for current in updates:
+                        if current.stage != stage and current.stage not in ("", "done"):
+                            stage = current.stage
+                            yield sse_event({"type": "status", "stage": stage})
+                        
+                        content = current.partial
+                        done = current.status == GenerationJob.DONE
+                        if done and current.assistant_message:
+                            content = current.assistant_message.content
+                        # 새로 생성된 부분만 토큰으로 전송
+                        if content.startswith(sent) and len(content) > len(sent):
+                            yield sse_event({"type": "token", "content": content[len(sent):]})
+                            sent = content
+                        
+                        if done:
+                            finished = True
+                            yield sse_event({"type": "done", **job_to_dict(current)})
+                        elif current.status == GenerationJob.FAILED:
+                            finished = True
+                            yield sse_event(
+                                {"type": "error", "error": current.error, "question": job.question}
+                            )
+                # 작업이 끝나지 않았는데 기다리기를 멈춘 경우 (실행 중인 워커가 멈춤)
+                if not finished:
+                    yield sse_event({
+                        "type": "error",
+                        "error": "Generation worker stopped responding",
+                        "question": job.question,
+                    })
+            except Exception as e:
+                yield sse_event({"type": "error", "error": str(e)})
+        
+        response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # nginx 프록시 버퍼링 비활성화 (토큰을 바로 전달)
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class JobView(View):
+    """답변 생성 작업 상태 조회 API (wait 초만큼 변경을 기다리는 롱 폴링 지원)"""
+    
+    async def get(self, request, job_id):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "로그인이 필요합니다."}, status=401)
+        
+        queryset = GenerationJob.objects.select_related(
+            "conversation", "user_message", "assistant_message"
+        )
+        job = await aget_object_or_404(queryset, id=job_id, conversation__user=user)
+        
+        try:
+            wait = min(float(request.GET.get("wait", 0)), settings.JOB_MAX_WAIT)
+        except ValueError:
+            wait = 0
+        
+        # 상태/단계/생성 중인 답변이 바뀌거나 wait 초가 지날 때까지 대기
+        async with aclosing(jobs.watch_job(queryset, job, wait)) as updates:
+            async for job in updates:
+                break
+        
+        return JsonResponse(job_to_dict(job))
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class ConversationDetailView(View):
     """대화 상세 관리 API"""
@@ -224,3 +453,19 @@ class ConversationDetailView(View):
                 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
+
+
+class MetricsView(View):
+    """Prometheus 수집용 단계별 지연 시간/토큰 지표 (METRICS_TOKEN으로 보호)"""
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if not token:
+            # 토큰이 없으면 개발 환경에서만 공개하고, 운영에서는 경로를 숨김
+            if not settings.DEBUG:
+                raise Http404
+        elif not hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return JsonResponse({"error": "Unauthorized"}, status=401)
+        return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
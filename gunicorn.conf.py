@@ -10,3 +10,13 @@ print(workers)  # 25 (물리코어 6, 논리코어 12인 경우)
 bind = "0.0.0.0:8000"  # 바인드할 주소와 포트
 worker_class = "uvicorn.workers.UvicornWorker"
 timeout = 30  # 요청 타임아웃 (초 단위)
+
+# 워커마다 앱 로딩 시점에 RAG 런타임(Chroma/LLM 클라이언트)을 미리 생성
+raw_env = ["CHATBOT_WARMUP=1"]
+
+
+def on_starting(server):
+    # 이전 실행에서 종료된 프로세스의 지표 파일 삭제 (남아 있으면 /metrics가 계속 합산함)
+    from chatbot.telemetry import clear_metrics
+
+    clear_metrics()
@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "skn4th.settings")
 
-application = get_asgi_application()
+# get_asgi_application()과 같지만, 모델 검색 업로드는 디스크 없이 크기 제한을 걸어 받는 핸들러 사용
+django.setup(set_prefix=False)
+
+from chatbot.uploads import UploadLimitASGIHandler  # noqa: E402
+
+application = UploadLimitASGIHandler()
+
+# GENERATION_IN_PROCESS면 서버 기동 시 같은 프로세스 안에서 답변 생성 작업 워커 시작
+from chatbot.jobs import start_in_process_worker  # noqa: E402
+
+start_in_process_worker()
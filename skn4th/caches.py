@@ -0,0 +1,33 @@
+from urllib.parse import urlsplit
+
+# URL scheme → Django 캐시 백엔드
+BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "rediss": "django.core.cache.backends.redis.RedisCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def parse_cache_url(url: str, timeout: int = 300, key_prefix: str = "") -> dict:
+    """CACHE_URL → Django CACHES 항목
+
+    locmem:// (프로세스마다 따로인 메모리 캐시, 기본), redis://host:6379/0,
+    dummy:// (캐시 끔) 형식을 지원한다. 여러 워커/서버가 무효화를 공유하려면
+    redis를 쓴다.
+    """
+    parts = urlsplit(url)
+    backend = BACKENDS.get(parts.scheme)
+    if backend is None:
+        raise ValueError(f"Unsupported CACHE_URL scheme: {parts.scheme}")
+    cache = {"BACKEND": backend, "TIMEOUT": timeout, "KEY_PREFIX": key_prefix}
+    if parts.scheme.startswith("redis"):
+        cache["LOCATION"] = url
+    elif parts.scheme == "locmem":
+        cache["LOCATION"] = parts.netloc or "default"
+    return cache
+
+
+def is_shared_cache(cache: dict) -> bool:
+    """여러 워커/서버가 같은 내용을 보는 캐시인지 (locmem은 프로세스마다 따로)"""
+    return cache["BACKEND"] == BACKENDS["redis"]
@@ -18,11 +18,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.views.generic import TemplateView
+from chatbot.views import MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("chatbot.urls")),
     path("uauth/", include("uauth.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("", include("main.urls")),
     # 모든 미정의된 경로 → 메인 페이지
     re_path(r"^(?:.*)/?$", TemplateView.as_view(template_name="index.html")),
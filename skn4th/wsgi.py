@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "skn4th.settings")
 
 application = get_wsgi_application()
+
+# GENERATION_IN_PROCESS면 서버 기동 시 같은 프로세스 안에서 답변 생성 작업 워커 시작
+from chatbot.jobs import start_in_process_worker  # noqa: E402
+
+start_in_process_worker()
@@ -15,6 +15,11 @@ let currentConversationId = "1";
 let isTyping = false;
 let isAuthenticated = false;
 
+// 대화 목록 페이지 (커서 기반, 사이드바 스크롤 시 다음 페이지 로드)
+let conversationCursor = null;
+let isLoadingConversations = false;
+let totalConversationCount = null;
+
 // DOM 요소 (안전하게 가져오기)
 let chatMessages, messageInput, chatForm, imageInput, imageDisplayArea;
 let conversationList, newChatBtn, clearAllBtn, deleteCurrBtn, downloadBtn, downloadCurrBtn;
@@ -69,22 +74,11 @@ async function loadUserConversations() {
     if (response.ok) {
       const data = await response.json();
       conversations = {};
+      totalConversationCount = data.total ?? null;
       
       if (data.conversations && data.conversations.length > 0) {
-        // 기존 대화들을 로드
-        for (const conv of data.conversations) {
-          conversations[conv.id] = {
-            id: conv.id,
-            title: conv.title,
-            messages: [
-              {
-                role: "system",
-                content: "세탁기/건조기 매뉴얼 Q&A 챗봇이 시작되었습니다.",
-              },
-            ],
-            image: null,
-          };
-        }
+        // 기존 대화들을 로드 (첫 페이지만, 나머지는 스크롤 시 로드)
+        addConversationPage(data);
         currentConversationId = data.conversations[0].id.toString();
         
         // 첫 번째 대화의 메시지들 로드
@@ -107,7 +101,63 @@ async function loadUserConversations() {
   updateStats();
 }
 
-// 특정 대화의 메시지들 로드
+// 서버 대화 목록 한 페이지를 conversations에 추가
+function addConversationPage(data) {
+  for (const conv of data.conversations) {
+    if (conversations[conv.id]) continue;
+    conversations[conv.id] = {
+      id: conv.id,
+      title: conv.title,
+      preview: conv.last_message,
+      messageCount: conv.message_count,
+      updatedAt: new Date(conv.updated_at),
+      messages: [
+        {
+          role: "system",
+          content: "세탁기/건조기 매뉴얼 Q&A 챗봇이 시작되었습니다.",
+        },
+      ],
+      messagesLoaded: false,
+      image: null,
+    };
+  }
+  conversationCursor = data.next_cursor || null;
+}
+
+// 대화 목록 다음 페이지 로드
+async function loadMoreConversations() {
+  if (!conversationCursor || isLoadingConversations) return;
+  isLoadingConversations = true;
+  
+  try {
+    const response = await fetch(`/api/conversations/?cursor=${encodeURIComponent(conversationCursor)}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      }
+    });
+    
+    if (response.ok) {
+      addConversationPage(await response.json());
+      updateConversationList();
+      updateStats();
+    }
+  } catch (error) {
+    console.error('Error loading conversations:', error);
+  } finally {
+    isLoadingConversations = false;
+  }
+}
+
+// 사이드바 끝에 가까워지면 다음 페이지 로드
+function handleConversationListScroll(e) {
+  const list = e.currentTarget;
+  if (list.scrollTop + list.clientHeight >= list.scrollHeight - 100) {
+    loadMoreConversations();
+  }
+}
+
+// 특정 대화의 메시지들 로드 (최근 페이지)
 async function loadConversationMessages(conversationId) {
   try {
     const response = await fetch(`/api/conversations/${conversationId}/messages/`, {
@@ -126,12 +176,51 @@ async function loadConversationMessages(conversationId) {
         },
         ...data.messages
       ];
+      conversations[conversationId].messagesCursor = data.next_cursor || null;
+      conversations[conversationId].messagesLoaded = true;
     }
   } catch (error) {
     console.error('Error loading messages:', error);
   }
 }
 
+// 현재 대화의 이전 메시지 페이지 로드 (채팅창 맨 위로 스크롤 시)
+async function loadOlderMessages(conversationId) {
+  const conv = conversations[conversationId];
+  if (!conv || !conv.messagesCursor || conv.loadingOlder) return;
+  conv.loadingOlder = true;
+  
+  try {
+    const response = await fetch(
+      `/api/conversations/${conversationId}/messages/?cursor=${encodeURIComponent(conv.messagesCursor)}`,
+      {
+        method: 'GET',
+        headers: {
+          'Content-Type': 'application/json',
+        }
+      }
+    );
+    
+    if (response.ok) {
+      const data = await response.json();
+      // 시스템 메시지 바로 뒤에 이전 메시지 삽입
+      conv.messages.splice(1, 0, ...data.messages);
+      conv.messagesCursor = data.next_cursor || null;
+      
+      if (conversationId === currentConversationId) {
+        // 보고 있던 위치 유지
+        const previousHeight = chatMessages.scrollHeight;
+        updateChatDisplay();
+        chatMessages.scrollTop = chatMessages.scrollHeight - previousHeight;
+      }
+    }
+  } catch (error) {
+    console.error('Error loading messages:', error);
+  } finally {
+    conv.loadingOlder = false;
+  }
+}
+
 // 기본 대화 설정
 function setupDefaultConversation() {
   conversations = {
@@ -200,6 +289,19 @@ function setupEventListeners() {
     });
   }
 
+  // 대화 목록/메시지 페이지 지연 로드
+  const conversationPanel = document.querySelector('.conversation-list');
+  if (conversationPanel) {
+    conversationPanel.addEventListener("scroll", handleConversationListScroll);
+  }
+  if (chatMessages) {
+    chatMessages.addEventListener("scroll", () => {
+      if (chatMessages.scrollTop === 0) {
+        loadOlderMessages(currentConversationId);
+      }
+    });
+  }
+
   // 버튼 이벤트
   if (newChatBtn) {
     newChatBtn.addEventListener("click", createNewConversation);
@@ -287,11 +389,13 @@ async function handleChatSubmit(e) {
 }
 
 // 서버에 메시지 전송 (로그인한 사용자용)
+// 답변 생성 작업을 등록하고, 작업의 진행 상태와 답변을 SSE로 받아 바로 표시
 async function sendMessageToServer(conversationId, message) {
   showTypingIndicator();
+  let assistantMessage = null;
   
   try {
-    const response = await fetch(`/api/conversations/${conversationId}/messages/`, {
+    const response = await fetch(`/api/conversations/${conversationId}/messages/stream/`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -299,28 +403,63 @@ async function sendMessageToServer(conversationId, message) {
       body: JSON.stringify({ message: message })
     });
     
-    if (response.ok) {
-      const data = await response.json();
-      hideTypingIndicator();
+    if (!response.ok || !response.body) {
+      throw new Error('Failed to send message');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
       
-      // 사용자 메시지와 챗봇 응답을 화면에 추가
-      if (conversationId === currentConversationId) {
-        // 대화 제목 업데이트
-        if (data.user_message && data.assistant_message) {
-          conversations[conversationId].title = message.substring(0, 50) + (message.length > 50 ? "..." : "");
-          updateConversationList();
-        }
+      buffer += decoder.decode(value, { stream: true });
+      const rawEvents = buffer.split("\n\n");
+      buffer = rawEvents.pop();  // 아직 완성되지 않은 이벤트는 다음 청크와 합침
+      
+      for (const rawEvent of rawEvents) {
+        const event = parseSSEEvent(rawEvent);
+        if (!event) continue;
         
-        // 챗봇 응답만 추가 (사용자 메시지는 이미 추가됨)
-        if (data.assistant_message) {
-          addMessage("assistant", data.assistant_message.content);
+        if (event.type === "status") {
+          updateTypingStatus(event.stage);
+        } else if (event.type === "token") {
+          if (!assistantMessage) {
+            // 첫 토큰 도착 시 타이핑 인디케이터를 답변 말풍선으로 교체
+            hideTypingIndicator();
+            assistantMessage = { role: "assistant", content: "", timestamp: new Date() };
+            conversations[conversationId].messages.push(assistantMessage);
+            if (conversationId === currentConversationId) {
+              updateChatDisplay();
+            }
+          }
+          assistantMessage.content += event.content;
+          if (conversationId === currentConversationId) {
+            renderStreamingMessage(assistantMessage.content);
+          }
+        } else if (event.type === "done") {
+          // 대화 제목 업데이트
+          if (event.title) {
+            conversations[conversationId].title = event.title;
+          }
+          // 서버 목록과 같이 방금 대화한 대화를 맨 위로
+          conversations[conversationId].updatedAt = new Date();
+          conversations[conversationId].preview = assistantMessage ? assistantMessage.content : "";
+          updateConversationList();
+        } else if (event.type === "error") {
+          // 실패한 질문은 서버에 저장되지 않으므로 다시 보낼 수 있게 입력창에 되돌림
+          if (event.question && !messageInput.value) {
+            messageInput.value = event.question;
+          }
+          throw new Error(event.error);
         }
       }
-      
-      updateStats();
-    } else {
-      throw new Error('Failed to send message');
     }
+    
+    hideTypingIndicator();
+    updateStats();
   } catch (error) {
     hideTypingIndicator();
     const errorMsg = "서버 오류가 발생했습니다.";
@@ -333,6 +472,40 @@ async function sendMessageToServer(conversationId, message) {
   }
 }
 
+// SSE 이벤트 한 개 파싱 ("data: {...}" 줄)
+function parseSSEEvent(rawEvent) {
+  const data = rawEvent
+    .split("\n")
+    .filter((line) => line.startsWith("data: "))
+    .map((line) => line.slice(6))
+    .join("\n");
+  if (!data) return null;
+  
+  try {
+    return JSON.parse(data);
+  } catch (error) {
+    console.error("SSE parse error:", error);
+    return null;
+  }
+}
+
+// 스트리밍 중인 답변 말풍선만 갱신
+function renderStreamingMessage(content) {
+  if (!chatMessages) return;
+  const contents = chatMessages.querySelectorAll(".message.assistant .message-content");
+  if (contents.length === 0) return;
+  contents[contents.length - 1].innerHTML = formatMessageContent(content);
+  scrollToBottom();
+}
+
+// 타이핑 인디케이터 문구를 진행 단계에 맞게 변경
+function updateTypingStatus(stage) {
+  const indicator = chatMessages && chatMessages.querySelector(".typing-message .typing-indicator");
+  if (!indicator) return;
+  const label = stage === "retrieval" ? "관련 정보를 검색 중입니다" : "답변을 작성 중입니다";
+  indicator.innerHTML = `${label}<span class="typing-dots"></span>`;
+}
+
 // 메시지 추가
 function addMessage(role, content) {
   if (!conversations[currentConversationId]) return;
@@ -509,14 +682,17 @@ async function createNewConversation() {
         conversations[newId] = {
           id: data.id,
           title: data.title,
+          updatedAt: new Date(),
           messages: [
             {
               role: "system",
               content: "세탁기/건조기 매뉴얼 Q&A 챗봇이 시작되었습니다.",
             },
           ],
+          messagesLoaded: true,
           image: null,
         };
+        if (totalConversationCount !== null) totalConversationCount += 1;
         
         currentConversationId = newId;
         updateConversationList();
@@ -553,7 +729,11 @@ function updateConversationList() {
   if (!conversationList) return;
   
   conversationList.innerHTML = "";
-  Object.keys(conversations).forEach((id) => {
+  // 최근 대화 순 (updatedAt이 없으면 기존 순서 유지)
+  const ids = Object.keys(conversations).sort(
+    (a, b) => (conversations[b].updatedAt || 0) - (conversations[a].updatedAt || 0)
+  );
+  ids.forEach((id) => {
     const wrapper = document.createElement("div");
     wrapper.className = `conversation-item-wrapper mb-2 ${
       id === currentConversationId ? "active" : ""
@@ -567,7 +747,9 @@ function updateConversationList() {
         </div>
         <div class="conversation-content flex-grow-1" style="cursor: pointer;">
           <div class="conversation-title">${conversations[id].title}</div>
-          <div class="conversation-subtitle">세탁기/건조기 매뉴얼 Q&A</div>
+          <div class="conversation-subtitle">${
+            conversations[id].preview ? escapeHtml(conversations[id].preview) : "세탁기/건조기 매뉴얼 Q&A"
+          }</div>
         </div>
         <div class="conversation-actions d-flex align-items-center">
           <button class="btn btn-sm btn-outline-danger delete-conversation-btn me-2" 
@@ -614,6 +796,12 @@ async function clearAllConversations() {
     if (isAuthenticated) {
       // 로그인한 사용자는 서버에서 대화들 삭제
       try {
+        // 아직 로드하지 않은 페이지의 대화도 삭제
+        let previousCursor = null;
+        while (conversationCursor && conversationCursor !== previousCursor) {
+          previousCursor = conversationCursor;
+          await loadMoreConversations();
+        }
         for (const id of Object.keys(conversations)) {
           await fetch(`/api/conversations/${id}/`, {
             method: 'DELETE',
@@ -664,6 +852,7 @@ async function deleteSpecificConversation(conversationId) {
     
     // 로컬에서 대화를 삭제
     delete conversations[conversationId];
+    if (totalConversationCount !== null) totalConversationCount -= 1;
 
     // 삭제된 대화가 현재 대화였다면 다른 대화로 전환
     if (conversationId === currentConversationId) {
@@ -736,9 +925,13 @@ function downloadChatCurrHistory() {
 
 // 통계 업데이트
 function updateStats() {
+  // 메시지를 아직 로드하지 않은 대화는 서버가 알려준 메시지 수 사용
   const totalMsg = Object.values(conversations).reduce(
     (total, conv) =>
-      total + conv.messages.filter((m) => m.role !== "system").length,
+      total +
+      (conv.messagesLoaded === false
+        ? conv.messageCount || 0
+        : conv.messages.filter((m) => m.role !== "system").length),
     0
   );
   
@@ -747,7 +940,7 @@ function updateStats() {
   }
   
   if (totalConversations) {
-    totalConversations.textContent = Object.keys(conversations).length;
+    totalConversations.textContent = totalConversationCount ?? Object.keys(conversations).length;
   }
 }
 
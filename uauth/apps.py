@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UauthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'uauth'
+
+    def ready(self):
+        # 가입/삭제 시 아이디 존재 여부 캐시 갱신
+        from . import signals  # noqa: F401
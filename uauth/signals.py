@@ -0,0 +1,36 @@
+from functools import partial
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .usernames import forget_username, remember_username
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # 아이디가 바뀌면 이전 아이디가 계속 사용 중으로 캐시되지 않게 저장 후 지움
+    # (last_login 갱신처럼 username을 건드리지 않는 저장은 조회 생략)
+    instance._previous_username = None
+    if instance.pk is None or (update_fields is not None and "username" not in update_fields):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+    if previous is not None and previous != instance.username:
+        instance._previous_username = previous
+
+
+def _username_saved(username, previous):
+    remember_username(username, True)
+    if previous:
+        forget_username(previous)
+
+
+# 캐시는 커밋된 뒤에만 갱신 (롤백된 가입/변경/삭제가 캐시에 남지 않게)
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_username", None)
+    transaction.on_commit(partial(_username_saved, instance.username, previous))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(remember_username, instance.username, False))
@@ -1,3 +1,81 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from .usernames import _key, username_exists
 
-# Create your tests here.
+
+@override_settings(USERNAME_CACHE_TTL=60)
+class UsernameCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create_user(self, username):
+        with self.captureOnCommitCallbacks(execute=True):
+            return User.objects.create_user(username, password="pw")
+
+    def test_missing_username_is_cached_until_signup(self):
+        self.assertFalse(username_exists("newcomer"))
+        self.assertIs(cache.get(_key("newcomer")), False)
+
+        self.create_user("newcomer")
+        with self.assertNumQueries(0):
+            self.assertTrue(username_exists("newcomer"))
+
+    def test_rename_frees_previous_username(self):
+        user = self.create_user("before")
+        self.assertTrue(username_exists("before"))
+
+        user.username = "after"
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        self.assertFalse(username_exists("before"))
+        with self.assertNumQueries(0):
+            self.assertTrue(username_exists("after"))
+
+    def test_rolled_back_rename_leaves_cache_unchanged(self):
+        user = self.create_user("kept")
+        self.assertFalse(username_exists("discarded"))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                user.username = "discarded"
+                user.save()
+                raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertTrue(username_exists("kept"))
+            self.assertFalse(username_exists("discarded"))
+
+    def test_save_without_username_skips_lookup(self):
+        user = self.create_user("steady")
+        # UPDATE 한 번만 (이전 아이디 조회 없음)
+        with self.assertNumQueries(1):
+            user.save(update_fields=["last_login"])
+        self.assertTrue(username_exists("steady"))
+
+    def test_delete_frees_username(self):
+        user = self.create_user("leaving")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        with self.assertNumQueries(0):
+            self.assertFalse(username_exists("leaving"))
+
+    def test_check_username_view(self):
+        self.create_user("taken")
+        url = reverse("uauth:check_username")
+        self.assertEqual(self.client.get(url, {"username": "taken"}).json(), {"available": False})
+        self.assertEqual(self.client.get(url, {"username": "free"}).json(), {"available": True})
+        self.assertEqual(self.client.get(url).json(), {"available": True})
+
+
+@override_settings(USERNAME_CACHE_TTL=0)
+class UncachedUsernameTests(TestCase):
+    def test_reads_database_every_time(self):
+        User.objects.create_user("plain", password="pw")
+        with self.assertNumQueries(1):
+            self.assertTrue(username_exists("plain"))
+        self.assertIsNone(cache.get(_key("plain")))
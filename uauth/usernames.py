@@ -0,0 +1,36 @@
+import hashlib
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+
+def _key(username):
+    digest = hashlib.sha1(username.encode("utf-8")).hexdigest()
+    return f"uauth:username:{digest}"
+
+
+def username_exists(username):
+    """아이디 사용 여부 (캐시에 없을 때만 DB 조회, 없는 아이디도 캐시)
+
+    가입/삭제/아이디 변경 시 캐시를 바로 갱신하므로, 다른 워커도 같은 캐시를 보는 공유 캐시에서만
+    켠다 (USERNAME_CACHE_TTL=0이면 매번 DB 조회).
+    """
+    username = username or ""
+    if not settings.USERNAME_CACHE_TTL:
+        return User.objects.filter(username=username).exists()
+    exists = cache.get(_key(username))
+    if exists is None:
+        exists = User.objects.filter(username=username).exists()
+        cache.set(_key(username), exists, settings.USERNAME_CACHE_TTL)
+    return exists
+
+
+def remember_username(username, exists=True):
+    if settings.USERNAME_CACHE_TTL:
+        cache.set(_key(username or ""), exists, settings.USERNAME_CACHE_TTL)
+
+
+def forget_username(username):
+    """캐시된 값을 지워서 다음 조회는 DB에서 확인"""
+    if settings.USERNAME_CACHE_TTL:
+        cache.delete(_key(username or ""))
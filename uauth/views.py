@@ -1,3 +1,4 @@
+import logging
 from django.shortcuts import render
 from django.contrib import auth
 from django.shortcuts import redirect
@@ -6,6 +7,9 @@ from django.contrib.auth.models import User
 from django.http import JsonResponse
 
 from .models import UserForm
+from .usernames import username_exists
+
+logger = logging.getLogger(__name__)
 
 
 def logout(request):
@@ -46,7 +50,7 @@ def check_username(request):
   """
   username = request.GET.get('username')
   # 사용가능여부 
-  available =  User.objects.filter(username=username).exists() == False
-  print(f"{username=}, {available=}")
+  available = not username_exists(username) # 캐시에 없을 때만 DB 조회
+  logger.debug("check_username %r available=%s", username, available)
 
   return JsonResponse({'available': available})
\ No newline at end of file